@@ -1,6 +1,8 @@
 import os
-from pymongo import MongoClient
+from datetime import datetime, timezone
+from pymongo import MongoClient, UpdateOne
 from dotenv import load_dotenv
+from app.normalization import normalize_company
 
 # Load environment variables
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -37,43 +39,50 @@ def add_sample_companies():
             "name": "TechInnovate Solutions",
             "industry": "Software Development",
             "location": "San Francisco, CA",
-            "employee_count": 750,
+            "employeeCount": 750,
             "revenue": "$150M",
             "website": "techinnovate.com",
             "description": "Leading provider of innovative software solutions.",
-            "contact_info": "info@techinnovate.com",
-            "probability_score": 8.9,
+            "contactInfo": "info@techinnovate.com",
+            "probabilityScore": 8.9,
             "insights_summary": "Strong growth in AI and cloud services."
         },
         {
             "name": "GreenLife Organics",
             "industry": "Agriculture & Food",
             "location": "Boulder, CO",
-            "employee_count": 200,
+            "employeeCount": 200,
             "revenue": "$50M",
             "website": "greenlifeorganics.com",
             "description": "Sustainable organic food producer.",
-            "contact_info": "sales@greenlifeorganics.com",
-            "probability_score": 7.5,
+            "contactInfo": "sales@greenlifeorganics.com",
+            "probabilityScore": 7.5,
             "insights_summary": "Expanding into new sustainable farming techniques."
         },
         {
             "name": "Future Mobility Inc.",
             "industry": "Automotive",
             "location": "Detroit, MI",
-            "employee_count": 1500,
+            "employeeCount": 1500,
             "revenue": "$500M",
             "website": "futuremobility.io",
             "description": "Developing next-generation electric vehicles.",
-            "contact_info": "careers@futuremobility.io",
-            "probability_score": 9.2,
+            "contactInfo": "careers@futuremobility.io",
+            "probabilityScore": 9.2,
             "insights_summary": "Recently secured major investment for EV battery research."
         }
     ]
 
-    for company_data in sample_companies:
-        if not companies_collection.find_one({"name": company_data["name"]}):
-            companies_collection.insert_one(company_data)
+    # One unordered round trip; $setOnInsert leaves companies that already exist untouched
+    now = datetime.now(timezone.utc)
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    result = companies_collection.bulk_write([
+        UpdateOne({"name": company_data["name"]}, {"$setOnInsert": {**normalize_company(company_data), "updated_at": now}}, upsert=True)
+        for company_data in sample_companies
+    ], ordered=False)
+    added = set(result.upserted_ids)
+    for index, company_data in enumerate(sample_companies):
+        if index in added:
             print(f"Added: {company_data['name']}")
         else:
             print(f"Skipped: {company_data['name']} (already exists)")
@@ -1,12 +1,17 @@
-from fastapi import APIRouter, HTTPException, status
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel
-from typing import Dict
+from typing import Any, Dict, Optional
+from ..services.auth_service import AuthService, InvalidToken
 
-router = APIRouter()
+# Require a bearer token on every API route except the ones in PUBLIC_PATHS
+AUTH_REQUIRED = os.getenv("AUTH_REQUIRED", "false").lower() == "true"
+PUBLIC_PATHS = {"/", "/metrics", "/api/health", "/api/login", "/api/register"}
 
-# Dummy in-memory database for users (for demonstration purposes only)
-# In a real application, this would be replaced with a proper database
-fake_users_db: Dict[str, Dict[str, str]] = {}
+router = APIRouter()
+auth_service = AuthService()
+bearer = HTTPBearer(auto_error=False)
 
 class UserRegistration(BaseModel):
     username: str
@@ -16,23 +21,47 @@ class UserLogin(BaseModel):
     username: str
     password: str
 
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)) -> Dict[str, Any]:
+    """Claims of the request's bearer token; verified in memory, without a database lookup"""
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    try:
+        claims = auth_service.verify_token(credentials.credentials)
+    except InvalidToken as e:
+        raise _unauthorized(str(e))
+    return {"username": claims["sub"], "expires_at": claims["exp"]}
+
+async def require_user(request: Request, credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)):
+    """App-wide dependency used when AUTH_REQUIRED is set"""
+    if request.url.path in PUBLIC_PATHS or request.method == "OPTIONS":
+        return None
+    return await get_current_user(credentials)
+
 @router.post("/register")
 async def register_user(user: UserRegistration):
-    if user.username in fake_users_db:
+    if not await auth_service.register(user.username, user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
-    # In a real application, you would hash the password before storing it
-    fake_users_db[user.username] = {"password": user.password}
     return {"message": "User registered successfully"}
 
 @router.post("/login")
 async def login_user(user: UserLogin):
-    stored_user = fake_users_db.get(user.username)
-    if not stored_user or stored_user["password"] != user.password:
+    if await auth_service.authenticate(user.username, user.password) is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
-    return {"message": "Login successful"} 
\ No newline at end of file
+    return {"message": "Login successful", **auth_service.issue_token(user.username)}
+
+@router.get("/me")
+async def read_current_user(current_user: Dict[str, Any] = Depends(get_current_user)):
+    return current_user
@@ -1,23 +1,77 @@
+import os
+import asyncio
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Optional
 from ..crm.models import CrmLead, CrmContact
 from ..services.crm_service import CRMService
+from ..services.crm_outbox import CrmOutbox
+from ..services.crm_sync import CrmSyncService
+
+# Largest number of leads accepted by one /crm/leads/batch request
+CRM_MAX_BATCH_REQUEST = int(os.getenv("CRM_MAX_BATCH_REQUEST", "10000"))
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 crm_service = CRMService()
+# Started and stopped by the app lifespan
+crm_outbox = CrmOutbox(crm_service)
+crm_sync = CrmSyncService(crm_outbox)
+_sync_task: Optional[asyncio.Task] = None
 
-@router.post("/crm/lead", summary="Create a new CRM Lead")
+@router.post("/crm/lead", summary="Queue a new CRM Lead", status_code=status.HTTP_202_ACCEPTED)
 async def create_crm_lead(lead_data: CrmLead):
     try:
-        response = await crm_service.send_to_crm(lead_data.model_dump(), "lead")
-        return {"message": "Lead created successfully", "crm_response": response}
+        ids = await crm_outbox.enqueue("lead", [lead_data.model_dump(mode="json")])
+        return {"message": "Lead queued for CRM delivery", "outbox_id": ids[0]}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-@router.post("/crm/contact", summary="Create a new CRM Contact")
+@router.post("/crm/contact", summary="Queue a new CRM Contact", status_code=status.HTTP_202_ACCEPTED)
 async def create_crm_contact(contact_data: CrmContact):
     try:
-        response = await crm_service.send_to_crm(contact_data.model_dump(), "contact")
-        return {"message": "Contact created successfully", "crm_response": response}
+        ids = await crm_outbox.enqueue("contact", [contact_data.model_dump(mode="json")])
+        return {"message": "Contact queued for CRM delivery", "outbox_id": ids[0]}
     except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.post("/crm/leads/batch", summary="Queue many CRM Leads at once", status_code=status.HTTP_202_ACCEPTED)
+async def create_crm_leads_batch(leads: List[CrmLead]):
+    if len(leads) > CRM_MAX_BATCH_REQUEST:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"At most {CRM_MAX_BATCH_REQUEST} leads per request")
+    try:
+        ids = await crm_outbox.enqueue("lead", [lead.model_dump(mode="json") for lead in leads])
+        return {"message": f"{len(ids)} leads queued for CRM delivery", "queued": len(ids), "outbox_ids": ids}
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.get("/crm/outbox", summary="CRM outbox counts by delivery status")
+async def get_crm_outbox_stats():
+    return await crm_outbox.stats()
+
+@router.get("/crm/outbox/{outbox_id}", summary="Delivery status of one queued CRM record")
+async def get_crm_outbox_record(outbox_id: str):
+    record = await crm_outbox.get(outbox_id)
+    if record is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Outbox record not found")
+    return record
+
+async def _run_crm_sync(full: bool):
+    try:
+        await crm_sync.run(full=full)
+    except Exception as e:
+        # The checkpoint stays "running", so the next sync resumes where this one stopped
+        logger.error(f"CRM sync failed: {e}")
+
+@router.post("/crm/sync", summary="Queue created and changed leads for the CRM", status_code=status.HTTP_202_ACCEPTED)
+async def start_crm_sync(full: bool = False):
+    global _sync_task
+    if _sync_task is not None and not _sync_task.done():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A CRM sync is already running")
+    _sync_task = asyncio.create_task(_run_crm_sync(full))
+    return {"message": "CRM sync started"}
+
+@router.get("/crm/sync", summary="Progress and counts of the last CRM sync")
+async def get_crm_sync_status():
+    return await crm_sync.status() or {"status": "never_run"}
@@ -0,0 +1,56 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Any, Dict, List, Optional
+from ..profiling import profile_store, require_debug_token, top_allocations, diff_allocations
+
+# Only included when profiling is enabled; every route needs the X-Debug-Token header
+router = APIRouter(prefix="/debug", dependencies=[Depends(require_debug_token)])
+
+
+@router.get("/profiles")
+async def list_profiles() -> List[Dict[str, Any]]:
+    return profile_store.list_profiles()
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = "collapsed"):
+    """Download a profile as collapsed stacks (flamegraph.pl / speedscope) or as a pstats text report"""
+    if format not in ("collapsed", "text"):
+        raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'text'")
+    rendered = profile_store.render_profile(profile_id, format)
+    if rendered is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    filename = f"{profile_id}.{'folded' if format == 'collapsed' else 'txt'}"
+    return PlainTextResponse(rendered, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@router.post("/memory/snapshots")
+async def take_memory_snapshot(filter: Optional[str] = "lead_store", limit: int = 25) -> Dict[str, Any]:
+    """Take a tracemalloc snapshot; `filter` restricts the top allocations to matching files"""
+    snapshot = await asyncio.to_thread(profile_store.take_snapshot)
+    result = {k: v for k, v in snapshot.items() if k != "snapshot"}
+    result["top"] = top_allocations(snapshot["snapshot"], filter, limit)
+    return result
+
+
+@router.get("/memory/snapshots")
+async def list_memory_snapshots() -> List[Dict[str, Any]]:
+    return profile_store.list_snapshots()
+
+
+@router.get("/memory/diff")
+async def diff_memory_snapshots(base: str, head: Optional[str] = None, filter: Optional[str] = "lead_store",
+                                limit: int = 25) -> Dict[str, Any]:
+    """Allocation growth from snapshot `base` to `head` (a new snapshot when omitted)"""
+    old = profile_store.snapshots.get(base)
+    new = profile_store.snapshots.get(head) if head else await asyncio.to_thread(profile_store.take_snapshot)
+    if old is None or new is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    top = await asyncio.to_thread(diff_allocations, old["snapshot"], new["snapshot"], filter, limit)
+    return {
+        "base": base,
+        "head": new["id"],
+        "traced_bytes_diff": new["traced_bytes"] - old["traced_bytes"],
+        "top": top,
+    }
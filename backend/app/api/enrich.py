@@ -3,7 +3,7 @@ from pydantic import BaseModel
 from typing import Any, Dict
 
 from ..services.enrichment_service import EnrichmentService
-from ..database import get_mongo_db # Import the get_mongo_db function
+from ..rate_limit import rate_limiter
 
 router = APIRouter()
 
@@ -12,14 +12,14 @@ enrichment_service = EnrichmentService()
 class EnrichRequest(BaseModel):
     companyName: str
 
-@router.post('/enrich')
-async def enrich_lead(request: EnrichRequest, db: Any = Depends(get_mongo_db)) -> Dict[str, Any]:
+@router.post('/enrich', dependencies=[Depends(rate_limiter.limit("enrich", providers=("hunter", "apollo", "newsapi")))])
+async def enrich_lead(request: EnrichRequest) -> Dict[str, Any]:
     if not request.companyName:
         raise HTTPException(status_code=400, detail="Company name not provided for enrichment.")
 
     try:
-        # Use the enrichment service to process the lead, passing the db object
-        enriched_result = await enrichment_service.enrich_single_lead(request.companyName, db)
+        # Use the enrichment service to process the lead
+        enriched_result = await enrichment_service.enrich_single_lead(request.companyName)
         
         if not enriched_result:
             raise HTTPException(status_code=404, detail="Company not found or could not be enriched.")
@@ -1,14 +1,15 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from typing import Dict, Any
-from ..services.insights_service import get_company_insights
+from ..services.insights_service import fetch_company_insights
+from ..rate_limit import rate_limiter
 
 router = APIRouter()
 
 class CompanyInsightsRequest(BaseModel):
     company: Dict[str, Any]
 
-@router.post("/insights")
+@router.post("/insights", dependencies=[Depends(rate_limiter.limit("insights", providers=("gemini",)))])
 async def get_insights_for_company(request: CompanyInsightsRequest) -> Dict[str, str]:
-    insights = get_company_insights(request.company)
+    insights = await fetch_company_insights(request.company)
     return insights 
\ No newline at end of file
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
-from app.database import get_mongo_db
 from app.services.scraping_service import ScrapingService # Import the new scraping service
+from app.rate_limit import rate_limiter
 
 router = APIRouter()
 
@@ -10,10 +10,10 @@ class ScrapeParams(BaseModel):
     industry: Optional[str] = None
     location: Optional[str] = None
 
-@router.post("/scrape_leads", response_model=List[Dict[str, Any]], summary="Scrape B2B leads from the internet")
-async def scrape_leads(params: ScrapeParams, db = Depends(get_mongo_db)) -> List[Dict[str, Any]]:
-    companies_collection = db.companies
-    scraping_service = ScrapingService(companies_collection)
+@router.post("/scrape_leads", response_model=List[Dict[str, Any]], summary="Scrape B2B leads from the internet",
+             dependencies=[Depends(rate_limiter.limit("scrape", providers=("scraperapi",)))])
+async def scrape_leads(params: ScrapeParams) -> List[Dict[str, Any]]:
+    scraping_service = ScrapingService()
     try:
         scraped_data = await scraping_service.scrape_b2b_leads(industry=params.industry, location=params.location)
         return scraped_data
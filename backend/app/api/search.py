@@ -1,53 +1,72 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from ..models.search import SearchParams, CompanyResponse
-from ..database import get_mongo_db
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, HTTPException, Request
+from typing import Any, Dict, List, Optional, Union
+from ..models.search import SearchParams, CompanyResponse, SearchPage, SEARCH_MAX_PAGE_SIZE
+from ..serialization import encode_response, projector, parse_fields, document_keys
+from ..database import companies
+import os
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Shapes search hits like CompanyResponse without validating a model per hit
+project_company = projector(CompanyResponse)
+
+# Values returned per industry/location facet, most frequent first
+SEARCH_FACET_LIMIT = int(os.getenv("SEARCH_FACET_LIMIT", "50"))
+
+# Points for each field a company has filled in; description only as a presence flag
+SCORE_WEIGHTS = (
+    ("name", 2.0), ("industry", 1.5), ("location", 1.5), ("website", 1.0),
+    ("description", 1.0), ("employeeCount", 1.0), ("revenue", 1.0),
+)
+# Fields calculate_probability_score reads
+SCORE_FIELDS = tuple(field for field, _ in SCORE_WEIGHTS if field != "description")
+
+# Employee-size facet buckets: (label, lower bound); each runs up to the next bound
+EMPLOYEE_SIZE_BUCKETS = (
+    ("1-10", 1), ("11-50", 11), ("51-200", 51), ("201-500", 201),
+    ("501-1000", 501), ("1001-5000", 1001), ("5001+", 5001),
+)
+
 def calculate_probability_score(company: dict) -> float:
     """Calculate a probability score for the company based on available data."""
-    score = 0.0
-    
-    # Base score for having basic information
-    if company.get("name"):
-        score += 2.0
-    if company.get("industry"):
-        score += 1.5
-    if company.get("location"):
-        score += 1.5
-    if company.get("website"):
-        score += 1.0
-    if company.get("description"):
-        score += 1.0
-    if company.get("employeeCount"):
-        score += 1.0
-    if company.get("revenue"):
-        score += 1.0
-    
+    score = sum(weight for field, weight in SCORE_WEIGHTS if company.get(field))
     return min(score, 10.0)  # Cap at 10
 
-@router.post("/search", response_model=List[CompanyResponse])
-async def search_companies(params: SearchParams, db: AsyncIOMotorDatabase = Depends(get_mongo_db)) -> List[CompanyResponse]:
+def _score_expression() -> dict:
+    """calculate_probability_score as an aggregation expression, so MongoDB can sort and page by it"""
+    missing = lambda field: {"$in": [{"$ifNull": [f"${field}", None]}, [None, "", 0, False]]}
+    return {"$min": [10.0, {"$add": [{"$cond": [missing(field), 0, weight]} for field, weight in SCORE_WEIGHTS]}]}
+
+def build_query(params: SearchParams) -> dict:
+    query = {}
+    if params.companyName:
+        query["name"] = {"$regex": params.companyName, "$options": "i"}
+    if params.industry:
+        query["industry"] = {"$regex": params.industry, "$options": "i"}
+    if params.location:
+        query["location"] = {"$regex": params.location, "$options": "i"}
+    # employeeCount is numeric in every normalized document, so ranges compare as numbers
+    if params.minEmployees:
+        query.setdefault("employeeCount", {})["$gte"] = int(params.minEmployees)
+    if params.maxEmployees:
+        query.setdefault("employeeCount", {})["$lte"] = int(params.maxEmployees)
+    return query
+
+@router.post("/search", response_model=None, responses={200: {"model": Union[List[CompanyResponse], SearchPage]}})
+async def search_companies(params: SearchParams, request: Request, fields: Optional[str] = None):
     try:
-        # Build query based on provided parameters
-        query = {}
-        if params.companyName:
-            query["name"] = {"$regex": params.companyName, "$options": "i"}
-        if params.industry:
-            query["industry"] = {"$regex": params.industry, "$options": "i"}
-        if params.location:
-            query["location"] = {"$regex": params.location, "$options": "i"}
-        if params.minEmployees:
-            query["employeeCount"] = {"$gte": int(params.minEmployees)}
-        if params.maxEmployees:
-            query["employeeCount"] = {"$lte": int(params.maxEmployees)}
+        query = build_query(params)
+        requested = parse_fields(fields, always=())
+        if params.pageSize or params.facets:
+            return encode_response(request, await _paged_search(query, params, requested))
+
+        if requested:
+            return encode_response(request, await _sparse_search(query, requested))
 
         # Execute search and convert cursor to list
-        results = await db.companies.find(query).to_list(length=None)
+        results = await companies.find_many(query)
         
         # Calculate probability scores and sort
         for result in results:
@@ -55,13 +74,97 @@ async def search_companies(params: SearchParams, db: AsyncIOMotorDatabase = Depe
         
         results.sort(key=lambda x: x.get("probabilityScore", 0), reverse=True)
         
-        # Convert to response model
-        return [CompanyResponse(**company) for company in results]
+        # Documents come from our own collection, so they are projected rather than validated
+        return encode_response(request, [project_company(company) for company in results])
         
     except Exception as e:
         logger.error(f"Error searching companies: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _sparse_search(query: dict, fields) -> List[dict]:
+    """
+    Search returning only `fields` of each hit. Mongo projects the documents,
+    so long descriptions never leave the server unless they were asked for.
+    """
+    projection = {"_id": 0}
+    projection.update({field: 1 for field in (*SCORE_FIELDS, *document_keys(CompanyResponse, fields))})
+    if "description" not in fields:
+        projection["_has_description"] = {"$cond": [{"$gt": ["$description", ""]}, True, False]}
+    results = await companies.aggregate([{"$match": query}, {"$project": projection}])
+
+    for result in results:
+        has_description = result.pop("_has_description", None)
+        scored = result if has_description is None else {**result, "description": has_description}
+        result["probabilityScore"] = calculate_probability_score(scored)
+
+    results.sort(key=lambda x: x.get("probabilityScore", 0), reverse=True)
+    project = projector(CompanyResponse, fields)
+    return [project(company) for company in results]
+
+async def _paged_search(query: dict, params: SearchParams, fields) -> Dict[str, Any]:
+    """
+    One page of hits plus the total and, if asked for, facet counts, from a
+    single `$facet` aggregation over the same filter. Scoring, sorting and
+    paging happen in MongoDB, so only the page itself is transferred.
+    """
+    page_size = params.pageSize or SEARCH_MAX_PAGE_SIZE
+    page = params.page
+    projection = {"_id": 0}
+    projection.update({field: 1 for field in document_keys(CompanyResponse, fields)})
+    projection["probabilityScore"] = 1
+
+    facets = {
+        "results": [
+            {"$addFields": {"probabilityScore": _score_expression()}},
+            {"$sort": {"probabilityScore": -1, "_id": 1}},
+            {"$skip": (page - 1) * page_size},
+            {"$limit": page_size},
+            {"$project": projection},
+        ],
+        "total": [{"$count": "count"}],
+    }
+    if params.facets:
+        for field in ("industry", "location"):
+            facets[field] = [
+                {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": SEARCH_FACET_LIMIT},
+            ]
+        facets["employeeSize"] = [{"$bucket": {
+            "groupBy": "$employeeCount",
+            "boundaries": [bound for _, bound in EMPLOYEE_SIZE_BUCKETS] + [10 ** 12],
+            "default": "unknown",
+            "output": {"count": {"$sum": 1}},
+        }}]
+
+    result = (await companies.aggregate([{"$match": query}, {"$facet": facets}]))[0]
+    project = projector(CompanyResponse, fields)
+    body = {
+        "results": [project(company) for company in result["results"]],
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "page": page,
+        "pageSize": page_size,
+    }
+    if params.facets:
+        body["facets"] = {
+            field: [{"value": bucket["_id"], "count": bucket["count"]} for bucket in result[field]]
+            for field in ("industry", "location")
+        }
+        body["facets"]["employeeSize"] = _size_facet(result["employeeSize"])
+    return body
+
+def _size_facet(buckets: List[dict]) -> List[dict]:
+    """Bucket counts with the minEmployees/maxEmployees values that drill down into each"""
+    counts = {bucket["_id"]: bucket["count"] for bucket in buckets}
+    facet = []
+    for i, (label, lower) in enumerate(EMPLOYEE_SIZE_BUCKETS):
+        upper = EMPLOYEE_SIZE_BUCKETS[i + 1][1] - 1 if i + 1 < len(EMPLOYEE_SIZE_BUCKETS) else None
+        if counts.get(lower):
+            facet.append({"value": label, "minEmployees": lower, "maxEmployees": upper, "count": counts[lower]})
+    if counts.get("unknown"):
+        facet.append({"value": "unknown", "count": counts["unknown"]})
+    return facet
+
 @router.options("/search")
 async def options_search():
     return {"message": "OK"} 
\ No newline at end of file
@@ -0,0 +1,75 @@
+import re
+from typing import Any, Dict, Optional
+from pydantic import ValidationError
+from .models import CrmLead, CrmContact
+from ..normalization import format_revenue
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+
+def _first(document: Dict[str, Any], *keys: str):
+    """Company documents carry both camelCase and snake_case spellings of some fields"""
+    for key in keys:
+        value = document.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _validated(model, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Validate against the CRM model, dropping fields that fail (e.g. a malformed website) rather than the record"""
+    payload = {k: v for k, v in payload.items() if v is not None}
+    for _ in range(2):
+        try:
+            return model(**payload).model_dump(mode="json", exclude_none=True)
+        except ValidationError as e:
+            bad = {error["loc"][0] for error in e.errors() if error["loc"]}
+            if not bad or not bad.isdisjoint(f for f, info in model.model_fields.items() if info.is_required()):
+                return None
+            payload = {k: v for k, v in payload.items() if k not in bad}
+    return None
+
+
+def company_to_crm_lead(company: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map a companies document to a CrmLead payload; None when it has no name"""
+    contact_info = _first(company, "contactInfo", "contact_info")
+    email = EMAIL_PATTERN.search(contact_info) if isinstance(contact_info, str) else None
+    city, state = None, None
+    location = _first(company, "location")
+    if isinstance(location, str):
+        parts = [part.strip() for part in location.split(",")]
+        city = parts[0] or None
+        state = parts[1] if len(parts) > 1 else None
+    employee_count = _first(company, "employeeCount", "employee_count")
+    return _validated(CrmLead, {
+        "company_name": _first(company, "name"),
+        "email": email.group(0) if email else None,
+        "website": _first(company, "website"),
+        "industry": _first(company, "industry"),
+        "city": city,
+        "state": state,
+        "employee_count": int(employee_count) if isinstance(employee_count, (int, float)) else None,
+        "revenue": format_revenue(_first(company, "revenue")),
+        "description": _first(company, "description"),
+        "contact_info": contact_info,
+    })
+
+
+def company_to_crm_contact(company: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Map the contact found by enrichment ("Jane Doe (jane@acme.com)") to a
+    CrmContact payload; None unless both a full name and an email are known.
+    """
+    contact_info = _first(company, "contactInfo", "contact_info")
+    if not isinstance(contact_info, str):
+        return None
+    email = EMAIL_PATTERN.search(contact_info)
+    name = contact_info.split("(", 1)[0].strip().split()
+    if not email or len(name) < 2 or EMAIL_PATTERN.search(name[0]):
+        return None
+    return _validated(CrmContact, {
+        "first_name": name[0],
+        "last_name": " ".join(name[1:]),
+        "email": email.group(0),
+        "company_name": _first(company, "name"),
+    })
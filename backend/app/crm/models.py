@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field, HttpUrl
+from pydantic import BaseModel, EmailStr, Field, HttpUrl, field_validator
 from typing import Optional, List, Dict, Any
+from ..normalization import format_revenue
 
 class CrmLead(BaseModel):
     # Core Lead Information
@@ -23,6 +24,14 @@ class CrmLead(BaseModel):
     # Additional fields to capture from enrichment
     description: Optional[str] = None
     contact_info: Optional[str] = None
+
+    @field_validator("revenue", mode="before")
+    @classmethod
+    def _format_revenue(cls, value):
+        # Companies store revenue in dollars; the CRM takes it as display text ("$150M")
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return format_revenue(value)
+        return value
     
     class Config:
         json_schema_extra = {
@@ -1,34 +1,310 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from pymongo.errors import ConnectionFailure
+from pymongo import ASCENDING, ReadPreference, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure
+from bson import ObjectId
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence
+from .metrics import (
+    MongoCommandMetrics, MongoPoolMetrics, MONGO_COMMAND_DURATION, MONGO_POOL_CHECKOUT_WAIT, MONGO_POOL_OPEN,
+    MONGO_POOL_IN_USE,
+)
+from .normalization import normalize_company
 import os
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
 
 # MongoDB Connection Details
 MONGO_DETAILS = os.getenv("MONGO_DETAILS", "mongodb://localhost:27017/company_db")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "company_db")
+# Pool bounds per server; these settings take precedence over options in MONGO_DETAILS
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+# Milliseconds an operation may wait for a free pooled connection before failing
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+# Milliseconds to find a usable server; the driver default of 30 s hides an unreachable database for too long
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+# Milliseconds a single read or write on a connection may take; 0 waits forever
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+# primary, primaryPreferred, secondary, secondaryPreferred or nearest; change tracking always reads the primary
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+# Connections opened at startup so the first requests do not pay for handshakes
+MONGO_WARMUP_CONNECTIONS = int(os.getenv("MONGO_WARMUP_CONNECTIONS", str(MONGO_MIN_POOL_SIZE)))
+# Documents per round trip for the batched reads and writes of CompaniesRepository
+MONGO_BATCH_SIZE = int(os.getenv("MONGO_BATCH_SIZE", "1000"))
 
 client: AsyncIOMotorClient = None
 db: AsyncIOMotorDatabase = None
+pool_metrics = MongoPoolMetrics()
+MONGO_POOL_OPEN.callback = lambda: pool_metrics.open
+MONGO_POOL_IN_USE.callback = lambda: pool_metrics.in_use
+
+def utcnow() -> datetime:
+    """Timestamp written to `updated_at` by every writer of the companies collection"""
+    now = datetime.now(timezone.utc)
+    # BSON dates have millisecond precision; truncate so watermarks compare exactly
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def to_mongo_id(lead_id: Any):
+    """ObjectId for ids that look like one; other ids are stored as given"""
+    if isinstance(lead_id, str) and ObjectId.is_valid(lead_id):
+        return ObjectId(lead_id)
+    return lead_id
+
+def _create_client():
+    if MONGO_DETAILS.startswith("mongomock://"):
+        # In-process stand-in for offline load tests; requires the mongomock-motor package
+        from mongomock_motor import AsyncMongoMockClient
+        return AsyncMongoMockClient()
+    return AsyncIOMotorClient(
+        MONGO_DETAILS,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS or None,
+        readPreference=MONGO_READ_PREFERENCE,
+        event_listeners=[MongoCommandMetrics(), pool_metrics],
+    )
 
 async def connect_to_mongo():
     global client, db
     try:
-        client = AsyncIOMotorClient(MONGO_DETAILS)
-        db = client.company_db  # Your database name
+        client = _create_client()
+        db = client[MONGO_DB_NAME]
         await client.admin.command('ping')
         print("MongoDB connection successful!")
     except ConnectionFailure as e:
         print(f"MongoDB connection failed: {e}")
         raise
+    await warm_up(MONGO_WARMUP_CONNECTIONS)
+
+async def warm_up(connections: int = MONGO_WARMUP_CONNECTIONS):
+    """
+    Open up to `connections` pooled connections by running that many pings at
+    once; each concurrent ping checks out its own connection. The driver then
+    keeps MONGO_MIN_POOL_SIZE of them open.
+    """
+    if connections <= 1 or client is None:
+        return
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(client.admin.command('ping') for _ in range(connections)))
+    except ConnectionFailure as e:
+        logger.warning(f"MongoDB warm-up failed: {e}")
+        return
+    logger.info(f"MongoDB pool warmed in {(time.perf_counter() - start) * 1000:.0f} ms "
+                f"({pool_metrics.open} connections open)")
 
 async def close_mongo_connection():
-    global client
+    global client, db
     if client:
         client.close()
+        client = db = None
         print("MongoDB connection closed.")
 
 async def get_mongo_db() -> AsyncIOMotorDatabase:
-    global db
     if db is None:
-        # This should ideally not happen if lifespan events are correctly configured
-        # but provides a fallback for direct dependency injection outside of lifespan
-        await connect_to_mongo()
-    return db 
\ No newline at end of file
+        # Creating a client here would skip pool settings and warm-up, and racing callers would each make one
+        raise RuntimeError("MongoDB is not connected; call connect_to_mongo() at startup")
+    return db
+
+def database_stats() -> Dict[str, Any]:
+    """Pool settings and counters plus per-command totals from the driver listeners"""
+    commands: Dict[str, Dict[str, Any]] = {}
+    for (command, outcome), (count, seconds) in MONGO_COMMAND_DURATION.summary().items():
+        entry = commands.setdefault(command, {"count": 0, "failed": 0, "total_ms": 0.0})
+        entry["count"] += count
+        entry["total_ms"] = round(entry["total_ms"] + seconds * 1000, 3)
+        if outcome == "failed":
+            entry["failed"] += count
+    for entry in commands.values():
+        entry["avg_ms"] = round(entry["total_ms"] / entry["count"], 3) if entry["count"] else 0.0
+    checkout_count, checkout_seconds = MONGO_POOL_CHECKOUT_WAIT.summary().get((), (0, 0.0))
+    return {
+        "connected": db is not None,
+        "settings": {
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "server_selection_timeout_ms": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            "socket_timeout_ms": MONGO_SOCKET_TIMEOUT_MS,
+            "read_preference": MONGO_READ_PREFERENCE,
+        },
+        "pool": {
+            **pool_metrics.snapshot(),
+            "avg_checkout_wait_ms": round(checkout_seconds / checkout_count * 1000, 3) if checkout_count else 0.0,
+        },
+        "commands": commands,
+    }
+
+class CompaniesRepository:
+    """
+    Reads and writes of the `companies` collection.
+
+    Reads go out in batches of MONGO_BATCH_SIZE (cursor batches, `$in`
+    chunks) and writes as unordered bulk_writes, so a page of leads costs a
+    round trip per batch rather than per document. Every write stamps
+    `updated_at`, which lead sync and CRM sync track. Reads that follow
+    changes (`primary=True`) bypass MONGO_READ_PREFERENCE so a lagging
+    secondary cannot hide a write.
+    """
+
+    def __init__(self, batch_size: int = MONGO_BATCH_SIZE):
+        self.batch_size = batch_size
+
+    @property
+    def collection(self):
+        if db is None:
+            raise RuntimeError("MongoDB is not connected; call connect_to_mongo() at startup")
+        return db.companies
+
+    def _reader(self, primary: bool):
+        if primary and MONGO_READ_PREFERENCE != "primary":
+            return self.collection.with_options(read_preference=ReadPreference.PRIMARY)
+        return self.collection
+
+    async def ensure_indexes(self):
+        # Upserts are keyed by name; lead sync and CRM sync scan by updated_at
+        await self.collection.create_index("name")
+        # Anchored prefix regexes on the normalized name (company suggestions) scan only this index range
+        await self.collection.create_index("nameKey")
+        await self.collection.create_index([("updated_at", ASCENDING), ("_id", ASCENDING)])
+
+    async def find_one(self, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None,
+                       sort: Optional[List] = None, primary: bool = False) -> Optional[Dict[str, Any]]:
+        return await self._reader(primary).find_one(query, projection, sort=sort)
+
+    async def find_many(self, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None,
+                        sort: Optional[List] = None, limit: int = 0, primary: bool = False) -> List[Dict[str, Any]]:
+        cursor = self._reader(primary).find(query, projection).batch_size(self.batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list(length=None)
+
+    async def iter_batches(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None,
+                           batch_size: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield the matching documents as lists of up to `batch_size`, one cursor batch each"""
+        batch_size = batch_size or self.batch_size
+        batch = []
+        async for doc in self.collection.find(query or {}, projection).batch_size(batch_size):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def find_by_ids(self, ids: Iterable[Any], projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Documents for string or ObjectId ids, fetched with one `$in` query per batch"""
+        mongo_ids = [to_mongo_id(lead_id) for lead_id in ids]
+        docs = []
+        for start in range(0, len(mongo_ids), self.batch_size):
+            chunk = mongo_ids[start:start + self.batch_size]
+            docs.extend(await self.collection.find({"_id": {"$in": chunk}}, projection).to_list(length=None))
+        return docs
+
+    async def ids_matching(self, query: Dict[str, Any]) -> List[str]:
+        return [str(doc["_id"]) async for doc in self.collection.find(query, {"_id": 1}).batch_size(self.batch_size)]
+
+    async def aggregate(self, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return await self.collection.aggregate(pipeline).to_list(length=None)
+
+    @property
+    def supports_change_streams(self) -> bool:
+        # mongomock has none; a standalone mongod reports it by failing watch() with OperationFailure
+        return not MONGO_DETAILS.startswith("mongomock://")
+
+    async def operation_time(self):
+        """Cluster time of the latest operation, to open a change stream at; None without change streams"""
+        if not self.supports_change_streams:
+            return None
+        reply = await self.collection.database.command("ping")
+        return reply.get("operationTime")
+
+    def watch(self, **options):
+        return self.collection.watch(**options)
+
+    async def insert_one(self, doc: Dict[str, Any]) -> str:
+        """Insert `doc` (normalized and given its `_id` in place) and return the new id"""
+        normalize_company(doc)
+        doc["updated_at"] = utcnow()
+        result = await self.collection.insert_one(doc)
+        return str(result.inserted_id)
+
+    async def insert_many(self, docs: Sequence[Dict[str, Any]]) -> Dict[str, int]:
+        now = utcnow()
+        totals = {"inserted": 0, "updated": 0, "errors": 0}
+        for start in range(0, len(docs), self.batch_size):
+            chunk = docs[start:start + self.batch_size]
+            for doc in chunk:
+                normalize_company(doc)
+                doc["updated_at"] = now
+            try:
+                result = await self.collection.insert_many(chunk, ordered=False)
+                totals["inserted"] += len(result.inserted_ids)
+            except BulkWriteError as e:
+                self._add_errors(totals, e)
+        return totals
+
+    async def upsert_by_name(self, docs: Sequence[Dict[str, Any]]) -> Dict[str, int]:
+        """Insert or update companies keyed by name, one unordered bulk_write per batch"""
+        now = utcnow()
+        totals = {"inserted": 0, "updated": 0, "errors": 0}
+        for start in range(0, len(docs), self.batch_size):
+            chunk = [normalize_company(doc) for doc in docs[start:start + self.batch_size]]
+            try:
+                result = await self.collection.bulk_write(
+                    [UpdateOne({"name": doc["name"]}, {"$set": {**doc, "updated_at": now}}, upsert=True)
+                     for doc in chunk],
+                    ordered=False,
+                )
+                totals["inserted"] += result.upserted_count
+                totals["updated"] += result.modified_count
+            except BulkWriteError as e:
+                self._add_errors(totals, e)
+        return totals
+
+    async def replace_many(self, docs: Sequence[Dict[str, Any]]) -> Dict[str, int]:
+        """Replace whole documents by `_id` (after normalizing them), one unordered bulk_write per batch"""
+        now = utcnow()
+        totals = {"inserted": 0, "updated": 0, "errors": 0}
+        for start in range(0, len(docs), self.batch_size):
+            chunk = [normalize_company(doc) for doc in docs[start:start + self.batch_size]]
+            try:
+                result = await self.collection.bulk_write(
+                    [ReplaceOne({"_id": doc["_id"]}, {**doc, "updated_at": now}) for doc in chunk],
+                    ordered=False,
+                )
+                totals["updated"] += result.modified_count
+            except BulkWriteError as e:
+                self._add_errors(totals, e)
+        return totals
+
+    def _add_errors(self, totals: Dict[str, int], error: BulkWriteError):
+        details = error.details
+        errors = len(details.get("writeErrors", []))
+        logger.error(f"Bulk write to companies had {errors} write errors")
+        totals["inserted"] += details.get("nInserted", 0) + details.get("nUpserted", 0)
+        totals["updated"] += details.get("nModified", 0)
+        totals["errors"] += errors
+
+    async def update_fields(self, lead_id: str, fields: Dict[str, Any]) -> bool:
+        """`$set` fields (normalized in place) on one document, stamping updated_at; False when it does not exist"""
+        normalize_company(fields)
+        result = await self.collection.update_one(
+            {"_id": to_mongo_id(lead_id)}, {"$set": {**fields, "updated_at": utcnow()}}
+        )
+        return result.matched_count > 0
+
+    async def delete(self, lead_id: str) -> bool:
+        result = await self.collection.delete_one({"_id": to_mongo_id(lead_id)})
+        return result.deleted_count > 0
+
+
+companies = CompaniesRepository()
@@ -1,14 +1,25 @@
-from fastapi import FastAPI, Depends, HTTPException, status
-from contextlib import asynccontextmanager
-from motor.motor_asyncio import AsyncIOMotorClient
-from .database import connect_to_mongo, close_mongo_connection, get_mongo_db
-from .api import search, enrich, insights, scrape, crm, auth  # Import new scraper router
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Request
+from contextlib import asynccontextmanager, suppress
+from .database import connect_to_mongo, close_mongo_connection, companies, database_stats
+from .api import search, enrich, insights, scrape, crm, auth, debug  # Import new scraper router
 from dotenv import load_dotenv
 import os
+import asyncio
 import logging
+import tracemalloc
 from fastapi.middleware.cors import CORSMiddleware # Import CORSMiddleware
+from fastapi.responses import PlainTextResponse, JSONResponse
+from .metrics import REGISTRY, MetricsMiddleware, LEAD_CACHE_SIZE, MODEL_VERSION
+from .profiling import ProfilingMiddleware, profiling_active, PROFILING_TRACEMALLOC
+from .serialization import encode_response, parse_fields
+from .compression import CompressionMiddleware
+from .rate_limit import rate_limiter
 from .services.leads_service import LeadsService
-from .services.insights_service import get_company_insights
+from .services.ml_service import MLService
+from .services.lead_sync import LeadSyncService
+from .services.ml_executor import ml_executor, MLBusyError
+from .services.bulk_import_service import BulkImportService, detect_format
+from .services.insights_service import fetch_company_insights
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
@@ -17,17 +28,58 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Load environment variables from .env file at the backend directory
-load_dotenv(override=True) # Ensure .env is loaded at app startup
+load_dotenv() # Ensure .env is loaded at app startup; variables already set in the environment win
+
+# Set to "false" to load leads and train models before the worker accepts requests
+BACKGROUND_WARMUP = os.getenv("BACKGROUND_WARMUP", "true").lower() != "false"
+
+# Initialize services
+leads_service = LeadsService()
+lead_sync = LeadSyncService(leads_service)
+LEAD_CACHE_SIZE.callback = lambda: len(leads_service.store)
+MODEL_VERSION.callback = lambda: leads_service.ml_service.model_version
+
+async def warm_up():
+    """
+    Import scikit-learn in a worker thread, load leads and models, then keep
+    the cache in sync with writes made by other services. Lead routes wait
+    for the load; every other route is served meanwhile.
+    """
+    await asyncio.to_thread(MLService.preload)
+    await leads_service.initialize()
+    await lead_sync.start()
+    leads_service.start_model_watch()
+    await leads_service.build_name_index()
+    await leads_service.build_similarity_index()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if profiling_active() and PROFILING_TRACEMALLOC:
+        # Started before the lead cache is filled so its allocations are traced
+        tracemalloc.start()
     # Connect to MongoDB
     await connect_to_mongo()
+    await companies.ensure_indexes()
+    # Before anything starts loading leads, so writes made during the load are synced
+    await lead_sync.mark_start()
+    await crm.crm_outbox.start()
+    warmup = asyncio.create_task(warm_up())
+    if not BACKGROUND_WARMUP:
+        await warmup
     yield
+    warmup.cancel()
+    with suppress(asyncio.CancelledError):
+        await warmup
+    await crm.crm_outbox.stop()
+    await lead_sync.stop()
+    await leads_service.stop_model_watch()
+    ml_executor.shutdown()
+    auth.auth_service.shutdown()
     # Close MongoDB connection
     await close_mongo_connection()
 
-app = FastAPI(lifespan=lifespan)
+# With AUTH_REQUIRED every route but login/register needs a bearer token
+app = FastAPI(lifespan=lifespan, dependencies=[Depends(auth.require_user)] if auth.AUTH_REQUIRED else None)
 
 # Add CORS middleware
 app.add_middleware(
@@ -44,6 +96,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Inside the metrics middleware so request latency includes compression time
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+if profiling_active():
+    # Not installed at all unless enabled, so profiling costs nothing by default
+    app.add_middleware(ProfilingMiddleware)
+
+@app.exception_handler(MLBusyError)
+async def ml_busy_handler(request: Request, exc: MLBusyError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
 
 # Include API routers
 app.include_router(search.router, prefix="/api")
@@ -52,14 +114,8 @@ app.include_router(insights.router, prefix="/api")
 app.include_router(scrape.router, prefix="/api") # Include the scrape router
 app.include_router(crm.router, prefix="/api") # CRM router already has /crm prefix
 app.include_router(auth.router, prefix="/api") # Include the authentication router
-
-# Initialize services
-leads_service = LeadsService()
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup"""
-    await leads_service.initialize()
+if profiling_active():
+    app.include_router(debug.router, prefix="/api")
 
 class LeadCreate(BaseModel):
     name: str
@@ -70,33 +126,47 @@ class LeadCreate(BaseModel):
     description: Optional[str] = None
 
 @app.get("/api/leads")
-async def get_leads(sort_by: Optional[str] = None):
-    """Get all leads"""
-    return leads_service.get_leads(sort_by)
+async def get_leads(request: Request, sort_by: Optional[str] = None, fields: Optional[str] = None):
+    """Get all leads; `fields=name,industry` returns only those fields (plus ids)"""
+    return encode_response(request, await leads_service.get_leads(sort_by, parse_fields(fields)))
 
 @app.get("/api/leads/{lead_id}")
-async def get_lead(lead_id: str):
-    lead = leads_service.get_lead_by_id(lead_id)
+async def get_lead(lead_id: str, request: Request):
+    lead = await leads_service.get_lead_by_id(lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
-    return lead
+    return encode_response(request, lead)
 
 @app.post("/api/leads")
 async def create_lead(lead: LeadCreate):
     """Create a new lead"""
     try:
-        db = await get_mongo_db()
         lead_dict = lead.dict()
-        result = await db.companies.insert_one(lead_dict)
-        lead_dict["id"] = str(result.inserted_id)
+        # insert_one sets an ObjectId `_id` in place; the response carries the string form
+        lead_dict["_id"] = lead_dict["id"] = await companies.insert_one(lead_dict)
         await leads_service.add_lead(lead_dict)
         return lead_dict
+    except MLBusyError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/leads/bulk")
+async def bulk_import_leads(file: UploadFile = File(...), format: Optional[str] = None, mode: str = "upsert"):
+    """Import a CSV, JSONL or Parquet file of companies; models are retrained once at the end"""
+    fmt = format or detect_format(file.filename)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Could not infer file format; pass ?format=csv|jsonl|parquet")
+    try:
+        result = await BulkImportService().import_stream(file.file, fmt, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await lead_sync.sync_now()
+    return result
+
 @app.put("/api/leads/{lead_id}")
 async def update_lead(lead_id: str, lead: Dict[str, Any]):
-    updated_lead = leads_service.update_lead(lead_id, lead)
+    updated_lead = await leads_service.update_lead(lead_id, lead)
     if not updated_lead:
         raise HTTPException(status_code=404, detail="Lead not found")
     return updated_lead
@@ -105,41 +175,69 @@ async def update_lead(lead_id: str, lead: Dict[str, Any]):
 async def delete_lead(lead_id: str):
     """Delete a lead"""
     try:
-        db = await get_mongo_db()
-        result = await db.companies.delete_one({"_id": lead_id})
-        if result.deleted_count == 0:
-            raise HTTPException(status_code=404, detail="Lead not found")
-        success = await leads_service.delete_lead(lead_id)
-        if not success:
-            raise HTTPException(status_code=404, detail="Lead not found")
-        return {"message": "Lead deleted successfully"}
+        # String ids of stored leads are converted to ObjectId by the repository
+        deleted = await companies.delete(lead_id)
+        # Drop it from the cache either way, in case the document was already gone
+        cached = await leads_service.delete_lead(lead_id)
+    except MLBusyError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if not deleted and not cached:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    return {"message": "Lead deleted successfully"}
 
 @app.get("/api/leads/search")
-async def search_leads(q: str):
+async def search_leads(q: str, request: Request, fields: Optional[str] = None):
     """Search leads"""
     try:
-        results = await leads_service.search_leads(q)
-        return results
+        results = await leads_service.search_leads(q, parse_fields(fields))
+        return encode_response(request, results)
+    except MLBusyError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/leads/{lead_id}/insights")
+@app.get("/api/leads/{lead_id}/insights", dependencies=[Depends(rate_limiter.limit("insights", providers=("gemini",)))])
 async def get_lead_insights(lead_id: str):
-    lead = leads_service.get_lead_by_id(lead_id)
+    lead = await leads_service.get_lead_by_id(lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
-    return get_company_insights(lead)
+    return await fetch_company_insights(lead)
+
+@app.get("/api/leads/{lead_id}/similar")
+async def get_similar_leads(lead_id: str, request: Request, limit: int = 10, fields: Optional[str] = None):
+    """Leads most like this one by description, industry, location and ML features"""
+    leads = await leads_service.similar_leads(lead_id, max(1, min(limit, 100)), parse_fields(fields))
+    if leads is None:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    return encode_response(request, leads)
+
+@app.get("/api/companies/suggest")
+async def suggest_companies(request: Request, prefix: str = "", limit: int = 10):
+    """Typeahead: companies whose name starts with `prefix`, best probabilityScore first"""
+    return encode_response(request, await leads_service.suggest_companies(prefix, max(1, min(limit, 50))))
 
 @app.get("/api/analytics")
-async def get_analytics():
+async def get_analytics(request: Request):
     """Get analytics data"""
     try:
-        return await leads_service.get_analytics()
+        return encode_response(request, await leads_service.get_analytics())
+    except MLBusyError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/db/stats")
+async def get_database_stats():
+    """Connection pool settings and counters, and per-command MongoDB timings"""
+    return database_stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.options("/{full_path:path}")
 async def options_handler(full_path: str):
     return {"message": "OK"}
@@ -147,3 +245,8 @@ async def options_handler(full_path: str):
 @app.get("/")
 async def root():
     return {"message": "Welcome to the CRM Lead Enrichment API!"}
+
+@app.get("/api/health")
+async def health():
+    """Liveness plus whether the lead cache and models have finished warming up"""
+    return {"status": "ok", "ready": leads_service.ready}
@@ -0,0 +1,326 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from pymongo import monitoring
+
+# Set to "false" to turn every recorder into a no-op
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() != "false"
+
+# Upper bounds in seconds; spans fast in-memory routes up to slow scraping calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Recorders run on the event loop and on driver threads (command listeners)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        if METRICS_ENABLED:
+            with self._lock:
+                self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values
+        ]
+
+
+class Gauge(_Metric):
+    """Gauge whose value is read from a callback at scrape time, so nothing is recorded on hot paths"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        if self.callback is None:
+            return []
+        try:
+            value = self.callback()
+        except Exception:
+            return []
+        return self.header() + [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, seconds: float, *labels: str):
+        if not METRICS_ENABLED:
+            return
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += seconds
+
+    @contextmanager
+    def time(self, *labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def summary(self) -> Dict[Tuple[str, ...], Tuple[int, float]]:
+        """Observation count and sum per label set"""
+        with self._lock:
+            return {labels: (sum(counts), total) for labels, (counts, total) in self._series.items()}
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        lines = self.header()
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Latency of HTTP requests by route template", ("method", "route", "status")
+))
+PROVIDER_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "provider_request_duration_seconds", "Latency of calls to external providers", ("provider", "status")
+))
+MONGO_COMMAND_DURATION = REGISTRY.register(Histogram(
+    "mongo_command_duration_seconds", "Duration of MongoDB commands as reported by the driver", ("command", "status")
+))
+MONGO_POOL_CHECKOUT_WAIT = REGISTRY.register(Histogram(
+    "mongo_pool_checkout_wait_seconds", "Time operations waited for a pooled MongoDB connection"
+))
+MONGO_POOL_CHECKOUT_FAILURES = REGISTRY.register(Counter(
+    "mongo_pool_checkout_failures_total", "Connection checkouts that failed, by reason", ("reason",)
+))
+ML_JOB_DURATION = REGISTRY.register(Histogram(
+    "ml_job_duration_seconds", "Duration of ML featurization, training and scoring", ("job", "mode")
+))
+RATE_LIMITED = REGISTRY.register(Counter(
+    "rate_limited_requests_total", "Requests turned away with 429 by the rate limiter", ("limit", "reason")
+))
+SINGLE_FLIGHT_CALLS = REGISTRY.register(Counter(
+    "single_flight_calls_total", "Calls that started (leader) or joined (follower) a coalesced request", ("call", "role")
+))
+LEAD_CACHE_SIZE = REGISTRY.register(Gauge("lead_cache_leads", "Leads held in the in-memory lead store"))
+MODEL_VERSION = REGISTRY.register(Gauge("ml_model_version", "Version counter of the installed ML models"))
+MONGO_POOL_OPEN = REGISTRY.register(Gauge("mongo_pool_connections", "Open pooled MongoDB connections"))
+MONGO_POOL_IN_USE = REGISTRY.register(Gauge("mongo_pool_connections_in_use", "Pooled MongoDB connections checked out"))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route request latency.
+
+    Requests are labelled with the matched route template rather than the raw
+    path so that ids in URLs do not create a series per lead.
+    """
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                scope["method"], getattr(route, "path", "unmatched"), status,
+            )
+
+
+class _ProviderCall:
+    def __init__(self):
+        self.status: Optional[str] = None
+
+
+@contextmanager
+def provider_call(provider: str):
+    """Time one call to an external provider; set `.status` on the yielded object to the HTTP status"""
+    call = _ProviderCall()
+    start = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        call.status = call.status or "error"
+        raise
+    finally:
+        PROVIDER_REQUEST_DURATION.observe(time.perf_counter() - start, provider, str(call.status or "ok"))
+
+
+async def track_provider(provider: str, request):
+    """Await an httpx request coroutine and record its latency and status code"""
+    with provider_call(provider) as call:
+        response = await request
+        call.status = response.status_code
+        return response
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Driver command listener feeding MONGO_COMMAND_DURATION; pass it to the client's event_listeners"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, event.command_name, "ok")
+
+    def failed(self, event):
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, event.command_name, "failed")
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Driver pool listener: open and checked-out connections, checkout waits
+    and failures. Checkout start and finish are reported on the same driver
+    thread, so the wait is timed with a thread-local start time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checked_in = 0
+        self.cleared = 0
+
+    @property
+    def open(self) -> int:
+        return self.created - self.closed
+
+    @property
+    def in_use(self) -> int:
+        return self.checked_out - self.checked_in
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"open": self.open, "in_use": self.in_use, "created": self.created, "closed": self.closed,
+                    "checkouts": self.checked_out, "cleared": self.cleared}
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count("cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._count("created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count("closed")
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_FAILURES.inc(str(event.reason))
+
+    def connection_checked_out(self, event):
+        self._count("checked_out")
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            MONGO_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+            self._local.started = None
+
+    def connection_checked_in(self, event):
+        self._count("checked_in")
@@ -1,5 +1,9 @@
-from pydantic import BaseModel, HttpUrl, AnyHttpUrl
-from typing import Optional
+import os
+from pydantic import BaseModel, Field, HttpUrl, AnyHttpUrl
+from typing import Any, Dict, List, Optional
+
+# Largest page a client may ask for
+SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "500"))
 
 class SearchParams(BaseModel):
     companyName: Optional[str] = None
@@ -7,16 +11,30 @@ class SearchParams(BaseModel):
     location: Optional[str] = None
     minEmployees: Optional[int] = None
     maxEmployees: Optional[int] = None
+    # With pageSize (or facets) the response is a SearchPage instead of a plain list
+    page: int = Field(1, ge=1)
+    pageSize: Optional[int] = Field(None, ge=1, le=SEARCH_MAX_PAGE_SIZE)
+    facets: bool = False
 
 class CompanyResponse(BaseModel):
     name: str
     industry: str
     location: str
     employeeCount: Optional[int] = 0
-    revenue: str
+    revenue: Optional[float] = None
     website: Optional[str] = None
+    domain: Optional[str] = None
     description: Optional[str] = None
     contactInfo: Optional[str] = None
     probabilityScore: Optional[float] = None
     rank: Optional[int] = None
-    insightsSummary: Optional[str] = None 
\ No newline at end of file
+    # Stored as insights_summary (the canonical company field), returned under the original name
+    insightsSummary: Optional[str] = Field(None, validation_alias="insights_summary")
+
+class SearchPage(BaseModel):
+    results: List[CompanyResponse]
+    total: int
+    page: int
+    pageSize: int
+    # industry/location: [{value, count}]; employeeSize adds minEmployees/maxEmployees per bucket
+    facets: Optional[Dict[str, List[Dict[str, Any]]]] = None
@@ -0,0 +1,177 @@
+import re
+import math
+import unicodedata
+from typing import Any, Dict, Optional, Tuple
+
+# Alternative spellings written by older code, sample data and import files -> canonical field
+FIELD_ALIASES = {
+    "company": "name",
+    "company_name": "name",
+    "employee_count": "employeeCount",
+    "employees": "employeeCount",
+    "num_employees": "employeeCount",
+    "contact_info": "contactInfo",
+    "probability_score": "probabilityScore",
+    "annual_revenue": "revenue",
+    "website_url": "website",
+    "insightsSummary": "insights_summary",
+}
+
+# Values writers use for "unknown"; numeric fields and websites holding one are dropped
+_PLACEHOLDERS = {"", "n/a", "na", "none", "null", "unknown", "-"}
+_MAGNITUDES = {
+    "k": 1e3, "thousand": 1e3, "m": 1e6, "mm": 1e6, "million": 1e6,
+    "b": 1e9, "bn": 1e9, "billion": 1e9, "t": 1e12, "trillion": 1e12,
+}
+_UNITS = r"thousand|million|billion|trillion|mm|bn|k|m|b|t"
+_AMOUNT = re.compile(rf"(\d+(?:\.\d+)?)\s*({_UNITS})?\b", re.IGNORECASE)
+# "10-50M", "$500K - $2M", "10 to 50 million"; a bare lower bound takes the upper bound's unit
+_AMOUNT_RANGE = re.compile(
+    rf"(\d+(?:\.\d+)?)(?:\s*({_UNITS})\b)?\s*(?:-|–|—|to)\s*\$?\s*(\d+(?:\.\d+)?)\s*({_UNITS})?\b",
+    re.IGNORECASE,
+)
+_INTEGER = re.compile(r"\d+")
+_SCHEME = re.compile(r"^[a-z][a-z0-9+.-]*://", re.IGNORECASE)
+_NAME_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _is_placeholder(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and value.strip().lower() in _PLACEHOLDERS)
+
+
+def _magnitude(unit: Optional[str]) -> float:
+    return _MAGNITUDES.get((unit or "").lower(), 1)
+
+
+def parse_revenue(value: Any) -> Optional[float]:
+    """'$1.5B' -> 1.5e9, '150M' -> 1.5e8, '10,000' -> 1e4; ranges use their midpoint, '10-50M' -> 3e7"""
+    if _is_number(value):
+        return float(value)
+    if _is_placeholder(value) or not isinstance(value, str):
+        return None
+    value = value.replace(",", "")
+    match = _AMOUNT_RANGE.search(value)
+    if match:
+        low, low_unit, high, high_unit = match.groups()
+        high = float(high) * _magnitude(high_unit)
+        low = float(low) * _magnitude(low_unit or high_unit)
+        return (low + high) / 2
+    match = _AMOUNT.search(value)
+    if not match:
+        return None
+    return float(match.group(1)) * _magnitude(match.group(2))
+
+
+def parse_count(value: Any) -> Optional[int]:
+    """'1,200' -> 1200, '51-200' -> 51, '1000+' -> 1000"""
+    if _is_number(value):
+        return int(value)
+    if _is_placeholder(value) or not isinstance(value, str):
+        return None
+    match = _INTEGER.search(value.replace(",", ""))
+    return int(match.group(0)) if match else None
+
+
+def parse_float(value: Any) -> Optional[float]:
+    if _is_number(value):
+        return float(value)
+    if _is_placeholder(value) or not isinstance(value, str):
+        return None
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def format_revenue(value: Any) -> Optional[str]:
+    """Human-readable revenue for prompts and CRM payloads: 1.5e9 -> '$1.5B'"""
+    amount = parse_revenue(value)
+    if amount is None:
+        return None
+    for suffix, scale in (("B", 1e9), ("M", 1e6), ("K", 1e3)):
+        if amount >= scale:
+            return f"${amount / scale:.4g}{suffix}"
+    return f"${amount:.0f}"
+
+
+def normalize_website(value: Any) -> Tuple[Optional[str], Optional[str]]:
+    """Canonical website URL (scheme, lowercase host, no trailing slash) and its bare domain"""
+    if _is_placeholder(value) or not isinstance(value, str):
+        return None, None
+    url = value.strip()
+    if not _SCHEME.match(url):
+        url = "https://" + url
+    scheme, _, rest = url.partition("://")
+    host, slash, path = rest.partition("/")
+    host = host.lower().rstrip(".")
+    if not host or "." not in host or " " in host:
+        return None, None
+    url = f"{scheme.lower()}://{host}{(slash + path).rstrip('/')}"
+    domain = host.split("@")[-1].split(":")[0]
+    return url, domain[4:] if domain.startswith("www.") else domain
+
+
+def website_domain(value: Any) -> Optional[str]:
+    return normalize_website(value)[1]
+
+
+def name_key(value: Any) -> Optional[str]:
+    """Key company names are matched on: 'Café Müller, Inc.' -> 'cafe muller inc' (letters, digits, single spaces)"""
+    if not isinstance(value, str):
+        return None
+    folded = value if value.isascii() else "".join(
+        ch for ch in unicodedata.normalize("NFKD", value) if not unicodedata.combining(ch))
+    return _NAME_SEPARATORS.sub(" ", folded.casefold()).strip() or None
+
+
+# Canonical numeric fields and their parsers
+_NUMERIC_FIELDS = {"employeeCount": parse_count, "revenue": parse_revenue, "probabilityScore": parse_float}
+
+
+def normalize_company(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rewrite a company document in place onto the canonical schema and return it.
+
+    Aliased fields are renamed (the canonical spelling wins when both are
+    present), strings are stripped, employeeCount/revenue/probabilityScore
+    become numbers, website gets a canonical URL plus a bare `domain`, and
+    name gets its `nameKey` for prefix lookups. Numeric fields and websites
+    that cannot be parsed are dropped.
+    """
+    clean: Dict[str, Any] = {}
+    for key, value in doc.items():
+        if not isinstance(key, str):
+            continue
+        canonical = FIELD_ALIASES.get(key.strip(), key.strip())
+        if canonical in clean and canonical != key:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        clean[canonical] = value
+
+    for field, parse in _NUMERIC_FIELDS.items():
+        if field in clean:
+            value = parse(clean.pop(field))
+            if value is not None:
+                clean[field] = value
+
+    if "website" in clean:
+        website, domain = normalize_website(clean.pop("website"))
+        if website:
+            clean["website"] = website
+            clean["domain"] = domain
+
+    if "name" in clean:
+        key = name_key(clean["name"])
+        if key:
+            clean["nameKey"] = key
+        else:
+            clean.pop("nameKey", None)
+
+    doc.clear()
+    doc.update(clean)
+    return doc
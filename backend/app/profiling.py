@@ -0,0 +1,217 @@
+import os
+import io
+import time
+import uuid
+import hmac
+import random
+import pstats
+import cProfile
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from fastapi import Header, HTTPException
+
+# Nothing in this module is installed unless profiling is enabled
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# Shared secret for the X-Profile header and the debug endpoints; profiling stays off without it
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+# Fraction of requests under PROFILING_PATHS profiled without being asked to
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_PATHS = tuple(p for p in os.getenv("PROFILING_PATHS", "/api/").split(",") if p)
+# Profiles and memory snapshots kept in memory; older ones are dropped
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "50"))
+PROFILING_MAX_SNAPSHOTS = int(os.getenv("PROFILING_MAX_SNAPSHOTS", "5"))
+# Start tracemalloc at startup so the lead cache load is traced; it slows every allocation
+PROFILING_TRACEMALLOC = os.getenv("PROFILING_TRACEMALLOC", "false").lower() == "true"
+
+
+def profiling_active() -> bool:
+    return PROFILING_ENABLED and bool(PROFILING_TOKEN)
+
+
+def require_debug_token(x_debug_token: Optional[str] = Header(None)):
+    if not x_debug_token or not hmac.compare_digest(x_debug_token, PROFILING_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid debug token")
+
+
+def _func_name(func) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{line}:{name}"
+
+
+def collapsed_stacks(stats: pstats.Stats, max_depth: int = 64) -> str:
+    """
+    Render profile stats as collapsed stacks ("a;b;c <microseconds>") for
+    flamegraph.pl, speedscope or inferno.
+
+    cProfile only records caller/callee edges, so time along a path is
+    apportioned by each edge's share of the callee's cumulative time.
+    """
+    raw = stats.stats
+    children: Dict[tuple, List[tuple]] = {}
+    roots = []
+    for func, (_, _, _, cumtime, callers) in raw.items():
+        known_callers = [caller for caller in callers if caller in raw]
+        if not known_callers:
+            roots.append(func)
+        for caller in known_callers:
+            children.setdefault(caller, []).append((func, callers[caller][3]))
+
+    lines: Dict[str, float] = {}
+
+    def walk(func, path: List[str], on_path: set, inclusive: float):
+        _, _, tottime, cumtime, _ = raw[func]
+        path = path + [_func_name(func)]
+        scale = inclusive / cumtime if cumtime else 0.0
+        key = ";".join(path)
+        lines[key] = lines.get(key, 0.0) + tottime * scale
+        if len(path) >= max_depth:
+            return
+        for child, edge_time in children.get(func, ()):
+            if child not in on_path and edge_time * scale > 0:
+                walk(child, path, on_path | {child}, edge_time * scale)
+
+    for root in roots:
+        walk(root, [], {root}, raw[root][3])
+    return "\n".join(f"{key} {round(value * 1e6)}" for key, value in lines.items() if value >= 1e-6) + "\n"
+
+
+class ProfileStore:
+    """Bounded in-memory store of recent request profiles and memory snapshots"""
+
+    def __init__(self, max_profiles: int = PROFILING_MAX_PROFILES, max_snapshots: int = PROFILING_MAX_SNAPSHOTS):
+        self.max_profiles = max_profiles
+        self.max_snapshots = max_snapshots
+        self.profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.snapshots: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def add_profile(self, profiler: cProfile.Profile, profile_id: Optional[str] = None, **info) -> str:
+        profile_id = profile_id or uuid.uuid4().hex[:12]
+        self.profiles[profile_id] = {
+            "id": profile_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            **info,
+            "stats": pstats.Stats(profiler),
+        }
+        while len(self.profiles) > self.max_profiles:
+            self.profiles.popitem(last=False)
+        return profile_id
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        return [{k: v for k, v in p.items() if k != "stats"} for p in reversed(self.profiles.values())]
+
+    def render_profile(self, profile_id: str, fmt: str) -> Optional[str]:
+        profile = self.profiles.get(profile_id)
+        if profile is None:
+            return None
+        if fmt == "collapsed":
+            return collapsed_stacks(profile["stats"])
+        out = io.StringIO()
+        stats = profile["stats"]
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(60)
+        return out.getvalue()
+
+    def take_snapshot(self) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        snapshot = tracemalloc.take_snapshot()
+        snapshot_id = uuid.uuid4().hex[:12]
+        current, peak = tracemalloc.get_traced_memory()
+        self.snapshots[snapshot_id] = {
+            "id": snapshot_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "snapshot": snapshot,
+        }
+        while len(self.snapshots) > self.max_snapshots:
+            self.snapshots.popitem(last=False)
+        return self.snapshots[snapshot_id]
+
+    def list_snapshots(self) -> List[Dict[str, Any]]:
+        return [{k: v for k, v in s.items() if k != "snapshot"} for s in reversed(self.snapshots.values())]
+
+
+profile_store = ProfileStore()
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, pattern: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    if pattern:
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(True, f"*{pattern}*")])
+    return [
+        {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+def diff_allocations(old: tracemalloc.Snapshot, new: tracemalloc.Snapshot, pattern: Optional[str], limit: int):
+    if pattern:
+        filters = [tracemalloc.Filter(True, f"*{pattern}*")]
+        old, new = old.filter_traces(filters), new.filter_traces(filters)
+    return [
+        {"location": str(stat.traceback), "size_diff_bytes": stat.size_diff, "size_bytes": stat.size,
+         "count_diff": stat.count_diff}
+        for stat in new.compare_to(old, "lineno")[:limit]
+    ]
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that runs cProfile around selected requests.
+
+    A request is profiled when it carries `X-Profile: <PROFILING_TOKEN>` or is
+    picked by PROFILING_SAMPLE_RATE. The profile id is returned in the
+    `X-Profile-Id` response header. cProfile follows the event loop thread,
+    so work of other requests interleaved on the loop is included; only one
+    request is profiled at a time.
+    """
+
+    def __init__(self, app, store: ProfileStore = profile_store):
+        self.app = app
+        self.store = store
+        self._busy = False
+        self._header_token = PROFILING_TOKEN.encode()
+
+    def _wanted(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return hmac.compare_digest(value, self._header_token)
+        return (
+            PROFILING_SAMPLE_RATE > 0
+            and scope["path"].startswith(PROFILING_PATHS)
+            and random.random() < PROFILING_SAMPLE_RATE
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._busy or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        profile_id = uuid.uuid4().hex[:12]
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            self._busy = False
+            self.store.add_profile(
+                profiler, profile_id,
+                method=scope["method"], path=scope["path"], status=status,
+                duration_ms=round((time.perf_counter() - start) * 1000, 3),
+            )
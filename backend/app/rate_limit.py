@@ -0,0 +1,213 @@
+import os
+import math
+import time
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Sequence, Tuple
+from fastapi import HTTPException, Request, status
+from pymongo import ReturnDocument
+from .metrics import RATE_LIMITED
+
+# Set to "false" to admit every request
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() != "false"
+# "memory" keeps buckets per worker; "mongo" shares them across workers through the rate_limits collection
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")
+# Use the first X-Forwarded-For hop as the client address (only behind a trusted proxy)
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+# Buckets held in memory; the least recently used clients are forgotten first
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Seconds a request waits for a provider slot before it is turned away
+PROVIDER_ADMISSION_TIMEOUT = float(os.getenv("PROVIDER_ADMISSION_TIMEOUT", "0.25"))
+
+# Budgets as "requests/seconds"; override with RATE_LIMIT_<NAME>_CLIENT and RATE_LIMIT_<NAME>_ROUTE
+DEFAULT_BUDGETS = {
+    # name: (per client, whole route across clients)
+    "scrape": ("5/60", "30/60"),
+    "enrich": ("30/60", "300/60"),
+    "insights": ("20/60", "120/60"),
+}
+# Requests allowed to use each provider at once, per worker; override with PROVIDER_CONCURRENCY_<NAME>
+DEFAULT_PROVIDER_CONCURRENCY = {"scraperapi": 4, "hunter": 10, "apollo": 10, "newsapi": 10, "gemini": 8}
+
+
+def parse_budget(value: str) -> Tuple[float, float]:
+    """'30/60' -> (capacity 30, refill 0.5 tokens per second)"""
+    count, _, seconds = value.partition("/")
+    capacity = float(count)
+    return capacity, capacity / float(seconds or 1)
+
+
+def _budget(name: str, scope: str, default: str) -> Tuple[float, float]:
+    return parse_budget(os.getenv(f"RATE_LIMIT_{name.upper()}_{scope}", default))
+
+
+class MemoryBucketStore:
+    """Token buckets for one worker, LRU-bounded"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        """Take one token; returns 0 when allowed, otherwise seconds until a token is available"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [capacity, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate
+
+    async def give_back(self, key: str):
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket[0] += 1
+
+
+class MongoBucketStore:
+    """
+    Token buckets in the `rate_limits` collection, so every worker draws from
+    the same budget. Refill and take happen in one atomic pipeline update;
+    idle buckets are removed by a TTL index.
+    """
+
+    def __init__(self):
+        self._indexed = False
+
+    async def _collection(self):
+        from .database import get_mongo_db
+        db = await get_mongo_db()
+        if not self._indexed:
+            await db.rate_limits.create_index("expires_at", expireAfterSeconds=0)
+            self._indexed = True
+        return db.rate_limits
+
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        collection = await self._collection()
+        now = datetime.now(timezone.utc)
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        refilled = {"$min": [capacity, {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed, rate]}]}]}
+        bucket = await collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now,
+                          "expires_at": now + timedelta(seconds=capacity / rate + 60)}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]},
+                          "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if bucket["allowed"]:
+            return 0.0
+        return (1 - bucket["tokens"]) / rate
+
+    async def give_back(self, key: str):
+        collection = await self._collection()
+        await collection.update_one({"_id": key}, {"$inc": {"tokens": 1}})
+
+
+class ProviderGate:
+    """Caps how many admitted requests use one external provider at a time"""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self, timeout: float) -> bool:
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return True
+        if timeout <= 0:
+            return False
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def release(self):
+        self._semaphore.release()
+
+
+class RateLimiter:
+    """Per-client and per-route token buckets plus per-provider concurrency gates"""
+
+    def __init__(self, store=None):
+        self.store = store or (MongoBucketStore() if RATE_LIMIT_STORE == "mongo" else MemoryBucketStore())
+        self.gates: Dict[str, ProviderGate] = {
+            provider: ProviderGate(provider, int(os.getenv(f"PROVIDER_CONCURRENCY_{provider.upper()}", limit)))
+            for provider, limit in DEFAULT_PROVIDER_CONCURRENCY.items()
+        }
+
+    def client_id(self, request: Request) -> str:
+        """Authenticated user when the request carries a valid token, client address otherwise"""
+        authorization = request.headers.get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            from .api.auth import auth_service
+            try:
+                return "user:" + auth_service.verify_token(authorization[7:].strip())["sub"]
+            except Exception:
+                pass
+        if RATE_LIMIT_TRUST_FORWARDED and request.headers.get("x-forwarded-for"):
+            return "ip:" + request.headers["x-forwarded-for"].split(",")[0].strip()
+        return "ip:" + (request.client.host if request.client else "unknown")
+
+    def limit(self, name: str, providers: Sequence[str] = ()):
+        """
+        Route dependency: spends one token from the client's and the route's
+        bucket, then takes a slot on each provider gate for the duration of
+        the request. Rejections are immediate 429s with Retry-After.
+        """
+        client_default, route_default = DEFAULT_BUDGETS.get(name, ("60/60", "600/60"))
+        client_budget = _budget(name, "CLIENT", client_default)
+        route_budget = _budget(name, "ROUTE", route_default)
+        gates = [self.gates[provider] for provider in providers]
+
+        async def dependency(request: Request):
+            if not RATE_LIMIT_ENABLED:
+                yield
+                return
+
+            client_key = f"{name}:{self.client_id(request)}"
+            retry_after = await self.store.take(client_key, *client_budget)
+            if retry_after:
+                self._reject(name, "client", retry_after)
+            retry_after = await self.store.take(f"{name}:*", *route_budget)
+            if retry_after:
+                # The client's token was not used
+                await self.store.give_back(client_key)
+                self._reject(name, "route", retry_after)
+
+            acquired = []
+            try:
+                for gate in gates:
+                    if not await gate.acquire(PROVIDER_ADMISSION_TIMEOUT):
+                        self._reject(name, f"provider:{gate.name}", 1.0)
+                    acquired.append(gate)
+                yield
+            finally:
+                for gate in acquired:
+                    gate.release()
+
+        return dependency
+
+    def _reject(self, name: str, reason: str, retry_after: float):
+        RATE_LIMITED.inc(name, reason)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many requests ({reason} limit for {name}); retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,124 @@
+import json
+import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from bson import ObjectId
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def _default(value: Any) -> Any:
+    """Types found in lead documents that the encoders do not handle natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(content: Any) -> bytes:
+        """Encode lead data straight to JSON bytes; ObjectId, datetime and NumPy values included"""
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(content: Any) -> bytes:
+        """Encode lead data straight to JSON bytes; ObjectId, datetime and NumPy values included"""
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=_default, use_bin_type=True)
+
+
+class FastJSONResponse(Response):
+    """JSON response that skips jsonable_encoder; only for data the app built itself"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+def wants_msgpack(request: Request) -> bool:
+    accept = request.headers.get("accept", "")
+    return msgpack is not None and any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def encode_response(request: Request, content: Any, status_code: int = 200) -> Response:
+    """MessagePack when the client asks for it (and msgpack is installed), JSON otherwise"""
+    if wants_msgpack(request):
+        return MsgPackResponse(content, status_code=status_code)
+    return FastJSONResponse(content, status_code=status_code)
+
+
+def parse_fields(fields: Optional[str], always: Sequence[str] = ("_id", "id")) -> Optional[Tuple[str, ...]]:
+    """Turn a `fields=name,industry` query value into an ordered field tuple; None means every field"""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    return tuple(dict.fromkeys([*always, *requested]))
+
+
+def _source_key(name: str, field) -> str:
+    """Document key a model field is read from: its validation alias, if it has one"""
+    return field.validation_alias if isinstance(field.validation_alias, str) else name
+
+
+def document_keys(model, names: Optional[Iterable[str]] = None) -> List[str]:
+    """Stored keys behind the response field `names` of `model` (all declared fields by default)"""
+    fields = model.model_fields
+    return [_source_key(name, fields[name]) if name in fields else name for name in (names or fields)]
+
+
+def projector(model, only: Optional[Sequence[str]] = None) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Returns a function that shapes a trusted document like `model` would
+    (declared fields only, read through their validation alias, defaults
+    filled in) without building a model instance per item. `only` further
+    restricts the declared fields.
+    """
+    fields = [
+        (name, _source_key(name, field), None if field.is_required() else field.get_default(call_default_factory=True))
+        for name, field in model.model_fields.items()
+        if only is None or name in only
+    ]
+
+    def project(document: Dict[str, Any]) -> Dict[str, Any]:
+        return {name: document.get(source, default) for name, source, default in fields}
+
+    return project
+
+
+def project_all(model, documents: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    project = projector(model)
+    return [project(document) for document in documents]
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import hmac
+import base64
+import asyncio
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from pymongo.errors import DuplicateKeyError
+from app.database import get_mongo_db, utcnow
+
+# HMAC key for access tokens; every worker must share it or tokens only work on the worker that issued them
+AUTH_SECRET_KEY = os.getenv("AUTH_SECRET_KEY", "")
+# Access token lifetime in seconds
+AUTH_TOKEN_TTL = int(os.getenv("AUTH_TOKEN_TTL", str(12 * 3600)))
+# scrypt cost; n=2**14, r=8 uses 16 MB and ~50 ms per hash
+AUTH_SCRYPT_N = int(os.getenv("AUTH_SCRYPT_N", str(2 ** 14)))
+AUTH_SCRYPT_R = int(os.getenv("AUTH_SCRYPT_R", "8"))
+AUTH_SCRYPT_P = int(os.getenv("AUTH_SCRYPT_P", "1"))
+# Threads hashing passwords; bounds the memory of a login burst to workers x scrypt memory
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "4"))
+# Verified tokens remembered per process
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+
+if not AUTH_SECRET_KEY:
+    print("Warning: AUTH_SECRET_KEY not set. Using a random key; tokens will not survive restarts or work across workers.")
+    AUTH_SECRET_KEY = secrets.token_urlsafe(32)
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def hash_password(password: str) -> str:
+    """scrypt hash encoded with its parameters, so the cost can be raised without invalidating old hashes"""
+    salt = secrets.token_bytes(16)
+    digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=AUTH_SCRYPT_N, r=AUTH_SCRYPT_R,
+                            p=AUTH_SCRYPT_P, maxmem=256 * 1024 * 1024, dklen=32)
+    return f"scrypt${AUTH_SCRYPT_N}${AUTH_SCRYPT_R}${AUTH_SCRYPT_P}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    try:
+        scheme, n, r, p, salt, expected = encoded.split("$")
+    except ValueError:
+        return False
+    if scheme != "scrypt":
+        return False
+    try:
+        digest = hashlib.scrypt(password.encode("utf-8"), salt=_b64decode(salt), n=int(n), r=int(r), p=int(p),
+                                maxmem=256 * 1024 * 1024, dklen=32)
+        return hmac.compare_digest(digest, _b64decode(expected))
+    except (UnicodeError, TypeError, ValueError, OverflowError):
+        # A malformed stored hash (bad base64, non-integer or out-of-range parameters) matches nothing
+        return False
+
+
+class TokenSigner:
+    """
+    Self-contained HS256 (JWT-compatible) access tokens.
+
+    Verified tokens are kept in an LRU keyed by the token string, so repeat
+    requests cost a dict lookup and an expiry check; a miss costs one HMAC.
+    Nothing is looked up in the database.
+    """
+
+    _HEADER = _b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+
+    def __init__(self, secret: str = AUTH_SECRET_KEY, ttl: int = AUTH_TOKEN_TTL, cache_size: int = AUTH_TOKEN_CACHE_SIZE):
+        self._key = secret.encode("utf-8")
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sign(self, signing_input: str) -> str:
+        return _b64encode(hmac.new(self._key, signing_input.encode("ascii"), hashlib.sha256).digest())
+
+    def issue(self, subject: str, **claims) -> str:
+        now = int(time.time())
+        payload = {"sub": subject, "iat": now, "exp": now + self.ttl, **claims}
+        signing_input = f"{self._HEADER}.{_b64encode(json.dumps(payload, separators=(',', ':')).encode())}"
+        return f"{signing_input}.{self._sign(signing_input)}"
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Claims of a valid, unexpired token; raises InvalidToken otherwise"""
+        with self._lock:
+            claims = self._cache.get(token)
+            if claims is not None:
+                self._cache.move_to_end(token)
+        if claims is None:
+            claims = self._verify_signature(token)
+            with self._lock:
+                self._cache[token] = claims
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        if claims["exp"] <= time.time():
+            raise InvalidToken("Token expired")
+        return claims
+
+    def _verify_signature(self, token: str) -> Dict[str, Any]:
+        try:
+            header, payload, signature = token.split(".")
+        except ValueError:
+            raise InvalidToken("Malformed token")
+        try:
+            # Non-ASCII characters cannot be signed (UnicodeError) or compared (TypeError)
+            valid = header == self._HEADER and hmac.compare_digest(signature, self._sign(f"{header}.{payload}"))
+        except (UnicodeError, TypeError):
+            raise InvalidToken("Malformed token")
+        if not valid:
+            raise InvalidToken("Invalid token signature")
+        try:
+            claims = json.loads(_b64decode(payload))
+        except ValueError:
+            raise InvalidToken("Malformed token")
+        if not isinstance(claims, dict) or not isinstance(claims.get("exp"), int) or "sub" not in claims:
+            raise InvalidToken("Malformed token")
+        return claims
+
+
+class AuthService:
+    """Users in the `users` collection, scrypt password hashes and signed access tokens"""
+
+    def __init__(self, signer: Optional[TokenSigner] = None, hash_workers: int = AUTH_HASH_WORKERS):
+        self.signer = signer or TokenSigner()
+        # Separate from the default executor so login bursts cannot starve other to_thread work
+        self._executor = ThreadPoolExecutor(max_workers=hash_workers, thread_name_prefix="auth-hash")
+        self._dummy_hash: Optional[str] = None
+        self._indexed = False
+
+    async def _hash(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _users(self):
+        db = await get_mongo_db()
+        if not self._indexed:
+            await db.users.create_index("username", unique=True)
+            self._indexed = True
+        return db.users
+
+    async def register(self, username: str, password: str) -> bool:
+        """Store a new user; False when the username is taken"""
+        password_hash = await self._hash(hash_password, password)
+        users = await self._users()
+        try:
+            await users.insert_one({"username": username, "password_hash": password_hash, "created_at": utcnow()})
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def authenticate(self, username: str, password: str) -> Optional[Dict[str, Any]]:
+        users = await self._users()
+        user = await users.find_one({"username": username}, {"password_hash": 1, "username": 1})
+        if user is None:
+            # Hash anyway so response time does not reveal which usernames exist
+            if self._dummy_hash is None:
+                self._dummy_hash = await self._hash(hash_password, secrets.token_urlsafe(16))
+            await self._hash(verify_password, password, self._dummy_hash)
+            return None
+        if not await self._hash(verify_password, password, user["password_hash"]):
+            return None
+        return user
+
+    def issue_token(self, username: str) -> Dict[str, Any]:
+        return {"access_token": self.signer.issue(username), "token_type": "bearer", "expires_in": self.signer.ttl}
+
+    def verify_token(self, token: str) -> Dict[str, Any]:
+        return self.signer.verify(token)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
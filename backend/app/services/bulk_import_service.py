@@ -0,0 +1,129 @@
+import os
+import io
+import csv
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Iterator, List, Optional, IO
+from app.database import CompaniesRepository
+from app.normalization import normalize_company
+
+logger = logging.getLogger(__name__)
+
+# Rows normalized and written per bulk operation
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "5000"))
+# Bulk writes allowed in flight while the next chunk is being parsed
+BULK_IMPORT_CONCURRENCY = int(os.getenv("BULK_IMPORT_CONCURRENCY", "4"))
+
+SUPPORTED_FORMATS = ("csv", "jsonl", "parquet")
+
+
+def detect_format(filename: str) -> Optional[str]:
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if extension in ("json", "ndjson"):
+        extension = "jsonl"
+    return extension if extension in SUPPORTED_FORMATS else None
+
+
+def normalize_row(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map a raw input row onto the canonical company schema; rows without a name are dropped"""
+    # Empty cells are left out so they do not overwrite known values in upsert mode
+    doc = normalize_company({key: value for key, value in row.items()
+                             if key not in (None, "_id", "id") and value is not None and value != ""})
+    if not doc.get("name"):
+        return None
+    return doc
+
+
+def iter_rows(stream: IO[bytes], fmt: str) -> Iterator[Dict[str, Any]]:
+    """Stream rows out of a binary file object without loading it whole"""
+    if fmt == "csv":
+        yield from csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    elif fmt == "jsonl":
+        for line in io.TextIOWrapper(stream, encoding="utf-8"):
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    elif fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet import requires the pyarrow package")
+        for batch in pq.ParquetFile(stream).iter_batches(batch_size=BULK_IMPORT_CHUNK_SIZE):
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported format '{fmt}', expected one of {', '.join(SUPPORTED_FORMATS)}")
+
+
+def iter_chunks(rows: Iterator[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for row in rows:
+        doc = normalize_row(row)
+        if doc is not None:
+            chunk.append(doc)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+class BulkImportService:
+    """
+    Streams company files into the companies collection in chunks.
+
+    In "upsert" mode each chunk becomes one unordered bulk_write of upserts
+    keyed by company name, like the scraper and enrichment writers. "insert"
+    mode uses unordered insert_many for new data. Parsing of the next chunk
+    overlaps with in-flight writes. Every document is stamped with
+    `updated_at`, so the lead cache picks the rows up incrementally.
+    """
+
+    def __init__(self, chunk_size: int = BULK_IMPORT_CHUNK_SIZE, concurrency: int = BULK_IMPORT_CONCURRENCY):
+        # One bulk write per parsed chunk
+        self.repository = CompaniesRepository(batch_size=chunk_size)
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+
+    async def _write_chunk(self, chunk: List[Dict[str, Any]], mode: str) -> Dict[str, int]:
+        if mode == "insert":
+            return await self.repository.insert_many(chunk)
+        return await self.repository.upsert_by_name(chunk)
+
+    async def import_stream(self, stream: IO[bytes], fmt: str, mode: str = "upsert") -> Dict[str, Any]:
+        """Import every row of `stream`; returns row counts and throughput"""
+        if mode not in ("upsert", "insert"):
+            raise ValueError("mode must be 'upsert' or 'insert'")
+        if mode == "upsert":
+            await self.repository.ensure_indexes()
+
+        started = time.perf_counter()
+        totals = {"rows": 0, "inserted": 0, "updated": 0, "errors": 0}
+        chunks = iter_chunks(iter_rows(stream, fmt), self.chunk_size)
+        in_flight = set()
+
+        def collect(done):
+            for task in done:
+                for key, value in task.result().items():
+                    totals[key] += value
+
+        while True:
+            # Parsing runs in a thread so the event loop keeps serving while a file is read
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            totals["rows"] += len(chunk)
+            in_flight.add(asyncio.create_task(self._write_chunk(chunk, mode)))
+            if len(in_flight) >= self.concurrency:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                collect(done)
+        if in_flight:
+            done, _ = await asyncio.wait(in_flight)
+            collect(done)
+
+        elapsed = time.perf_counter() - started
+        totals["seconds"] = round(elapsed, 3)
+        totals["rows_per_second"] = round(totals["rows"] / elapsed) if elapsed else None
+        logger.info(f"Bulk import finished: {totals}")
+        return totals
@@ -0,0 +1,86 @@
+import os
+import re
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from app.metrics import SINGLE_FLIGHT_CALLS
+
+# Set to "false" to run every call on its own (for comparisons)
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() != "false"
+
+_SCHEME = re.compile(r"^[a-z]+://")
+
+
+def company_key(value: Optional[str]) -> str:
+    """Normalized company identifier: case, surrounding space, URL scheme, www. and trailing slashes ignored"""
+    key = " ".join((value or "").split()).casefold()
+    key = _SCHEME.sub("", key)
+    if key.startswith("www."):
+        key = key[4:]
+    return key.rstrip("/")
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one execution.
+
+    The first caller starts the work as its own task; later callers await the
+    same task. A caller that goes away (client disconnect) does not cancel
+    the work for the others. Errors reach every waiting caller.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if not SINGLE_FLIGHT_ENABLED:
+            return await fn()
+        task = self._calls.get(key)
+        if task is None:
+            SINGLE_FLIGHT_CALLS.inc(self.name, "leader")
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            SINGLE_FLIGHT_CALLS.inc(self.name, "follower")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Retrieved here so an error nobody waited for is not reported as unhandled
+            task.exception()
+
+    def __len__(self):
+        return len(self._calls)
+
+
+class TTLCache:
+    """Small LRU with per-entry expiry, for results of slow external calls"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
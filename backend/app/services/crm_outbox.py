@@ -0,0 +1,239 @@
+import os
+import time
+import uuid
+import random
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, UpdateOne
+from app.database import get_mongo_db, utcnow
+from app.services.crm_service import CRMService, CRMError, CRM_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+ENTITY_TYPES = ("lead", "contact")
+# Longest a queued record waits for its batch to fill before it is sent anyway (seconds)
+CRM_OUTBOX_MAX_WAIT = float(os.getenv("CRM_OUTBOX_MAX_WAIT", "2"))
+# Batch calls in flight at once while draining a backlog
+CRM_OUTBOX_CONCURRENCY = int(os.getenv("CRM_OUTBOX_CONCURRENCY", "4"))
+# Deliveries attempted before a record is marked failed
+CRM_OUTBOX_MAX_ATTEMPTS = int(os.getenv("CRM_OUTBOX_MAX_ATTEMPTS", "8"))
+# Retry delay doubles from the base up to the max (seconds), with jitter
+CRM_OUTBOX_BACKOFF_BASE = float(os.getenv("CRM_OUTBOX_BACKOFF_BASE", "1"))
+CRM_OUTBOX_BACKOFF_MAX = float(os.getenv("CRM_OUTBOX_BACKOFF_MAX", "300"))
+# Records claimed by a worker that died mid-delivery are retried after this many seconds
+CRM_OUTBOX_LEASE_SECONDS = float(os.getenv("CRM_OUTBOX_LEASE_SECONDS", "120"))
+# Delivered records are removed by a TTL index after this many days
+CRM_OUTBOX_RETENTION_DAYS = float(os.getenv("CRM_OUTBOX_RETENTION_DAYS", "7"))
+
+
+def backoff_seconds(attempts: int, retry_after: Optional[float] = None) -> float:
+    delay = min(CRM_OUTBOX_BACKOFF_MAX, CRM_OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1))
+    delay *= random.uniform(0.5, 1.0)
+    return max(delay, retry_after or 0.0)
+
+
+class CrmOutbox:
+    """
+    Durable queue of CRM writes in the `crm_outbox` collection.
+
+    Writers enqueue records and return immediately. A background flusher sends
+    them in batches of CRM_BATCH_SIZE, either when a batch fills up or after
+    CRM_OUTBOX_MAX_WAIT seconds. Failed calls are retried with exponential
+    backoff and every record keeps its delivery status. Records are claimed
+    with a lease, so several workers can flush the same outbox.
+    """
+
+    def __init__(self, crm_service: CRMService, batch_size: int = CRM_BATCH_SIZE,
+                 max_wait: float = CRM_OUTBOX_MAX_WAIT, concurrency: int = CRM_OUTBOX_CONCURRENCY):
+        self.crm_service = crm_service
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.concurrency = concurrency
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._queued_since_flush = 0
+
+    async def _collection(self):
+        db = await get_mongo_db()
+        return db.crm_outbox
+
+    async def start(self):
+        if self._task is None:
+            collection = await self._collection()
+            await collection.create_index([("status", ASCENDING), ("entity_type", ASCENDING),
+                                           ("next_attempt_at", ASCENDING)])
+            await collection.create_index("lease", sparse=True)
+            await collection.create_index("delivered_at", expireAfterSeconds=int(CRM_OUTBOX_RETENTION_DAYS * 86400))
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.crm_service.close()
+
+    async def enqueue(self, entity_type: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        """Queue CRM records for delivery and return their outbox ids"""
+        if entity_type not in ENTITY_TYPES:
+            raise ValueError(f"Unknown CRM entity type '{entity_type}'")
+        if not payloads:
+            return []
+        now = utcnow()
+        docs = [
+            {
+                "_id": ObjectId(),
+                "entity_type": entity_type,
+                "payload": payload,
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for payload in payloads
+        ]
+        collection = await self._collection()
+        await collection.insert_many(docs, ordered=False)
+        self._queued_since_flush += len(docs)
+        if self._queued_since_flush >= self.batch_size:
+            self._wakeup.set()
+        return [str(doc["_id"]) for doc in docs]
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            self._queued_since_flush = 0
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"CRM outbox flush failed: {e}")
+
+    async def flush(self) -> Dict[str, int]:
+        """Deliver every record that is due, `concurrency` batches at a time"""
+        totals = {"delivered": 0, "rejected": 0, "retrying": 0, "failed": 0}
+        while True:
+            batches = []
+            for entity_type in ENTITY_TYPES:
+                while len(batches) < self.concurrency:
+                    batch = await self._claim(entity_type)
+                    if not batch:
+                        break
+                    batches.append((entity_type, batch))
+            if not batches:
+                return totals
+
+            outcomes = await asyncio.gather(*(self._deliver(entity_type, batch) for entity_type, batch in batches))
+            for outcome in outcomes:
+                for key, count in outcome.items():
+                    totals[key] += count
+            if any(outcome["retrying"] for outcome in outcomes):
+                # The CRM is failing; leave the rest of the backlog for the next window
+                return totals
+
+    async def drain(self, timeout: float = 600) -> Dict[str, int]:
+        """Flush until nothing is pending or in flight, waiting out retry backoff; for jobs without a flusher"""
+        totals = {"delivered": 0, "rejected": 0, "retrying": 0, "failed": 0}
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for key, count in (await self.flush()).items():
+                totals[key] += count
+            counts = await self.stats()
+            if not any(c.get("pending") or c.get("in_flight") for c in counts.values()):
+                break
+            await asyncio.sleep(0.2)
+        return totals
+
+    def _due(self, now) -> Dict[str, Any]:
+        return {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "in_flight", "leased_until": {"$lt": now}},
+        ]}
+
+    async def _claim(self, entity_type: str) -> List[Dict[str, Any]]:
+        collection = await self._collection()
+        now = utcnow()
+        due = {"entity_type": entity_type, **self._due(now)}
+        candidates = await collection.find(due, {"_id": 1}).sort("next_attempt_at", ASCENDING) \
+            .limit(self.batch_size).to_list(length=None)
+        if not candidates:
+            return []
+
+        # Another worker may claim some of the same records; only ours carry this lease
+        lease = uuid.uuid4().hex
+        await collection.update_many(
+            {"_id": {"$in": [doc["_id"] for doc in candidates]}, **due},
+            {"$set": {"status": "in_flight", "lease": lease,
+                      "leased_until": now + timedelta(seconds=CRM_OUTBOX_LEASE_SECONDS)}},
+        )
+        return await collection.find({"lease": lease}).to_list(length=None)
+
+    async def _deliver(self, entity_type: str, batch: List[Dict[str, Any]]) -> Dict[str, int]:
+        outcome = {"delivered": 0, "rejected": 0, "retrying": 0, "failed": 0}
+        try:
+            results = await self.crm_service.send_batch([doc["payload"] for doc in batch], entity_type)
+        except CRMError as e:
+            logger.warning(f"CRM batch of {len(batch)} {entity_type}s failed: {e}")
+            results, error = None, e
+        except Exception as e:
+            logger.error(f"CRM batch of {len(batch)} {entity_type}s failed: {e}")
+            results, error = None, CRMError(str(e))
+
+        now = utcnow()
+        release = {"lease": "", "leased_until": ""}
+        operations = []
+        for index, doc in enumerate(batch):
+            attempts = doc["attempts"] + 1
+            update = {"attempts": attempts, "updated_at": now}
+            if results is not None and results[index].get("status") == "success":
+                update.update(status="delivered", delivered_at=now, crm_id=results[index].get("id"))
+                outcome["delivered"] += 1
+            elif results is not None:
+                # The CRM refused this record; resending it unchanged will not help
+                update.update(status="rejected", last_error=str(results[index].get("error", "rejected")))
+                outcome["rejected"] += 1
+            elif error.retryable and attempts < CRM_OUTBOX_MAX_ATTEMPTS:
+                update.update(status="pending", last_error=str(error),
+                              next_attempt_at=now + timedelta(seconds=backoff_seconds(attempts, error.retry_after)))
+                outcome["retrying"] += 1
+            else:
+                update.update(status="failed", last_error=str(error))
+                outcome["failed"] += 1
+            operations.append(UpdateOne({"_id": doc["_id"], "lease": doc["lease"]}, {"$set": update, "$unset": release}))
+
+        collection = await self._collection()
+        await collection.bulk_write(operations, ordered=False)
+        return outcome
+
+    async def stats(self) -> Dict[str, Dict[str, int]]:
+        """Record counts by entity type and delivery status"""
+        collection = await self._collection()
+        counts: Dict[str, Dict[str, int]] = {entity_type: {} for entity_type in ENTITY_TYPES}
+        pipeline = [{"$group": {"_id": {"entity_type": "$entity_type", "status": "$status"}, "count": {"$sum": 1}}}]
+        async for row in collection.aggregate(pipeline):
+            counts.setdefault(row["_id"]["entity_type"], {})[row["_id"]["status"]] = row["count"]
+        return counts
+
+    async def get(self, outbox_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            object_id = ObjectId(outbox_id)
+        except InvalidId:
+            return None
+        collection = await self._collection()
+        doc = await collection.find_one({"_id": object_id}, {"payload": 0, "lease": 0})
+        if doc:
+            doc["id"] = str(doc.pop("_id"))
+        return doc
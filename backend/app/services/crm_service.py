@@ -1,6 +1,10 @@
 import os
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 from dotenv import load_dotenv
+from ..metrics import track_provider
+
+if TYPE_CHECKING:
+    import httpx
 
 # Get the directory of the current file (crm_service.py)
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,22 +16,87 @@ load_dotenv(dotenv_path=dotenv_path)
 # Placeholder for CRM API Key or authentication details
 CRM_API_KEY = os.getenv("CRM_API_KEY")
 CRM_API_BASE_URL = os.getenv("CRM_API_BASE_URL")
+# Records per batch call; CRM bulk APIs typically cap batches at 100-200 records
+CRM_BATCH_SIZE = int(os.getenv("CRM_BATCH_SIZE", "100"))
+# Seconds before a CRM call is abandoned (and retried by the outbox)
+CRM_TIMEOUT = float(os.getenv("CRM_TIMEOUT", "30"))
+
+
+class CRMError(Exception):
+    """A failed CRM call; `retryable` is False when resending the same batch cannot succeed"""
+
+    def __init__(self, message: str, retryable: bool = True, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
 
 class CRMService:
     def __init__(self):
+        self._client: Optional["httpx.AsyncClient"] = None
         if not CRM_API_KEY or not CRM_API_BASE_URL:
             print("Warning: CRM_API_KEY or CRM_API_BASE_URL not set. CRM integration will use dummy data.")
 
+    @property
+    def configured(self) -> bool:
+        return bool(CRM_API_KEY and CRM_API_BASE_URL)
+
+    def _http(self) -> "httpx.AsyncClient":
+        # One pooled client for all batches so connections are reused
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                base_url=CRM_API_BASE_URL,
+                headers={"Authorization": f"Bearer {CRM_API_KEY}"},
+                timeout=CRM_TIMEOUT,
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     async def send_to_crm(self, crm_data: Dict[str, Any], entity_type: str) -> Dict[str, Any]:
+        """Sends a single record to the CRM"""
+        if not self.configured:
+            print(f"Simulating sending {entity_type} data to CRM: {crm_data}")
+            return {"status": "success", "message": f"{entity_type} sent to CRM successfully (simulated)", "data": crm_data}
+        result = (await self.send_batch([crm_data], entity_type))[0]
+        if result.get("status") != "success":
+            raise CRMError(result.get("error", "Rejected by CRM"), retryable=False)
+        return result
+
+    async def send_batch(self, records: List[Dict[str, Any]], entity_type: str) -> List[Dict[str, Any]]:
         """
-        Sends data to the CRM.
-        This is a placeholder function and would be replaced with actual CRM API calls.
+        Sends up to CRM_BATCH_SIZE records of one entity type in a single call.
+
+        Returns one result per record, in order: {"status": "success", "id": ...}
+        or {"status": "error", "error": ...}. Raises CRMError when the call as a
+        whole fails.
         """
-        print(f"Simulating sending {entity_type} data to CRM: {crm_data}")
-        # In a real application, you would make an HTTP request to your CRM API here.
-        # Example: response = await httpx.post(f"{CRM_API_BASE_URL}/api/{entity_type}", json=crm_data, headers={"Authorization": f"Bearer {CRM_API_KEY}"})
-        # response.raise_for_status()
-        # return response.json()
-        
-        # For now, just return the data as if it was successfully sent
-        return {"status": "success", "message": f"{entity_type} sent to CRM successfully (simulated)", "data": crm_data} 
\ No newline at end of file
+        if not self.configured:
+            print(f"Simulating sending {len(records)} {entity_type} records to CRM")
+            return [{"status": "success", "id": None} for _ in records]
+
+        import httpx
+        try:
+            response = await track_provider(
+                "crm", self._http().post(f"/api/{entity_type}s/batch", json={"records": records})
+            )
+        except httpx.HTTPError as e:
+            raise CRMError(f"CRM request failed: {e!r}")
+
+        if response.status_code == 429 or response.status_code >= 500:
+            retry_after = response.headers.get("Retry-After")
+            raise CRMError(
+                f"CRM returned {response.status_code}",
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+        if response.status_code >= 400:
+            raise CRMError(f"CRM rejected the batch ({response.status_code}): {response.text[:200]}", retryable=False)
+
+        results = response.json().get("results", [])
+        if len(results) != len(records):
+            raise CRMError(f"CRM returned {len(results)} results for {len(records)} records")
+        return results
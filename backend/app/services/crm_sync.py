@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+from pymongo import ASCENDING, UpdateOne
+from app.database import companies, get_mongo_db, utcnow
+from app.crm.mapping import company_to_crm_lead, company_to_crm_contact
+from app.services.crm_outbox import CrmOutbox
+
+logger = logging.getLogger(__name__)
+
+# Companies read, compared and queued per step; the checkpoint advances after each page
+CRM_SYNC_PAGE_SIZE = int(os.getenv("CRM_SYNC_PAGE_SIZE", "1000"))
+CHECKPOINT_ID = "companies"
+
+
+def payload_hash(payload: Optional[Dict[str, Any]]) -> Optional[str]:
+    if payload is None:
+        return None
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class CrmSyncService:
+    """
+    Incremental sync of the companies collection to the CRM.
+
+    `crm_sync_state` keeps, per company, a hash of the last CrmLead and
+    CrmContact payloads queued for it and the `updated_at` they were built
+    from. A run only reads companies updated since the previous run started
+    and only queues payloads whose hash changed, so its cost follows the
+    number of changes rather than the size of the lead base. Progress is
+    checkpointed in `crm_sync_checkpoints` after every page; an interrupted
+    run resumes after the last company it finished. Delivery itself goes
+    through the CRM outbox.
+    """
+
+    def __init__(self, outbox: CrmOutbox, page_size: int = CRM_SYNC_PAGE_SIZE):
+        self.outbox = outbox
+        self.page_size = page_size
+
+    async def status(self) -> Optional[Dict[str, Any]]:
+        db = await get_mongo_db()
+        checkpoint = await db.crm_sync_checkpoints.find_one({"_id": CHECKPOINT_ID}, {"_id": 0})
+        if checkpoint and checkpoint.get("last_id") is not None:
+            checkpoint["last_id"] = str(checkpoint["last_id"])
+        return checkpoint
+
+    async def _start_run(self, db, full: bool, resume: bool) -> Dict[str, Any]:
+        checkpoint = await db.crm_sync_checkpoints.find_one({"_id": CHECKPOINT_ID})
+        if resume and checkpoint and checkpoint.get("status") == "running":
+            logger.info(f"Resuming CRM sync run {checkpoint['run_id']} after {checkpoint.get('last_id')}")
+            checkpoint["resumed"] = True
+            return checkpoint
+
+        since = None if full or not checkpoint else checkpoint.get("completed_since")
+        checkpoint = {
+            "_id": CHECKPOINT_ID,
+            "run_id": uuid.uuid4().hex[:12],
+            "status": "running",
+            "full": full,
+            "started_at": utcnow(),
+            "since": since,
+            # Kept from the last completed run, so a failed run does not lose the watermark
+            "completed_since": checkpoint.get("completed_since") if checkpoint else None,
+            "last_id": None,
+            "scanned": 0, "pushed": 0, "created": 0, "changed": 0, "skipped": 0, "unmappable": 0,
+        }
+        await db.crm_sync_checkpoints.replace_one({"_id": CHECKPOINT_ID}, checkpoint, upsert=True)
+        checkpoint["resumed"] = False
+        return checkpoint
+
+    async def run(self, full: bool = False, resume: bool = True) -> Dict[str, Any]:
+        """Queue created and changed companies for the CRM; returns pushed/skipped counts"""
+        db = await get_mongo_db()
+        # The (updated_at, _id) index serves the "updated since the last run" scan
+        await companies.ensure_indexes()
+        checkpoint = await self._start_run(db, full, resume)
+        start = time.perf_counter()
+
+        base_query: Dict[str, Any] = {}
+        if checkpoint["since"] is not None:
+            # $gte: writes in the same millisecond as the last run's start are compared again, not lost
+            base_query["updated_at"] = {"$gte": checkpoint["since"]}
+
+        while True:
+            query = dict(base_query)
+            if checkpoint["last_id"] is not None:
+                query["_id"] = {"$gt": checkpoint["last_id"]}
+            page = await companies.find_many(query, sort=[("_id", ASCENDING)], limit=self.page_size, primary=True)
+            if not page:
+                break
+            counts = await self._sync_page(db, page)
+            for key, count in counts.items():
+                checkpoint[key] += count
+            checkpoint["last_id"] = page[-1]["_id"]
+            await db.crm_sync_checkpoints.update_one({"_id": CHECKPOINT_ID}, {"$set": {
+                key: checkpoint[key] for key in ("last_id", *counts)
+            }})
+
+        finished = {
+            "status": "completed",
+            "completed_at": utcnow(),
+            # The next run only needs companies written after this run began
+            "completed_since": checkpoint["started_at"],
+        }
+        await db.crm_sync_checkpoints.update_one({"_id": CHECKPOINT_ID}, {"$set": finished})
+        report = {k: checkpoint[k] for k in ("run_id", "full", "resumed", "scanned", "pushed", "created",
+                                             "changed", "skipped", "unmappable")}
+        report["seconds"] = round(time.perf_counter() - start, 3)
+        logger.info(f"CRM sync {report['run_id']}: {report['pushed']} pushed, {report['skipped']} skipped "
+                    f"of {report['scanned']} scanned in {report['seconds']}s")
+        return report
+
+    async def _sync_page(self, db, page: List[Dict[str, Any]]) -> Dict[str, int]:
+        counts = {"scanned": len(page), "pushed": 0, "created": 0, "changed": 0, "skipped": 0, "unmappable": 0}
+        states = {
+            state["_id"]: state
+            async for state in db.crm_sync_state.find({"_id": {"$in": [company["_id"] for company in page]}})
+        }
+
+        leads, contacts, updates = [], [], []
+        now = utcnow()
+        for company in page:
+            lead = company_to_crm_lead(company)
+            if lead is None:
+                counts["unmappable"] += 1
+                continue
+            contact = company_to_crm_contact(company)
+            lead_hash, contact_hash = payload_hash(lead), payload_hash(contact)
+            state = states.get(company["_id"])
+
+            push_lead = state is None or state.get("lead_hash") != lead_hash
+            push_contact = contact is not None and (state is None or state.get("contact_hash") != contact_hash)
+            if not push_lead and not push_contact:
+                counts["skipped"] += 1
+                continue
+
+            counts["pushed"] += 1
+            counts["created" if state is None else "changed"] += 1
+            if push_lead:
+                leads.append(lead)
+            if push_contact:
+                contacts.append(contact)
+            updates.append(UpdateOne({"_id": company["_id"]}, {"$set": {
+                "lead_hash": lead_hash,
+                "contact_hash": contact_hash,
+                "synced_version": company.get("updated_at"),
+                "synced_at": now,
+            }}, upsert=True))
+
+        # Queued before the state is written: a crash in between re-sends rather than drops changes
+        await self.outbox.enqueue("lead", leads)
+        await self.outbox.enqueue("contact", contacts)
+        if updates:
+            await db.crm_sync_state.bulk_write(updates, ordered=False)
+        return counts
@@ -1,13 +1,13 @@
 import os
 from typing import Dict, Any
-import httpx
 import asyncio
-from app.database import get_mongo_db
+from app.database import companies
 import random
 from fastapi import HTTPException
-from motor.motor_asyncio import AsyncIOMotorDatabase
 import logging
 from dotenv import load_dotenv
+from app.metrics import track_provider
+from app.services.coalescing import SingleFlight, company_key
 
 # Get the directory of the current file (enrichment_service.py)
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,11 +18,18 @@ load_dotenv(dotenv_path=dotenv_path)
 
 logger = logging.getLogger(__name__)
 
+# Provider base URLs; overridable so the load-test harness can point them at local stubs
+HUNTER_API_URL = os.getenv("HUNTER_API_URL", "https://api.hunter.io")
+APOLLO_API_URL = os.getenv("APOLLO_API_URL", "https://api.apollo.io")
+NEWSAPI_URL = os.getenv("NEWSAPI_URL", "https://newsapi.org")
+
 class EnrichmentService:
     def __init__(self):
         self.hunter_api_key = os.getenv("HUNTER_API_KEY")
         self.apollo_api_key = os.getenv("APOLLO_API_KEY")
         self.newsapi_api_key = os.getenv("NEWSAPI_API_KEY")
+        # Concurrent enrichments of one company share a single provider fan-out
+        self._inflight = SingleFlight("enrich")
 
         if not self.hunter_api_key:
             logger.warning("Warning: HUNTER_API_KEY not set.")
@@ -40,28 +47,30 @@ class EnrichmentService:
         apollo_data = None
         news_data = None
 
+        # Imported on first use to keep worker start-up fast
+        import httpx
         async with httpx.AsyncClient() as client:
             tasks = []
 
             # Hunter.io (prefers domain)
             if self.hunter_api_key:
-                hunter_url = f"https://api.hunter.io/v2/email-finder?domain={domain_or_company_name}&api_key={self.hunter_api_key}"
-                tasks.append(client.get(hunter_url))
+                hunter_url = f"{HUNTER_API_URL}/v2/email-finder?domain={domain_or_company_name}&api_key={self.hunter_api_key}"
+                tasks.append(track_provider("hunter", client.get(hunter_url)))
 
             # Apollo.io Organization Enrichment (prefers domain/website)
             if self.apollo_api_key:
-                apollo_url = "https://api.apollo.io/api/v1/organizations/enrich"
-                tasks.append(client.get(
+                apollo_url = f"{APOLLO_API_URL}/api/v1/organizations/enrich"
+                tasks.append(track_provider("apollo", client.get(
                     apollo_url,
                     params={"website": domain_or_company_name},
                     headers={"X-Api-Key": self.apollo_api_key}
-                ))
+                )))
 
             # NewsAPI (uses query, can be company name)
             if self.newsapi_api_key:
-                news_url = "https://newsapi.org/v2/everything"
+                news_url = f"{NEWSAPI_URL}/v2/everything"
                 news_params = {"q": domain_or_company_name, "pageSize": 1, "apiKey": self.newsapi_api_key}
-                tasks.append(client.get(news_url, params=news_params))
+                tasks.append(track_provider("newsapi", client.get(news_url, params=news_params)))
 
             responses = await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -115,23 +124,30 @@ class EnrichmentService:
             "news_data": news_data,
         }
 
-    async def enrich_single_lead(self, company_name: str, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    @staticmethod
+    def _lead_response(company: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "name": company["name"],
+            "industry": company.get("industry", ""),
+            "location": company.get("location", ""),
+            "employeeCount": company.get("employeeCount", 0),
+            "revenue": company.get("revenue"),
+            "website": company.get("website", ""),
+            "description": company.get("description", ""),
+            "contactInfo": company.get("contactInfo", ""),
+            "probabilityScore": company.get("probabilityScore", 0),
+        }
+
+    async def enrich_single_lead(self, company_name: str) -> Dict[str, Any]:
         """Enrich a single lead with additional data"""
+        return await self._inflight.do(company_key(company_name), lambda: self._enrich_single_lead(company_name))
+
+    async def _enrich_single_lead(self, company_name: str) -> Dict[str, Any]:
         try:
             # First check if we already have enriched data in MongoDB
-            existing_data = await db.companies.find_one({"name": company_name})
+            existing_data = await companies.find_one({"name": company_name}, primary=True)
             if existing_data and existing_data.get("is_enriched"): # Check if already explicitly enriched
-                return {
-                    "name": existing_data["name"],
-                    "industry": existing_data.get("industry", ""),
-                    "location": existing_data.get("location", ""),
-                    "employeeCount": existing_data.get("employee_count", 0),
-                    "revenue": existing_data.get("revenue", ""),
-                    "website": existing_data.get("website", ""),
-                    "description": existing_data.get("description", ""),
-                    "contactInfo": existing_data.get("contact_info", ""),
-                    "probabilityScore": existing_data.get("probability_score", 0),
-                }
+                return self._lead_response(existing_data)
 
             # If no existing data or not enriched, fetch external data
             external_data = await self._fetch_external_data(company_name) # Pass company_name as domain/query
@@ -141,12 +157,12 @@ class EnrichmentService:
                 "is_enriched": True,
                 "industry": "",
                 "location": "",
-                "employee_count": 0,
-                "revenue": "",
+                "employeeCount": 0,
+                "revenue": None,
                 "website": "",
                 "description": "",
-                "contact_info": "",
-                "probability_score": 0
+                "contactInfo": "",
+                "probabilityScore": 0
             }
 
             # Process Apollo.io data
@@ -156,8 +172,8 @@ class EnrichmentService:
                 enriched_data["industry"] = org_info.get("industry", "")
                 enriched_data["location"] = org_info.get("public_info", {}).get("headquarters", {}).get("city", "") or \
                                            (org_info.get("locations") and org_info["locations"][0].get("city", "")) or ""
-                enriched_data["employee_count"] = org_info.get("num_employees", 0)
-                enriched_data["revenue"] = org_info.get("annual_revenue", "")
+                enriched_data["employeeCount"] = org_info.get("num_employees", 0)
+                enriched_data["revenue"] = org_info.get("annual_revenue")
                 enriched_data["website"] = org_info.get("website_url", "")
                 enriched_data["description"] = org_info.get("short_description", "") or org_info.get("description", "")
 
@@ -168,9 +184,9 @@ class EnrichmentService:
                 email_found = hunter_data["data"]["emails"][0] # Take the first email
                 contact_name = f"{email_found.get('first_name', '')} {email_found.get('last_name', '')}".strip()
                 if contact_name:
-                    enriched_data["contact_info"] = f"{contact_name} ({email_found.get('value', '')})"
+                    enriched_data["contactInfo"] = f"{contact_name} ({email_found.get('value', '')})"
                 else:
-                    enriched_data["contact_info"] = email_found.get('value', '')
+                    enriched_data["contactInfo"] = email_found.get('value', '')
 
             # Process NewsAPI data (for insights)
             news_data = external_data.get("news_data")
@@ -179,25 +195,11 @@ class EnrichmentService:
                 if len(news_data["articles"]) > 0:
                     enriched_data["insights_summary"] = news_data["articles"][0].get("title", "")
 
-            # Save enriched data to MongoDB
-            await db.companies.update_one(
-                {"name": company_name},
-                {"$set": enriched_data},
-                upsert=True
-            )
+            # Save enriched data to MongoDB (normalized in place on the way)
+            await companies.upsert_by_name([enriched_data])
 
             # Return data in the format expected by the frontend
-            return {
-                "name": enriched_data["name"],
-                "industry": enriched_data["industry"],
-                "location": enriched_data["location"],
-                "employeeCount": enriched_data["employee_count"],
-                "revenue": enriched_data["revenue"],
-                "website": enriched_data["website"],
-                "description": enriched_data["description"],
-                "contactInfo": enriched_data["contact_info"],
-                "probabilityScore": enriched_data["probability_score"]
-            }
+            return self._lead_response(enriched_data)
 
         except Exception as e:
             logger.error(f"Error enriching lead {company_name}: {str(e)}")
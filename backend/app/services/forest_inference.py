@@ -0,0 +1,77 @@
+import numpy as np
+
+# Rows evaluated per step; keeps the (rows x trees) index matrix cache-sized for large batches
+_CHUNK_ROWS = 8192
+
+
+class FlatForest:
+    """
+    Vectorized evaluator for a fitted sklearn forest regressor.
+
+    Every tree's nodes are concatenated into contiguous NumPy arrays, and a
+    batch is evaluated by walking all (row, tree) pairs one level at a time.
+    This avoids sklearn's per-call validation and per-tree dispatch, which
+    dominate latency for small interactive batches.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_sklearn(cls, forest) -> "FlatForest":
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == -1
+            roots.append(offset)
+            # Leaves point at themselves so finished walks stay put
+            own_index = np.arange(tree.node_count) + offset
+            lefts.append(np.where(is_leaf, own_index, tree.children_left + offset))
+            rights.append(np.where(is_leaf, own_index, tree.children_right + offset))
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            values.append(tree.value[:, 0, 0])
+            max_depth = max(max_depth, tree.max_depth)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+        )
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Mean of the per-tree predictions, matching RandomForestRegressor.predict"""
+        # sklearn compares float32 features against float64 thresholds; do the same for parity
+        X = np.asarray(X, dtype=np.float32)
+        if len(X) <= _CHUNK_ROWS:
+            return self._predict_chunk(X)
+        return np.concatenate([
+            self._predict_chunk(X[start:start + _CHUNK_ROWS])
+            for start in range(0, len(X), _CHUNK_ROWS)
+        ])
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        n_rows = len(X)
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        row_index = np.arange(n_rows)[:, None]
+        for _ in range(self.max_depth):
+            go_left = X[row_index, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].mean(axis=1)
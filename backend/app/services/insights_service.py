@@ -1,11 +1,54 @@
 import os
+import json
+import asyncio
+import hashlib
+import threading
 from typing import Dict, Any
-import google.generativeai as genai
+from app.metrics import provider_call
+from app.normalization import format_revenue
+from app.services.coalescing import SingleFlight, TTLCache, company_key
 
-# Placeholder for Gemini API integration
-# In a real application, you would initialize the Gemini client here
-# For example: import google.generativeai as genai
-# genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
+# Alternative Gemini endpoint (e.g. a local stub); requests then go over REST instead of gRPC
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+# Generated insights are reused for this many seconds for the same company data
+INSIGHTS_CACHE_TTL = float(os.getenv("INSIGHTS_CACHE_TTL", str(24 * 3600)))
+INSIGHTS_CACHE_SIZE = int(os.getenv("INSIGHTS_CACHE_SIZE", "2000"))
+
+# Fields that go into the prompt; a change in any of them produces new insights
+PROMPT_FIELDS = ("name", "industry", "location", "website", "description", "employeeCount", "revenue")
+
+insights_cache = TTLCache(INSIGHTS_CACHE_SIZE, INSIGHTS_CACHE_TTL)
+insights_flight = SingleFlight("insights")
+
+_configure_lock = threading.Lock()
+_model = None
+
+def _gemini_model():
+    """Configure the client and list models once per process rather than on every request"""
+    global _model
+    with _configure_lock:
+        if _model is None:
+            # The Gemini SDK takes most of a second to import, so it is only loaded by the first generation
+            import google.generativeai as genai
+            gemini_api_key = os.environ.get("GEMINI_API_KEY")
+            if GEMINI_API_ENDPOINT:
+                genai.configure(api_key=gemini_api_key, transport="rest",
+                                client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+            else:
+                genai.configure(api_key=gemini_api_key)
+
+            # List available models
+            with provider_call("gemini"):
+                for m in genai.list_models():
+                    if 'generateContent' in m.supported_generation_methods:
+                        print(f"Model: {m.name}")
+
+            _model = genai.GenerativeModel('gemini-1.5-flash')
+        return _model
+
+def insights_key(company_data: Dict[str, Any]) -> tuple:
+    fingerprint = json.dumps([company_data.get(field) for field in PROMPT_FIELDS], default=str)
+    return company_key(company_data.get("name")), hashlib.blake2b(fingerprint.encode(), digest_size=12).hexdigest()
 
 def get_company_insights(company_data: Dict[str, Any]) -> Dict[str, str]:
     gemini_api_key = os.environ.get("GEMINI_API_KEY")
@@ -19,49 +62,73 @@ def get_company_insights(company_data: Dict[str, Any]) -> Dict[str, str]:
         }
 
     try:
-        genai.configure(api_key=gemini_api_key)
-        
-        # List available models
-        for m in genai.list_models():
-            if 'generateContent' in m.supported_generation_methods:
-                print(f"Model: {m.name}")
-        
-        model = genai.GenerativeModel('gemini-1.5-flash')
-
-        company_name = company_data.get("name", "")
-        industry = company_data.get("industry", "")
-        location = company_data.get("location", "")
-        website = company_data.get("website", "")
-        description = company_data.get("description", "")
-        employee_count = company_data.get("employeeCount", "")
-        revenue = company_data.get("revenue", "")
-
-        prompt = f"""
-        As a B2B sales intelligence expert, analyze this company and provide a concise, actionable summary:
-
-        Company Details:
-        - Name: {company_name}
-        - Industry: {industry}
-        - Location: {location}
-        - Size: {employee_count} employees
-        - Revenue: {revenue}
-        - Website: {website}
-        - Description: {description}
-
-        Please provide a brief analysis that includes:
-        1. Key business strengths and unique selling points
-        2. Potential growth opportunities
-        3. Market position and competitive advantages
-        4. Specific sales outreach recommendations
-
-        Keep the response concise, professional, and focused on actionable insights for B2B sales.
-        """
-        
+        return {"insightsSummary": generate_insights_summary(company_data)}
+    except Exception as e:
+        print(f"Error generating insights with Gemini API: {e}")
+        return {
+            "insightsSummary": "Failed to generate AI-powered insights due to an error: " + str(e) + ". Please ensure your GEMINI_API_KEY is valid and the API is accessible."
+        }
+
+def generate_insights_summary(company_data: Dict[str, Any]) -> str:
+    """Blocking Gemini call; raises on failure"""
+    model = _gemini_model()
+
+    company_name = company_data.get("name", "")
+    industry = company_data.get("industry", "")
+    location = company_data.get("location", "")
+    website = company_data.get("website", "")
+    description = company_data.get("description", "")
+    employee_count = company_data.get("employeeCount", "")
+    revenue = format_revenue(company_data.get("revenue")) or ""
+
+    prompt = f"""
+    As a B2B sales intelligence expert, analyze this company and provide a concise, actionable summary:
+
+    Company Details:
+    - Name: {company_name}
+    - Industry: {industry}
+    - Location: {location}
+    - Size: {employee_count} employees
+    - Revenue: {revenue}
+    - Website: {website}
+    - Description: {description}
+
+    Please provide a brief analysis that includes:
+    1. Key business strengths and unique selling points
+    2. Potential growth opportunities
+    3. Market position and competitive advantages
+    4. Specific sales outreach recommendations
+
+    Keep the response concise, professional, and focused on actionable insights for B2B sales.
+    """
+    
+    with provider_call("gemini"):
         response = model.generate_content(prompt)
-        insights_summary = response.text
-        return {"insightsSummary": insights_summary}
+    return response.text 
+
+async def fetch_company_insights(company_data: Dict[str, Any]) -> Dict[str, str]:
+    """
+    get_company_insights for async routes: cached per company and prompt
+    data, concurrent requests for the same company share one Gemini call,
+    and the blocking client runs in a worker thread.
+    """
+    if not os.environ.get("GEMINI_API_KEY"):
+        return get_company_insights(company_data)
+
+    key = insights_key(company_data)
+    cached = insights_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def generate() -> Dict[str, str]:
+        result = {"insightsSummary": await asyncio.to_thread(generate_insights_summary, company_data)}
+        insights_cache.put(key, result)
+        return result
+
+    try:
+        return await insights_flight.do(key, generate)
     except Exception as e:
         print(f"Error generating insights with Gemini API: {e}")
         return {
             "insightsSummary": "Failed to generate AI-powered insights due to an error: " + str(e) + ". Please ensure your GEMINI_API_KEY is valid and the API is accessible."
-        } 
\ No newline at end of file
+        }
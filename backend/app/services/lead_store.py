@@ -0,0 +1,441 @@
+import re
+import numpy as np
+from typing import List, Dict, Any, Optional, Callable, Iterable, Sequence
+from app.database import to_mongo_id
+
+# Large free-text fields are not kept resident. They stay in MongoDB and are
+# fetched per row when a lead is actually returned to a client.
+LAZY_TEXT_FIELDS = ("description", "insights_summary")
+
+# Fields that live in dedicated columns; anything else ends up in the sparse extras map.
+# nameKey is derived from name and only used by MongoDB prefix lookups, so it is not kept.
+_COLUMN_FIELDS = {
+    "_id", "id", "name", "nameKey", "industry", "location", "employeeCount",
+    "revenue", "website", "domain", "contactInfo", "probabilityScore", "potential",
+}
+
+# Numeric fields -> LeadStore column; values that are not numbers go to the extras map
+_NUMBER_COLUMNS = (("employeeCount", "employee_count"), ("revenue", "revenue"), ("probabilityScore", "probability_score"))
+
+# Lead potential tiers, indexed by the codes kept in LeadStore.potential
+POTENTIAL_TIERS = ("low", "medium", "high")
+
+# Fixed-width per-row columns and the value that marks an empty slot
+_ARRAY_COLUMNS = {
+    "industry_codes": -1,
+    "location_codes": -1,
+    "employee_count": np.nan,
+    "revenue": np.nan,
+    "probability_score": np.nan,
+    "potential": -1,
+    "alive": False,
+}
+
+
+def lead_id_of(lead: Dict[str, Any]) -> Optional[str]:
+    """Return the string id of a lead dict (Mongo `_id` first, then `id`)"""
+    value = lead.get("_id", lead.get("id"))
+    return str(value) if value is not None else None
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+
+
+def _number_out(value: float):
+    """Convert a stored float back into the int/float the lead originally held"""
+    return int(value) if float(value).is_integer() else float(value)
+
+
+class _Categorical:
+    """Interned string column: each distinct value is stored once, rows hold int32 codes"""
+
+    def __init__(self):
+        self.categories: List[str] = []
+        self._lookup: Dict[str, int] = {}
+
+    def code(self, value: Any) -> int:
+        if value is None:
+            return -1
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.categories)
+            self._lookup[value] = code
+            self.categories.append(value)
+        return code
+
+    def value(self, code: int) -> Optional[str]:
+        return self.categories[code] if code >= 0 else None
+
+    def matching_codes(self, query: str) -> List[int]:
+        return [code for code, value in enumerate(self.categories) if query in str(value).lower()]
+
+
+class LeadStore:
+    """
+    Compact columnar representation of the in-memory lead cache.
+
+    Industry and location strings are interned as categorical codes, numeric
+    fields and the ML feature matrix live in NumPy arrays, and large
+    text fields are left in MongoDB and fetched lazily. Rows are addressed by
+    position; deleted rows are tombstoned and reclaimed by `compact()`, which
+    renumbers rows: `generation` counts compactions and `on_compact` is called
+    with the surviving old row numbers in their new order.
+    """
+
+    def __init__(self, featurizer: Callable[[List[Dict[str, Any]]], np.ndarray], initial_capacity: int = 1024,
+                 on_compact: Optional[Callable[[np.ndarray], None]] = None):
+        self._featurizer = featurizer
+        self.on_compact = on_compact
+        self.generation = 0
+        self._size = 0
+        self._capacity = 0
+        self._dead = 0
+
+        self.ids: List[Optional[str]] = []
+        self._row_by_id: Dict[str, int] = {}
+        self.names: List[Optional[str]] = []
+        self.websites: List[Optional[str]] = []
+        self.domains: List[Optional[str]] = []
+        self.contact_info: List[Optional[str]] = []
+
+        self.industry = _Categorical()
+        self.location = _Categorical()
+
+        self.industry_codes = np.empty(0, dtype=np.int32)
+        self.location_codes = np.empty(0, dtype=np.int32)
+        self.employee_count = np.empty(0, dtype=np.float64)
+        self.revenue = np.empty(0, dtype=np.float64)
+        self.probability_score = np.empty(0, dtype=np.float64)
+        self.potential = np.empty(0, dtype=np.int8)
+        self.alive = np.empty(0, dtype=bool)
+        self.features: Optional[np.ndarray] = None
+
+        # Sparse per-row storage for uncommon fields and for text that cannot be fetched lazily
+        self._extras: Dict[int, Dict[str, Any]] = {}
+        self._resident_text: Dict[int, Dict[str, Any]] = {}
+
+        # field -> row reader, used to build sparse fieldsets without rebuilding whole leads
+        self._readers: Dict[str, Callable[[int], Any]] = {
+            "_id": lambda row: self.ids[row],
+            "id": lambda row: self.ids[row],
+            "name": lambda row: self.names[row],
+            "industry": lambda row: self.industry.value(self.industry_codes[row]),
+            "location": lambda row: self.location.value(self.location_codes[row]),
+            "revenue": lambda row: self._number_at(self.revenue, row),
+            "website": lambda row: self.websites[row],
+            "domain": lambda row: self.domains[row],
+            "contactInfo": lambda row: self.contact_info[row],
+            "employeeCount": lambda row: self._number_at(self.employee_count, row),
+            "probabilityScore": lambda row: self._number_at(self.probability_score, row),
+            "potential": lambda row: POTENTIAL_TIERS[self.potential[row]] if self.potential[row] >= 0 else None,
+        }
+
+        self._grow(initial_capacity)
+
+    @staticmethod
+    def _number_at(column: np.ndarray, row: int):
+        return None if np.isnan(column[row]) else _number_out(column[row])
+
+    @property
+    def row_count(self) -> int:
+        """Rows allocated so far, removed ones included"""
+        return self._size
+
+    def __len__(self) -> int:
+        return self._size - self._dead
+
+    def __contains__(self, lead_id: str) -> bool:
+        return lead_id in self._row_by_id
+
+    # ------------------------------------------------------------------ writes
+
+    def _grow(self, min_capacity: int):
+        if min_capacity <= self._capacity:
+            return
+        capacity = max(self._capacity * 2, min_capacity, 16)
+
+        def resize(array: np.ndarray, fill) -> np.ndarray:
+            grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            return grown
+
+        for attr, fill in _ARRAY_COLUMNS.items():
+            setattr(self, attr, resize(getattr(self, attr), fill))
+        if self.features is not None:
+            self.features = resize(self.features, 0.0)
+        self._capacity = capacity
+
+    def upsert_many(self, leads: Sequence[Dict[str, Any]], keep_text: bool = False,
+                    features: Optional[np.ndarray] = None) -> List[int]:
+        """
+        Insert or replace leads and return their row numbers.
+
+        Text fields are only kept resident for leads without a Mongo `_id`
+        (nothing to fetch them from later) or when `keep_text` is set, which
+        callers use for in-memory edits that were not written back to Mongo.
+        `features` may carry rows already featurized elsewhere.
+        """
+        if not leads:
+            return []
+
+        if features is None:
+            features = self._featurizer(list(leads))
+        features = np.asarray(features, dtype=np.float64)
+        if self.features is None:
+            self.features = np.zeros((self._capacity, features.shape[1]), dtype=np.float64)
+        self._grow(self._size + len(leads))
+
+        rows = []
+        for lead, feature_row in zip(leads, features):
+            lead_id = lead_id_of(lead)
+            row = self._row_by_id.get(lead_id) if lead_id is not None else None
+            if row is None:
+                row = self._size
+                self._size += 1
+                self.ids.append(lead_id)
+                self.names.append(None)
+                self.websites.append(None)
+                self.domains.append(None)
+                self.contact_info.append(None)
+                if lead_id is not None:
+                    self._row_by_id[lead_id] = row
+            self._write_row(row, lead, feature_row, keep_text or "_id" not in lead)
+            rows.append(row)
+        return rows
+
+    def _write_row(self, row: int, lead: Dict[str, Any], feature_row: np.ndarray, keep_text: bool):
+        self.names[row] = lead.get("name")
+        self.websites[row] = lead.get("website")
+        self.domains[row] = lead.get("domain")
+        self.contact_info[row] = lead.get("contactInfo")
+        self.industry_codes[row] = self.industry.code(lead.get("industry"))
+        self.location_codes[row] = self.location.code(lead.get("location"))
+
+        extras = {}
+        for field, attr in _NUMBER_COLUMNS:
+            column = getattr(self, attr)
+            value = lead.get(field)
+            column[row] = float(value) if _is_number(value) else np.nan
+            if value is not None and not _is_number(value):
+                extras[field] = value
+
+        text = {}
+        for key, value in lead.items():
+            if key in LAZY_TEXT_FIELDS:
+                if keep_text:
+                    text[key] = value
+            elif key not in _COLUMN_FIELDS:
+                extras[key] = value
+
+        self._set_sparse(self._extras, row, extras)
+        self._set_sparse(self._resident_text, row, text)
+        self.features[row] = feature_row
+        self.potential[row] = -1
+        self.alive[row] = True
+
+    @staticmethod
+    def _set_sparse(mapping: Dict[int, Dict[str, Any]], row: int, values: Dict[str, Any]):
+        if values:
+            mapping[row] = values
+        else:
+            mapping.pop(row, None)
+
+    def remove(self, lead_id: str) -> bool:
+        """Tombstone a lead; returns False if it is not in the store"""
+        row = self._row_by_id.pop(lead_id, None)
+        if row is None:
+            return False
+        self.alive[row] = False
+        self.ids[row] = self.names[row] = self.websites[row] = self.domains[row] = self.contact_info[row] = None
+        self._extras.pop(row, None)
+        self._resident_text.pop(row, None)
+        self._dead += 1
+        if self._dead > 1024 and self._dead * 2 > self._size:
+            self.compact()
+        return True
+
+    def compact(self):
+        """Drop tombstoned rows. Row numbers change, lead ids do not."""
+        keep = self.live_rows()
+        remap = {int(old): new for new, old in enumerate(keep)}
+        for attr, fill in _ARRAY_COLUMNS.items():
+            array = getattr(self, attr)
+            compacted = np.full_like(array, fill)
+            compacted[:len(keep)] = array[keep]
+            setattr(self, attr, compacted)
+        if self.features is not None:
+            compacted = np.zeros_like(self.features)
+            compacted[:len(keep)] = self.features[keep]
+            self.features = compacted
+        for attr in ("ids", "names", "websites", "domains", "contact_info"):
+            column = getattr(self, attr)
+            setattr(self, attr, [column[row] for row in keep])
+        self._extras = {remap[row]: value for row, value in self._extras.items() if row in remap}
+        self._resident_text = {remap[row]: value for row, value in self._resident_text.items() if row in remap}
+        self._row_by_id = {lead_id: row for row, lead_id in enumerate(self.ids) if lead_id is not None}
+        self._size = len(keep)
+        self._dead = 0
+        self.generation += 1
+        if self.on_compact is not None:
+            self.on_compact(keep)
+
+    # ------------------------------------------------------------------- reads
+
+    def live_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.alive[:self._size])
+
+    def row_for(self, lead_id: str) -> Optional[int]:
+        return self._row_by_id.get(lead_id)
+
+    def feature_matrix(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return the cached ML feature rows (all live rows by default)"""
+        if self.features is None:
+            return np.empty((0, 0), dtype=np.float64)
+        if rows is None:
+            rows = self.live_rows()
+        return self.features[rows]
+
+    def set_potential(self, rows: Sequence[int], codes: np.ndarray):
+        """Record potential tier codes (indexes into POTENTIAL_TIERS) for the given rows"""
+        self.potential[np.asarray(rows, dtype=np.intp)] = codes
+
+    def potential_counts(self) -> Dict[str, int]:
+        codes = self.potential[self.live_rows()]
+        return {tier: int(np.count_nonzero(codes == code)) for code, tier in enumerate(POTENTIAL_TIERS)}
+
+    def industry_counts(self) -> Dict[str, int]:
+        """Lead count per industry computed directly from the categorical codes"""
+        codes = self.industry_codes[self.live_rows()]
+        counts = np.bincount(codes + 1, minlength=len(self.industry.categories) + 1)
+        distribution = {}
+        if counts[0]:
+            distribution["Unknown"] = int(counts[0])
+        for code, count in enumerate(counts[1:]):
+            if count:
+                distribution[self.industry.categories[code]] = int(count)
+        return distribution
+
+    def to_dict(self, row: int, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Rebuild a lead dict from the resident columns (without lazily stored text); `fields` limits the keys"""
+        if fields is not None:
+            return self._sparse_dict(row, fields)
+        lead: Dict[str, Any] = {}
+        lead_id = self.ids[row]
+        if lead_id is not None:
+            lead["_id"] = lead_id
+            lead["id"] = lead_id
+        for field, value in (
+            ("name", self.names[row]),
+            ("industry", self.industry.value(self.industry_codes[row])),
+            ("location", self.location.value(self.location_codes[row])),
+            ("website", self.websites[row]),
+            ("domain", self.domains[row]),
+            ("contactInfo", self.contact_info[row]),
+        ):
+            if value is not None:
+                lead[field] = value
+        for field, attr in _NUMBER_COLUMNS:
+            column = getattr(self, attr)
+            if not np.isnan(column[row]):
+                lead[field] = _number_out(column[row])
+        if self.potential[row] >= 0:
+            lead["potential"] = POTENTIAL_TIERS[self.potential[row]]
+        lead.update(self._extras.get(row, {}))
+        lead.update(self._resident_text.get(row, {}))
+        return lead
+
+    def _sparse_dict(self, row: int, fields: Sequence[str]) -> Dict[str, Any]:
+        lead: Dict[str, Any] = {}
+        extras = self._extras.get(row)
+        resident_text = self._resident_text.get(row)
+        for field in fields:
+            reader = self._readers.get(field)
+            if reader is not None:
+                value = reader(row)
+            elif extras and field in extras:
+                value = extras[field]
+            elif resident_text and field in resident_text:
+                value = resident_text[field]
+            else:
+                continue
+            if value is not None:
+                lead[field] = value
+        return lead
+
+    async def fetch_text(self, repository, rows: Iterable[int],
+                         fields: Sequence[str] = LAZY_TEXT_FIELDS) -> Dict[int, Dict[str, Any]]:
+        """Load the lazily stored text fields for the given rows through the companies repository"""
+        rows = [int(row) for row in rows]
+        text: Dict[int, Dict[str, Any]] = {}
+        by_mongo_id = {}
+        for row in rows:
+            lead_id = self.ids[row]
+            if lead_id is not None and row not in self._resident_text:
+                by_mongo_id[to_mongo_id(lead_id)] = row
+
+        if repository is not None and by_mongo_id:
+            for doc in await repository.find_by_ids(by_mongo_id, {field: 1 for field in fields}):
+                row = by_mongo_id.get(doc.pop("_id"))
+                if row is not None and doc:
+                    text[row] = doc
+
+        for row in rows:
+            resident = self._resident_text.get(row)
+            if resident:
+                text.setdefault(row, {}).update({k: v for k, v in resident.items() if k in fields})
+        return text
+
+    async def materialize(self, repository, rows: Iterable[int], include_text: bool = True,
+                          fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Rebuild lead dicts for the given rows, fetching lazy text in bulk; `fields` limits the keys"""
+        rows = [int(row) for row in rows]
+        leads = [self.to_dict(row, fields) for row in rows]
+        text_fields = LAZY_TEXT_FIELDS if fields is None else tuple(f for f in LAZY_TEXT_FIELDS if f in fields)
+        if include_text and text_fields and leads:
+            text = await self.fetch_text(repository, rows, text_fields)
+            for row, lead in zip(rows, leads):
+                lead.update(text.get(row, {}))
+        return leads
+
+    def search(self, query: str) -> np.ndarray:
+        """Rows whose resident fields contain `query` (case-insensitive)"""
+        query = query.lower()
+        n = self._size
+        mask = np.zeros(n, dtype=bool)
+
+        for categorical, codes in (
+            (self.industry, self.industry_codes),
+            (self.location, self.location_codes),
+        ):
+            matching = categorical.matching_codes(query)
+            if matching:
+                mask |= np.isin(codes[:n], matching)
+
+        for column in (self.ids, self.names, self.websites, self.contact_info):
+            for row, value in enumerate(column):
+                if value is not None and query in str(value).lower():
+                    mask[row] = True
+
+        if re.search(r"[\d.]", query):
+            for column in (self.employee_count, self.revenue, self.probability_score):
+                for row in np.flatnonzero(~np.isnan(column[:n])):
+                    if query in str(_number_out(column[row])):
+                        mask[row] = True
+
+        for sparse in (self._extras, self._resident_text):
+            for row, values in sparse.items():
+                if any(query in str(value).lower() for value in values.values()):
+                    mask[row] = True
+
+        mask &= self.alive[:n]
+        return np.flatnonzero(mask)
+
+    async def search_text(self, repository, query: str) -> np.ndarray:
+        """Rows whose lazily stored text fields match `query`, resolved in MongoDB"""
+        if repository is None:
+            return np.empty(0, dtype=np.int64)
+        pattern = {"$regex": re.escape(query), "$options": "i"}
+        ids = await repository.ids_matching({"$or": [{field: pattern} for field in LAZY_TEXT_FIELDS]})
+        rows = [self._row_by_id[lead_id] for lead_id in ids if lead_id in self._row_by_id]
+        return np.asarray(rows, dtype=np.int64)
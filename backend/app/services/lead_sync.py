@@ -0,0 +1,180 @@
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pymongo.errors import OperationFailure, PyMongoError
+from app.database import companies, utcnow
+from app.services.ml_executor import MLBusyError
+
+logger = logging.getLogger(__name__)
+
+# "auto" tails a change stream when available and falls back to polling; "poll" always polls
+LEAD_SYNC_MODE = os.getenv("LEAD_SYNC_MODE", "auto")
+# Seconds between polls when change streams are unavailable (standalone mongod)
+LEAD_SYNC_POLL_INTERVAL = float(os.getenv("LEAD_SYNC_POLL_INTERVAL", "5"))
+# Minimum seconds between model retrains triggered by synced changes
+LEAD_SYNC_RETRAIN_INTERVAL = float(os.getenv("LEAD_SYNC_RETRAIN_INTERVAL", "60"))
+# Maximum number of changes applied to the lead store at once
+LEAD_SYNC_BATCH_SIZE = int(os.getenv("LEAD_SYNC_BATCH_SIZE", "500"))
+
+
+class LeadSyncService:
+    """
+    Keeps LeadsService's in-memory store in sync with the companies collection.
+
+    Tails a change stream when the deployment supports one (replica set or
+    Atlas) and otherwise polls for documents whose `updated_at` is past the
+    last seen watermark. Only the changed documents are re-featurized; the
+    models are retrained at most once per LEAD_SYNC_RETRAIN_INTERVAL. Deletes
+    are only observed through change streams.
+    """
+
+    def __init__(self, leads_service):
+        self.leads_service = leads_service
+        self.watermark: Optional[datetime] = None
+        # Ids already applied at exactly the watermark timestamp, so polls can skip them
+        self._seen_at_watermark = set()
+        self.resume_token = None
+        # Cluster time the change stream opens at when there is no resume token yet
+        self.start_at = None
+        self.mode: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+        self._last_retrain = 0.0
+
+    async def mark_start(self):
+        """Record where syncing starts; call before the leads are loaded so writes made during the load are synced"""
+        self.watermark = utcnow()
+        self.start_at = await companies.operation_time()
+
+    async def start(self):
+        if self._task is None:
+            if self.watermark is None:
+                await self.mark_start()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        if LEAD_SYNC_MODE == "poll" or not companies.supports_change_streams:
+            await self._poll_forever()
+        while True:
+            try:
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                # Change streams need a replica set; fall back to polling for good
+                logger.info(f"Change streams unavailable ({e}); polling companies by updated_at")
+                await self._poll_forever()
+            except PyMongoError as e:
+                logger.error(f"Lead change stream interrupted: {e}")
+                await asyncio.sleep(LEAD_SYNC_POLL_INTERVAL)
+            except Exception:
+                # Polling never sees deletes, so keep the stream and resume it after the last applied change
+                logger.exception("Lead change stream failed; resuming it")
+                await asyncio.sleep(LEAD_SYNC_POLL_INTERVAL)
+
+    async def _watch(self):
+        options = {"full_document": "updateLookup"}
+        if self.resume_token is not None:
+            options["resume_after"] = self.resume_token
+        elif self.start_at is not None:
+            options["start_at_operation_time"] = self.start_at
+        async with companies.watch(**options) as stream:
+            self.mode = "change_stream"
+            logger.info("Tailing companies change stream")
+            while stream.alive:
+                upserts, deleted = [], []
+                change = await stream.try_next()
+                while change is not None:
+                    operation = change["operationType"]
+                    if operation == "delete":
+                        deleted.append(str(change["documentKey"]["_id"]))
+                    elif change.get("fullDocument") is not None:
+                        upserts.append(change["fullDocument"])
+                    if len(upserts) + len(deleted) >= LEAD_SYNC_BATCH_SIZE:
+                        break
+                    change = await stream.try_next()
+                await self.apply(upserts, deleted)
+                # Only now, so a batch whose apply raises is read again when the stream resumes
+                self.resume_token = stream.resume_token
+                if not upserts and not deleted:
+                    await asyncio.sleep(0.1)
+
+    async def _poll_forever(self):
+        self.mode = "poll"
+        while True:
+            try:
+                await self.poll_once()
+            except PyMongoError as e:
+                logger.error(f"Lead sync poll failed: {e}")
+            except Exception:
+                logger.exception("Lead sync poll failed")
+            await asyncio.sleep(LEAD_SYNC_POLL_INTERVAL)
+
+    async def poll_once(self) -> int:
+        """Apply every document updated since the watermark; returns the number applied"""
+        applied = 0
+        while True:
+            if self.watermark is None:
+                query = {"updated_at": {"$exists": True}}
+            else:
+                query = {"$or": [
+                    {"updated_at": {"$gt": self.watermark}},
+                    {"updated_at": self.watermark, "_id": {"$nin": list(self._seen_at_watermark)}},
+                ]}
+            batch = await companies.find_many(query, sort=[("updated_at", 1)], limit=LEAD_SYNC_BATCH_SIZE, primary=True)
+            if not batch:
+                break
+            await self.apply(batch, [])
+            self._advance_watermark(batch)
+            applied += len(batch)
+            if len(batch) < LEAD_SYNC_BATCH_SIZE:
+                break
+        await self.maybe_retrain()
+        return applied
+
+    async def sync_now(self):
+        """Pick up everything written so far and retrain once, e.g. at the end of a bulk import"""
+        await self.leads_service.initialize()
+        await self.poll_once()
+        if self._dirty:
+            self._dirty = False
+            self._last_retrain = time.monotonic()
+            await self.leads_service._retrain()
+
+    def _advance_watermark(self, docs: List[Dict[str, Any]]):
+        latest = docs[-1]["updated_at"]
+        if latest != self.watermark:
+            self.watermark = latest
+            self._seen_at_watermark = set()
+        self._seen_at_watermark.update(doc["_id"] for doc in docs if doc["updated_at"] == latest)
+
+    async def apply(self, upserts: List[Dict[str, Any]], deleted: List[str]):
+        """Apply a batch of changed documents and deleted ids to the lead store"""
+        if upserts or deleted:
+            self.leads_service.apply_changes(upserts, deleted)
+            self._dirty = True
+            logger.info(f"Synced {len(upserts)} changed and {len(deleted)} deleted leads")
+        await self.maybe_retrain()
+
+    async def maybe_retrain(self):
+        if self._dirty and time.monotonic() - self._last_retrain >= LEAD_SYNC_RETRAIN_INTERVAL:
+            self._dirty = False
+            self._last_retrain = time.monotonic()
+            try:
+                await self.leads_service._retrain()
+            except MLBusyError as e:
+                # The changes are already applied; retrain on a later batch or poll
+                self._dirty = True
+                logger.warning(f"Lead sync retrain deferred: {e}")
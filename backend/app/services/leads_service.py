@@ -1,124 +1,521 @@
-from typing import List, Dict, Any, Optional
-from .ml_service import MLService
-from app.database import get_mongo_db
+import os
+import time
+import asyncio
+import logging
+import numpy as np
+from typing import List, Dict, Any, Optional, Sequence
+from .ml_service import MLService, FEATURE_NAMES
+from .lead_store import LeadStore
+from .model_store import ModelArtifactStore, SnapshotStore, training_key
+from .ml_executor import ml_executor, MLBusyError
+from .similarity import LeadEmbedder, VectorIndex, SIMILAR_IVF_MIN, SIMILAR_FIT_SAMPLE
+from .name_index import NameIndex, prefix_key, rank_suggestions, SUGGEST_FALLBACK_SCAN
+from app.database import companies
+from app.normalization import normalize_company
+
+logger = logging.getLogger(__name__)
+
+# Number of documents pulled from MongoDB per batch while filling the lead store
+LOAD_BATCH_SIZE = 5000
+# Seconds between full clustering refits; in between, new leads are folded in online
+ML_CLUSTER_REFIT_INTERVAL = float(os.getenv("ML_CLUSTER_REFIT_INTERVAL", "3600"))
+# "standalone" trains in this process; with several API workers run one "trainer"
+# (python ml_trainer.py) and start the workers as "worker" so they only load its models
+ML_ROLE = os.getenv("ML_ROLE", "standalone")
+# Seconds between checks for a newer snapshot published by the trainer (worker role)
+ML_SNAPSHOT_POLL_INTERVAL = float(os.getenv("ML_SNAPSHOT_POLL_INTERVAL", "2"))
 
 class LeadsService:
-    def __init__(self):
-        self.leads = []
+    def __init__(self, role: str = ML_ROLE):
+        if role not in ("standalone", "trainer", "worker"):
+            raise ValueError(f"Unknown ML_ROLE {role!r}")
+        self.role = role
         self.ml_service = MLService()
+        self.store = LeadStore(self.ml_service._prepare_features, on_compact=self._remap_rows)
+        self.artifacts = ModelArtifactStore()
+        self.snapshots = SnapshotStore()
+        # Published snapshot arrays (memory-mapped) and, per store row, its index
+        # in them; -1 for rows written since, which are scored here instead
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_pos = np.empty(0, dtype=np.int64)
+        self._watch_task: Optional[asyncio.Task] = None
+        # "Similar leads" index; changes made while it is being built wait in _index_pending
+        self.embedder = LeadEmbedder()
+        self.similar_index: Optional[VectorIndex] = None
+        self._index_task: Optional[asyncio.Future] = None
+        self._index_pending: Optional[Dict[str, Optional[Dict[str, Any]]]] = None
+        # Company-name typeahead; ids of leads changed while it is being built wait in _names_pending
+        self.name_index: Optional[NameIndex] = None
+        self._name_index_task: Optional[asyncio.Future] = None
+        self._names_pending: Optional[set] = None
         self._is_initialized = False
+        self._init_task: Optional[asyncio.Future] = None
+        self._last_cluster_refit = None
+        # Artifact key of the models currently installed; pool workers score against it
+        self._model_key = None
+        self._train_lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._is_initialized
 
     async def initialize(self):
-        """Initialize the service by loading leads from DB and training ML models"""
+        """Load leads from DB and train ML models; concurrent callers wait for the same load"""
         if not self._is_initialized:
+            if self._init_task is None:
+                self._init_task = asyncio.ensure_future(self._load_all())
+            await asyncio.shield(self._init_task)
+
+    async def _load_all(self):
+        try:
+            # Stream the collection in batches so the full list of raw dicts is never held at once
+            async for batch in companies.iter_batches(batch_size=LOAD_BATCH_SIZE):
+                await self._load_batch(batch)
+            if len(self.store):
+                await self._retrain()
+                print(f"Loaded {len(self.store)} leads from DB and prepared ML models")
+            else:
+                print("No leads found in database")
+        except Exception as e:
+            print(f"Error loading leads from DB: {e}")
+        self._is_initialized = True
+
+    async def _load_batch(self, batch: List[Dict[str, Any]]):
+        if batch:
+            features = await ml_executor.featurize(self.ml_service, batch)
+            self.store.upsert_many(batch, features=features)
+
+    async def _materialize(self, rows, include_text: bool = True,
+                           fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        return await self.store.materialize(companies if include_text else None, rows,
+                                            include_text=include_text, fields=fields)
+
+    async def _retrain(self):
+        """Load models trained on the current leads from the artifact store, or train and persist them"""
+        if self.role == "worker":
+            await self.reload_models()
+            return
+        async with self._train_lock:
+            if not len(self.store):
+                return
+            rows = self.store.live_rows()
+            ids = [self.store.ids[row] for row in rows]
+            generation = self.store.generation
+            X = self.store.feature_matrix(rows)
+            # Hashing the matrix and reading joblib files block, so both run in a thread
+            schema = self.ml_service.feature_schema()
+            key = await asyncio.to_thread(training_key, X, schema)
+            models = await asyncio.to_thread(self.artifacts.read, key, schema)
+            if models is not None:
+                self.artifacts.install(self.ml_service, key, models)
+                self._model_key = key
+            else:
+                # Clusters are only refit on schedule; between refits they are updated online
+                refit_clusters = (
+                    self._last_cluster_refit is None
+                    or time.monotonic() - self._last_cluster_refit >= ML_CLUSTER_REFIT_INTERVAL
+                )
+                await ml_executor.train(self.ml_service, X, refit_clusters=refit_clusters)
+                if refit_clusters:
+                    self._last_cluster_refit = time.monotonic()
+                try:
+                    await asyncio.to_thread(self.artifacts.save, self.ml_service, key)
+                    self._model_key = key
+                except Exception as e:
+                    self._model_key = None
+                    print(f"Error saving model artifact: {e}")
+            # Rows written while training was running keep the tiers they were given online
+            tiers = self.ml_service.cluster_tiers(X)
+            if self.store.generation != generation:
+                # A delete compacted the store meanwhile, so the rows are found again by id
+                rows = np.array([self._row_or_missing(lead_id) for lead_id in ids], dtype=np.int64)
+                found = rows >= 0
+                rows, tiers = rows[found], tiers[found]
+            self.store.set_potential(rows, tiers)
+            if self.role == "trainer":
+                await self._publish(ids, X)
+
+    def _row_or_missing(self, lead_id: str) -> int:
+        row = self.store.row_for(lead_id)
+        return -1 if row is None else row
+
+    def _remap_rows(self, keep: np.ndarray):
+        """Follow a store compaction: published score positions move with their rows"""
+        if self._snapshot is not None:
+            positions = np.full(len(keep), -1, dtype=np.int64)
+            known = keep < len(self._snapshot_pos)
+            positions[known] = self._snapshot_pos[keep[known]]
+            self._snapshot_pos = positions
+
+    async def _publish(self, ids: List[str], X: np.ndarray):
+        """Score every lead once and publish the result for the API workers"""
+        if self._model_key is None:
+            print("Model artifact was not saved; snapshot not published")
+            return
+        scores = await ml_executor.score(self.ml_service, X, self._model_key)
+        await asyncio.to_thread(self.snapshots.publish, self._model_key, ids, X, scores)
+
+    async def reload_models(self) -> bool:
+        """Switch to the trainer's newest snapshot and its models; False when already current"""
+        meta = self.snapshots.current()
+        if meta is None or (self._snapshot is not None and self._snapshot["version"] == meta["version"]):
+            return False
+        async with self._train_lock:
+            try:
+                models = await asyncio.to_thread(self.artifacts.read, meta["artifact_key"],
+                                                 self.ml_service.feature_schema())
+                if models is None:
+                    return False
+                arrays = await asyncio.to_thread(self.snapshots.open, meta)
+                self.artifacts.install(self.ml_service, meta["artifact_key"], models)
+            except Exception as e:
+                logger.warning(f"Could not load model snapshot {meta['version']}: {e}")
+                return False
+            self._model_key = meta["artifact_key"]
+
+            # Published scores are reused only for rows whose features still match
+            index = {lead_id: i for i, lead_id in enumerate(arrays["ids"].tolist())}
+            positions = np.full(self.store.row_count, -1, dtype=np.int64)
+            rows = self.store.live_rows()
+            if len(rows):
+                pos = np.array([index.get(self.store.ids[row], -1) for row in rows], dtype=np.int64)
+                found = pos >= 0
+                X = self.store.feature_matrix(rows)
+                same = np.all(arrays["features"][pos[found]] == X[found], axis=1)
+                positions[rows[found][same]] = pos[found][same]
+                self.store.set_potential(rows, self.ml_service.cluster_tiers(X))
+            self._snapshot = {"version": meta["version"], **arrays}
+            self._snapshot_pos = positions
+        logger.info(f"Loaded model snapshot {meta['version']} ({int((positions >= 0).sum())} published scores in use)")
+        return True
+
+    async def _watch_snapshots(self):
+        while True:
+            await asyncio.sleep(ML_SNAPSHOT_POLL_INTERVAL)
             try:
-                db = await get_mongo_db()
-                companies = await db.companies.find().to_list(length=1000)
-                self.leads = companies
-                if self.leads:
-                    self.ml_service.train_models(self.leads)
-                    print(f"Loaded {len(self.leads)} leads from DB and trained ML models")
-                else:
-                    print("No leads found in database")
+                await self.reload_models()
             except Exception as e:
-                print(f"Error loading leads from DB: {e}")
-            self._is_initialized = True
+                logger.warning(f"Model snapshot reload failed: {e}")
+
+    def start_model_watch(self):
+        """Hot-reload models the trainer publishes (worker role only)"""
+        if self.role == "worker" and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch_snapshots())
+
+    async def stop_model_watch(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _score(self, rows: np.ndarray) -> np.ndarray:
+        if self._snapshot is None:
+            return await ml_executor.score(self.ml_service, self.store.feature_matrix(rows), self._model_key)
+        rows = np.asarray(rows)
+        pos = np.full(len(rows), -1, dtype=np.int64)
+        known = rows < len(self._snapshot_pos)
+        pos[known] = self._snapshot_pos[rows[known]]
+        published = pos >= 0
+        scores = np.empty(len(rows), dtype=np.float64)
+        scores[published] = self._snapshot["scores"][pos[published]]
+        if not published.all():
+            stale = rows[~published]
+            scores[~published] = await ml_executor.score(self.ml_service, self.store.feature_matrix(stale), self._model_key)
+        return scores
+
+    def _assign_new_rows(self, rows: List[int]):
+        """Give freshly written leads a potential tier right away by updating the clusters online"""
+        if not rows:
+            return
+        if self._snapshot is not None:
+            stale = np.asarray(rows)
+            self._snapshot_pos[stale[stale < len(self._snapshot_pos)]] = -1
+        if self.ml_service.is_trained:
+            X_new = self.store.feature_matrix(np.asarray(rows))
+            # Workers keep the trainer's centroids as published so every worker tiers alike
+            if self.role == "worker":
+                tiers = self.ml_service.cluster_tiers(X_new)
+            else:
+                tiers = self.ml_service.update_clusters(X_new)
+            self.store.set_potential(rows, tiers)
+
+    async def _ranked(self, rows: np.ndarray, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Materialize rows ordered by ML score, highest first"""
+        if not len(rows) or not self.ml_service.is_trained:
+            return await self._materialize(rows, fields=fields)
+
+        scores = await self._score(rows)
+        order = np.argsort(-scores, kind='stable')
+        leads = await self._materialize(rows[order], fields=fields)
+        if fields is None or 'ml_score' in fields:
+            for lead, score in zip(leads, scores[order]):
+                lead['ml_score'] = float(score)
+        return leads
 
     async def get_analytics(self) -> Dict[str, Any]:
         """Get analytics data"""
         if not self._is_initialized:
             await self.initialize()
-        
-        if not self.leads:
+
+        if not len(self.store):
+            return {
+                "lead_distribution": {},
+                "lead_projection": [],
+                "top_leads": []
+            }
+
+        try:
+            scores = await self._score(self.store.live_rows()) if self.ml_service.is_trained else None
+            analytics = self.ml_service.get_store_analytics(self.store, scores=scores)
+        except MLBusyError:
+            raise
+        except Exception as e:
+            print(f"Error generating analytics: {e}")
             return {
                 "lead_distribution": {},
                 "lead_projection": [],
                 "top_leads": []
             }
 
-        # Convert MongoDB ObjectId to string in leads
-        processed_leads = []
-        for lead in self.leads:
-            lead_copy = lead.copy()
-            if '_id' in lead_copy:
-                lead_copy['_id'] = str(lead_copy['_id'])
-            processed_leads.append(lead_copy)
-
-        analytics_data = self.ml_service.get_analytics_data(processed_leads)
-        
-        # Convert ObjectId to string in top_leads if they exist
-        if 'top_leads' in analytics_data:
-            for lead in analytics_data['top_leads']:
-                if '_id' in lead:
-                    lead['_id'] = str(lead['_id'])
-        
-        return analytics_data
+        # Only the top leads are turned back into dicts; ids are already strings
+        top_leads = await self._materialize(analytics.pop("top_rows"))
+        for lead, score in zip(top_leads, analytics.pop("top_scores")):
+            lead["ml_score"] = float(score)
+        analytics["top_leads"] = top_leads
+        return analytics
+
+    async def build_similarity_index(self):
+        """Embed every lead into the nearest-neighbor index; concurrent callers wait for the same build"""
+        if self.similar_index is None:
+            if self._index_task is None:
+                self._index_task = asyncio.ensure_future(self._build_similarity_index())
+            await asyncio.shield(self._index_task)
+
+    async def _build_similarity_index(self):
+        await self.initialize()
+        self._index_pending = {}
+        try:
+            index = VectorIndex(self.embedder.dim(len(FEATURE_NAMES)))
+            # Descriptions are not resident in the store, so the text is streamed from MongoDB once
+            projection = {"description": 1, "industry": 1, "location": 1}
+            # Batches read before the embedder is fitted are held until SIMILAR_FIT_SAMPLE leads are in hand
+            held, sample = [], []
+            async for batch in companies.iter_batches(projection=projection, batch_size=LOAD_BATCH_SIZE):
+                rows, leads = [], []
+                for doc in batch:
+                    row = self.store.row_for(str(doc["_id"]))
+                    if row is not None:
+                        rows.append(row)
+                        leads.append(doc)
+                if not rows:
+                    continue
+                ids = [self.store.ids[row] for row in rows]
+                held.append((ids, leads, self.store.feature_matrix(np.asarray(rows))))
+                if not self.embedder.fitted:
+                    sample.extend(leads[:SIMILAR_FIT_SAMPLE - len(sample)])
+                    if len(sample) < SIMILAR_FIT_SAMPLE:
+                        continue
+                    await asyncio.to_thread(self.embedder.fit, sample, self.store.feature_matrix())
+                for ids, leads, features in held:
+                    index.upsert(ids, await asyncio.to_thread(self.embedder.embed, leads, features))
+                held = []
+            if not self.embedder.fitted:
+                await asyncio.to_thread(self.embedder.fit, sample, self.store.feature_matrix())
+            for ids, leads, features in held:
+                index.upsert(ids, await asyncio.to_thread(self.embedder.embed, leads, features))
+            if len(index) >= SIMILAR_IVF_MIN:
+                await asyncio.to_thread(index.train)
+        except Exception:
+            self._index_pending = None
+            self._index_task = None
+            raise
+        self.similar_index = index
+        pending, self._index_pending = self._index_pending, None
+        for lead_id, lead in pending.items():
+            row = self.store.row_for(lead_id)
+            if lead is None or row is None:
+                index.remove(lead_id)
+            else:
+                self._index_leads([row], [lead])
+        print(f"Built similarity index over {len(index)} leads")
+
+    def _index_leads(self, rows: List[int], leads: List[Dict[str, Any]]):
+        """Re-embed leads just written to the store (their text must be included)"""
+        if self._index_pending is not None:
+            for row, lead in zip(rows, leads):
+                self._index_pending[self.store.ids[row]] = lead
+        elif self.similar_index is not None and rows:
+            vectors = self.embedder.embed(leads, self.store.feature_matrix(np.asarray(rows)))
+            self.similar_index.upsert([self.store.ids[row] for row in rows], vectors)
+
+    def _unindex_lead(self, lead_id: str):
+        if self._index_pending is not None:
+            self._index_pending[lead_id] = None
+        elif self.similar_index is not None:
+            self.similar_index.remove(lead_id)
+
+    async def similar_leads(self, lead_id: str, limit: int = 10,
+                            fields: Optional[Sequence[str]] = None) -> Optional[List[Dict[str, Any]]]:
+        """Leads most similar to `lead_id`, best first with their `similarity`; None for an unknown lead"""
+        await self.build_similarity_index()
+        vector = self.similar_index.vector(lead_id)
+        if vector is None:
+            return None
+        matches = [(self.store.row_for(match), score)
+                   for match, score in self.similar_index.search(vector, limit, exclude=lead_id)]
+        matches = [(row, score) for row, score in matches if row is not None]
+        leads = await self._materialize([row for row, _ in matches], fields=fields)
+        if fields is None or "similarity" in fields:
+            for lead, (_, score) in zip(leads, matches):
+                lead["similarity"] = round(score, 4)
+        return leads
+
+    async def build_name_index(self):
+        """Index every lead name for suggest_companies; concurrent callers wait for the same build"""
+        if self.name_index is None:
+            if self._name_index_task is None:
+                self._name_index_task = asyncio.ensure_future(self._build_name_index())
+            await asyncio.shield(self._name_index_task)
+
+    async def _build_name_index(self):
+        await self.initialize()
+        self._names_pending = set()
+        rows = self.store.live_rows()
+        ids = [self.store.ids[row] for row in rows]
+        names = [self.store.names[row] for row in rows]
+        try:
+            index = await asyncio.to_thread(NameIndex.build, ids, names, self.store.probability_score[rows])
+        except Exception:
+            self._names_pending = None
+            self._name_index_task = None
+            raise
+        self.name_index = index
+        pending, self._names_pending = self._names_pending, None
+        self._refresh_names(pending)
+        print(f"Built name index over {len(index)} leads")
+
+    def _refresh_names(self, lead_ids):
+        """Re-read the name and score of leads just written to (or removed from) the store"""
+        if self._names_pending is not None:
+            self._names_pending.update(lead_ids)
+            return
+        if self.name_index is None:
+            return
+        ids, names, scores = [], [], []
+        for lead_id in lead_ids:
+            row = self.store.row_for(lead_id)
+            if row is None:
+                self.name_index.remove(lead_id)
+            else:
+                ids.append(lead_id)
+                names.append(self.store.names[row])
+                scores.append(self.store.probability_score[row])
+        self.name_index.upsert(ids, names, scores)
+
+    async def suggest_companies(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Companies whose name starts with `prefix` (ignoring case, accents and
+        punctuation), best probabilityScore first. Until the name index is
+        built the matches come from the nameKey index in MongoDB instead.
+        """
+        if self.name_index is not None:
+            return self.name_index.suggest(prefix, limit)
+        key = prefix_key(prefix)
+        if not key:
+            return []
+        # Keys hold only letters, digits and spaces, so the anchored regex is a plain index range
+        docs = await companies.find_many({"nameKey": {"$regex": "^" + key}},
+                                         {"name": 1, "nameKey": 1, "probabilityScore": 1},
+                                         sort=[("nameKey", 1)], limit=SUGGEST_FALLBACK_SCAN)
+        return rank_suggestions(docs, limit)
+
+    def apply_changes(self, upserts: List[Dict[str, Any]], deleted_ids: List[str]):
+        """Apply documents changed in MongoDB to the store without reloading everything"""
+        rows = self.store.upsert_many(upserts)
+        # Read before the removals below, which may compact the store and renumber these rows
+        upserted_ids = [self.store.ids[row] for row in rows if self.store.ids[row] is not None]
+        self._assign_new_rows(rows)
+        self._index_leads(rows, upserts)
+        for lead_id in deleted_ids:
+            self.store.remove(lead_id)
+            self._unindex_lead(lead_id)
+        self._refresh_names(upserted_ids + list(deleted_ids))
 
     async def add_lead(self, lead: Dict[str, Any]) -> Dict[str, Any]:
         """Add a new lead"""
         if not self._is_initialized:
             await self.initialize()
-        
-        self.leads.append(lead)
-        self.ml_service.train_models(self.leads)
+
+        rows = self.store.upsert_many([lead])
+        self._assign_new_rows(rows)
+        self._index_leads(rows, [lead])
+        self._refresh_names([self.store.ids[row] for row in rows if self.store.ids[row] is not None])
+        await self._retrain()
         return lead
 
     async def delete_lead(self, lead_id: str) -> bool:
         """Delete a lead by ID"""
         if not self._is_initialized:
             await self.initialize()
-        
-        initial_length = len(self.leads)
-        self.leads = [lead for lead in self.leads if lead.get("id") != lead_id]
-        
-        if len(self.leads) < initial_length:
-            self.ml_service.train_models(self.leads)
+
+        if self.store.remove(lead_id):
+            self._unindex_lead(lead_id)
+            self._refresh_names([lead_id])
+            await self._retrain()
             return True
         return False
 
-    async def search_leads(self, query: str) -> List[Dict[str, Any]]:
-        """Search leads using ML service"""
+    async def search_leads(self, query: str, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Search leads and rank results using ML"""
         if not self._is_initialized:
             await self.initialize()
-        
-        if not self.leads:
-            return []
-            
-        return self.ml_service.search_leads(self.leads, query)
 
-    def get_leads(self, sort_by: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get all leads, optionally sorted by ML score"""
+        if not query:
+            return await self._materialize(self.store.live_rows(), fields=fields)
+
+        # Resident columns are matched in memory; lazily stored text is matched in MongoDB
+        rows = np.union1d(self.store.search(query), await self.store.search_text(companies, query))
+
+        # Rank results using ML
+        return await self._ranked(rows, fields)
+
+    async def get_leads(self, sort_by: Optional[str] = None, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Get all leads, optionally sorted by ML score and limited to `fields`"""
+        if not self._is_initialized:
+            await self.initialize()
+        rows = self.store.live_rows()
         if sort_by == 'ml_score':
-            return self.ml_service.rank_leads(self.leads)
-        return self.leads
+            return await self._ranked(rows, fields)
+        return await self._materialize(rows, fields=fields)
 
-    def get_lead_by_id(self, lead_id: str) -> Optional[Dict[str, Any]]:
+    async def get_lead_by_id(self, lead_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific lead by ID"""
-        for lead in self.leads:
-            if lead.get('id') == lead_id:
-                return lead
-        return None
+        if not self._is_initialized:
+            await self.initialize()
+        row = self.store.row_for(lead_id)
+        if row is None:
+            return None
+        return (await self._materialize([row]))[0]
 
-    def update_lead(self, lead_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def update_lead(self, lead_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update a lead and retrain ML models"""
-        for lead in self.leads:
-            if lead.get('id') == lead_id:
-                lead.update(updates)
-                self.ml_service.train_models(self.leads)  # Retrain models after update
-                return lead
-        return None
-
-    def search_leads(self, query: str) -> List[Dict[str, Any]]:
-        """Search leads and rank results using ML"""
-        if not query:
-            return self.leads
-
-        # Basic search
-        results = []
-        query = query.lower()
-        for lead in self.leads:
-            if any(query in str(value).lower() for value in lead.values()):
-                results.append(lead)
+        current = await self.get_lead_by_id(lead_id)
+        if current is None:
+            return None
 
-        # Rank results using ML
-        return self.ml_service.rank_leads(results) 
\ No newline at end of file
+        # Normalized once here, so MongoDB and the cached lead get the same canonical values
+        changes = normalize_company({key: value for key, value in updates.items() if key not in ("_id", "id", "ml_score")})
+        # Written through so other workers and the trainer pick it up via lead sync
+        await companies.update_fields(lead_id, changes)
+        current.update(changes)
+        current["_id"] = current["id"] = lead_id
+        # The merged lead already carries its text; no need to re-read it from MongoDB
+        rows = self.store.upsert_many([current], keep_text=True)
+        self._assign_new_rows(rows)
+        self._index_leads(rows, [current])
+        self._refresh_names([lead_id])
+        await self._retrain()  # Retrain models after update
+        return current
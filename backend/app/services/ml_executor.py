@@ -0,0 +1,200 @@
+import os
+import asyncio
+import logging
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, resource_tracker
+from typing import Any, Dict, List, Optional, Tuple
+from app.metrics import ML_JOB_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for CPU-bound ML work; 0 runs everything inline on the event loop thread
+ML_POOL_SIZE = int(os.getenv("ML_POOL_SIZE", "2"))
+# Jobs allowed to be queued or running at once before callers have to wait
+ML_POOL_MAX_PENDING = int(os.getenv("ML_POOL_MAX_PENDING", "8"))
+# Seconds a caller waits for a pool slot before the request is rejected with 503
+ML_POOL_QUEUE_TIMEOUT = float(os.getenv("ML_POOL_QUEUE_TIMEOUT", "30"))
+# Scoring batches up to this size stay inline; the round trip costs more than the work
+ML_POOL_INLINE_MAX = int(os.getenv("ML_POOL_INLINE_MAX", "2000"))
+
+# Ref to a matrix in shared memory: (segment name, shape, dtype)
+SharedRef = Tuple[str, Tuple[int, ...], str]
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to a segment owned by the parent without registering it with the resource tracker"""
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class _SharedMatrix:
+    """Parent-side owner of a copy of a matrix in a shared memory segment"""
+
+    def __init__(self, X: np.ndarray):
+        X = np.ascontiguousarray(X)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+        np.ndarray(X.shape, dtype=X.dtype, buffer=self._shm.buf)[...] = X
+        self.ref: SharedRef = (self._shm.name, X.shape, X.dtype.str)
+
+    def release(self):
+        self._shm.close()
+        self._shm.unlink()
+
+
+class MLBusyError(Exception):
+    """No pool slot became free within ML_POOL_QUEUE_TIMEOUT; the API answers 503"""
+
+
+# ---------------------------------------------------------------- worker side
+
+# Models loaded inside a worker, keyed by artifact key
+_worker_models: Dict[str, Any] = {}
+
+
+def _with_matrix(ref: SharedRef, fn):
+    shm = _attach(ref[0])
+    try:
+        X = np.ndarray(ref[1], dtype=np.dtype(ref[2]), buffer=shm.buf)
+        result = fn(X)
+        del X
+        return result
+    finally:
+        shm.close()
+
+
+def _train_job(ref: SharedRef, refit_clusters: bool, cluster_state: Optional[tuple]):
+    from .ml_service import MLService
+
+    def train(X):
+        ml_service = MLService()
+        if cluster_state is not None:
+            ml_service.clustering_model, ml_service.cluster_scaler = cluster_state
+        ml_service.train_from_matrix(X, refit_clusters=refit_clusters)
+        return ml_service.scaler, ml_service.ranking_model, ml_service.clustering_model, ml_service.cluster_scaler
+
+    return _with_matrix(ref, train)
+
+
+def _score_job(ref: SharedRef, artifact_key: str):
+    from .ml_service import MLService
+    from .model_store import ModelArtifactStore
+
+    ml_service = _worker_models.get(artifact_key)
+    if ml_service is None:
+        ml_service = MLService()
+        if not ModelArtifactStore().load(ml_service, artifact_key):
+            raise RuntimeError(f"Model artifact {artifact_key} not found")
+        _worker_models.clear()
+        _worker_models[artifact_key] = ml_service
+    return _with_matrix(ref, ml_service.score_matrix)
+
+
+def _featurize_job(leads: List[Dict[str, Any]]) -> np.ndarray:
+    from .ml_service import MLService
+    return MLService()._prepare_features(leads)
+
+
+# ---------------------------------------------------------------- parent side
+
+class MLExecutor:
+    """
+    Runs featurization, training and bulk scoring in a process pool so the
+    event loop stays responsive. Matrices go to workers through shared memory;
+    workers load trained models from the artifact store by key.
+
+    At most ML_POOL_MAX_PENDING jobs are admitted at once; callers beyond
+    that wait up to ML_POOL_QUEUE_TIMEOUT seconds and then get a 503.
+    """
+
+    def __init__(self, max_workers: int = ML_POOL_SIZE, max_pending: int = ML_POOL_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_workers > 0
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that runs an event loop and driver threads is unsafe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            self._slots = asyncio.Semaphore(self.max_pending)
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _submit(self, fn, *args):
+        pool = self._ensure_pool()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=ML_POOL_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise MLBusyError("ML workers are busy, try again later")
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        finally:
+            self._slots.release()
+
+    async def _submit_matrix(self, X: np.ndarray, fn, *args):
+        shared = _SharedMatrix(X)
+        try:
+            return await self._submit(fn, shared.ref, *args)
+        finally:
+            shared.release()
+
+    async def train(self, ml_service, X: np.ndarray, refit_clusters: bool = True):
+        """Train `ml_service`'s models on X in a worker and install the results"""
+        if not self.enabled:
+            with ML_JOB_DURATION.time("train", "inline"):
+                ml_service.train_from_matrix(X, refit_clusters=refit_clusters)
+            return
+
+        cluster_state = None
+        if not refit_clusters and ml_service.cluster_scaler is not None:
+            cluster_state = (ml_service.clustering_model, ml_service.cluster_scaler)
+        with ML_JOB_DURATION.time("train", "pool"):
+            scaler, ranking_model, clustering_model, cluster_scaler = await self._submit_matrix(
+                X, _train_job, refit_clusters, cluster_state
+            )
+        if cluster_state is not None:
+            # Clusters were not refit: keep the live ones, which update_clusters may have
+            # moved while the job ran, instead of the copy the job started from
+            clustering_model, cluster_scaler = ml_service.clustering_model, ml_service.cluster_scaler
+        ml_service.install_models(scaler, ranking_model, clustering_model, cluster_scaler)
+
+    async def score(self, ml_service, X: np.ndarray, artifact_key: Optional[str]) -> np.ndarray:
+        """Ranking scores for X; large batches run in a worker against the persisted artifact"""
+        if not self.enabled or artifact_key is None or len(X) <= ML_POOL_INLINE_MAX:
+            with ML_JOB_DURATION.time("score", "inline"):
+                return ml_service.score_matrix(X)
+        try:
+            with ML_JOB_DURATION.time("score", "pool"):
+                return await self._submit_matrix(X, _score_job, artifact_key)
+        except MLBusyError:
+            raise
+        except Exception as e:
+            logger.error(f"Pooled scoring failed, scoring inline: {e}")
+            with ML_JOB_DURATION.time("score", "inline"):
+                return ml_service.score_matrix(X)
+
+    async def featurize(self, ml_service, leads: List[Dict[str, Any]]) -> np.ndarray:
+        if not self.enabled:
+            with ML_JOB_DURATION.time("featurize", "inline"):
+                return ml_service._prepare_features(leads)
+        with ML_JOB_DURATION.time("featurize", "pool"):
+            return await self._submit(_featurize_job, leads)
+
+
+ml_executor = MLExecutor()
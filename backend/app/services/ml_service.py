@@ -1,26 +1,121 @@
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from sklearn.ensemble import RandomForestRegressor
 from typing import List, Dict, Any, Tuple
-import pandas as pd
+import os
+import copy
 from datetime import datetime
+from .forest_inference import FlatForest
+from .lead_store import POTENTIAL_TIERS
+from app.normalization import parse_count, parse_revenue
+
+# Ranking inference backend: "flat" evaluates the forest as vectorized NumPy node arrays,
+# "sklearn" calls RandomForestRegressor.predict
+ML_INFERENCE_BACKEND = os.getenv("ML_INFERENCE_BACKEND", "flat")
+# Batches larger than this go to sklearn even with the flat backend; its compiled tree
+# walk wins once per-call overhead no longer dominates
+ML_FLAT_MAX_BATCH = int(os.getenv("ML_FLAT_MAX_BATCH", "256"))
+# Fewer trees give a lighter ranking model at some cost in accuracy
+ML_RANKING_ESTIMATORS = int(os.getenv("ML_RANKING_ESTIMATORS", "100"))
+# "online" clusters with MiniBatchKMeans and folds new leads in with partial_fit;
+# "batch" uses KMeans and only changes centroids on full refits
+ML_CLUSTERING_MODE = os.getenv("ML_CLUSTERING_MODE", "online")
+
+# Estimator settings; part of feature_schema, so changing them invalidates persisted artifacts
+_RANKING_PARAMS = {"n_estimators": ML_RANKING_ESTIMATORS, "random_state": 42}
+_CLUSTERING_PARAMS = {"n_clusters": 3, "random_state": 42}
+
+# Bump whenever _prepare_features changes so persisted model artifacts are invalidated
+FEATURE_SCHEMA_VERSION = 2
+FEATURE_NAMES = [
+    'employee_count', 'revenue', 'website_score',
+    'description_score', 'industry_score', 'location_score'
+]
 
 class MLService:
+    """
+    Lead ranking and potential clustering.
+
+    scikit-learn takes about two seconds to import, so the estimators are
+    only built (and sklearn imported) when a model is first fitted or
+    described; serving from installed models needs NumPy only.
+    """
+
     def __init__(self):
-        self.scaler = StandardScaler()
-        self.ranking_model = RandomForestRegressor(n_estimators=100, random_state=42)
-        self.clustering_model = KMeans(n_clusters=3, random_state=42)
+        self._scaler = None
+        self._ranking_model = None
+        self._clustering_model = None
+        # Scaler frozen at the last full clustering fit, so partial fits stay in the same space
+        self.cluster_scaler = None
         self.is_trained = False
+        # Bumped whenever any model changes; keys the cached cluster -> potential mapping
+        self.model_version = 0
+        self._cluster_tiers = None
+        self._cluster_tiers_version = -1
+        self.inference_backend = ML_INFERENCE_BACKEND
+        self._flat_forest = None
+        self._flat_forest_source = None
+
+    @staticmethod
+    def preload():
+        """Import the scikit-learn estimators ahead of first use; blocking, so run it in a worker thread"""
+        import sklearn.preprocessing, sklearn.ensemble, sklearn.cluster  # noqa: F401
+
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            from sklearn.preprocessing import StandardScaler
+            self._scaler = StandardScaler()
+        return self._scaler
+
+    @scaler.setter
+    def scaler(self, scaler):
+        self._scaler = scaler
+
+    @property
+    def ranking_model(self):
+        if self._ranking_model is None:
+            from sklearn.ensemble import RandomForestRegressor
+            self._ranking_model = RandomForestRegressor(**_RANKING_PARAMS)
+        return self._ranking_model
+
+    @ranking_model.setter
+    def ranking_model(self, model):
+        self._ranking_model = model
+
+    @property
+    def clustering_model(self):
+        if self._clustering_model is None:
+            from sklearn.cluster import KMeans, MiniBatchKMeans
+            if ML_CLUSTERING_MODE == 'online':
+                self._clustering_model = MiniBatchKMeans(**_CLUSTERING_PARAMS)
+            else:
+                self._clustering_model = KMeans(**_CLUSTERING_PARAMS)
+        return self._clustering_model
+
+    @clustering_model.setter
+    def clustering_model(self, model):
+        self._clustering_model = model
+
+    def feature_schema(self) -> Dict[str, Any]:
+        """Describe the feature layout and model configuration used to key model artifacts"""
+        # Built from the settings rather than the estimators, so it never imports scikit-learn
+        return {
+            'version': FEATURE_SCHEMA_VERSION,
+            'features': FEATURE_NAMES,
+            'ranking_model': {'type': 'RandomForestRegressor', **_RANKING_PARAMS},
+            'clustering_model': {
+                'type': 'MiniBatchKMeans' if ML_CLUSTERING_MODE == 'online' else 'KMeans',
+                **_CLUSTERING_PARAMS,
+            },
+        }
 
     def _prepare_features(self, leads: List[Dict[str, Any]]) -> np.ndarray:
         """Convert lead data into numerical features for ML models"""
         features = []
         for lead in leads:
             try:
-                # Extract numerical features with safe defaults
-                employee_count = float(lead.get('employeeCount', 0) or 0)
-                revenue = self._parse_revenue(lead.get('revenue', '0') or '0')
+                # Stored leads are already numeric; parsing only covers documents not yet normalized
+                employee_count = float(parse_count(lead.get('employeeCount')) or 0)
+                revenue = float(parse_revenue(lead.get('revenue')) or 0)
                 website_score = self._score_website(lead.get('website', '') or '')
                 description_score = self._score_description(lead.get('description', '') or '')
                 industry_score = self._score_industry(lead.get('industry', '') or '')
@@ -41,27 +136,6 @@ class MLService:
         
         return np.array(features)
 
-    def _parse_revenue(self, revenue_str: str) -> float:
-        """Convert revenue string to numerical value"""
-        if not revenue_str or revenue_str == 'N/A':
-            return 0.0
-        
-        try:
-            # Remove currency symbols and commas
-            revenue_str = revenue_str.replace('$', '').replace(',', '')
-            
-            # Handle different revenue formats (e.g., "1M", "1B", "1K")
-            if 'M' in revenue_str:
-                return float(revenue_str.replace('M', '')) * 1_000_000
-            elif 'B' in revenue_str:
-                return float(revenue_str.replace('B', '')) * 1_000_000_000
-            elif 'K' in revenue_str:
-                return float(revenue_str.replace('K', '')) * 1_000
-            else:
-                return float(revenue_str)
-        except:
-            return 0.0
-
     def _score_website(self, website: str) -> float:
         """Score website quality"""
         if not website or website == 'N/A':
@@ -125,7 +199,17 @@ class MLService:
             return
         
         # Prepare features
-        X = self._prepare_features(leads)
+        self.train_from_matrix(self._prepare_features(leads))
+
+    def train_from_matrix(self, X: np.ndarray, refit_clusters: bool = True):
+        """
+        Train ranking and clustering models on an already featurized matrix.
+
+        With refit_clusters=False only the ranking model is retrained and the
+        existing centroids are kept (they are updated online instead).
+        """
+        if len(X) == 0:
+            return
         
         # Scale features
         X_scaled = self.scaler.fit_transform(X)
@@ -133,23 +217,86 @@ class MLService:
         # Train ranking model (using employee count as target for now)
         y = X[:, 0]  # Use employee count as target
         self.ranking_model.fit(X_scaled, y)
+        self._flat_forest_source = None
         
         # Train clustering model
-        self.clustering_model.fit(X_scaled)
+        if refit_clusters or self.cluster_scaler is None:
+            self.cluster_scaler = copy.deepcopy(self.scaler)
+            self.clustering_model.fit(X_scaled)
         
+        self.model_version += 1
         self.is_trained = True
 
+    def install_models(self, scaler, ranking_model, clustering_model, cluster_scaler):
+        """Swap in models trained elsewhere (a worker process or an artifact)"""
+        self.scaler = scaler
+        self.ranking_model = ranking_model
+        self.clustering_model = clustering_model
+        self.cluster_scaler = cluster_scaler
+        self._flat_forest_source = None
+        self.model_version += 1
+        self.is_trained = True
+
+    def _cluster_space(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.cluster_scaler.mean_) / self.cluster_scaler.scale_
+
+    def _cluster_tier_map(self) -> np.ndarray:
+        """Potential tier code per cluster, recomputed only when the model version changes"""
+        if self._cluster_tiers_version != self.model_version:
+            center_scores = np.mean(self.clustering_model.cluster_centers_, axis=1)
+            high = np.percentile(center_scores, 66)
+            medium = np.percentile(center_scores, 33)
+            self._cluster_tiers = np.array([
+                2 if score > high else 1 if score > medium else 0
+                for score in center_scores
+            ], dtype=np.int8)
+            self._cluster_tiers_version = self.model_version
+        return self._cluster_tiers
+
+    def cluster_tiers(self, X: np.ndarray) -> np.ndarray:
+        """Potential tier codes (indexes into POTENTIAL_TIERS) for a featurized matrix"""
+        if len(X) == 0 or not self.is_trained:
+            return np.full(len(X), -1, dtype=np.int8)
+        # Nearest centroid directly; k is tiny so this beats KMeans.predict's validation
+        X_cluster = self._cluster_space(X)
+        centers = self.clustering_model.cluster_centers_
+        distances = ((X_cluster[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        return self._cluster_tier_map()[np.argmin(distances, axis=1)]
+
+    def update_clusters(self, X_new: np.ndarray) -> np.ndarray:
+        """Fold new leads into the centroids (online mode) and return their tier codes"""
+        if len(X_new) == 0 or not self.is_trained:
+            return np.full(len(X_new), -1, dtype=np.int8)
+        # Only MiniBatchKMeans (online mode) can fold points in
+        if hasattr(self.clustering_model, "partial_fit"):
+            self.clustering_model.partial_fit(self._cluster_space(X_new))
+            self.model_version += 1
+        return self.cluster_tiers(X_new)
+
+    def score_matrix(self, X: np.ndarray) -> np.ndarray:
+        """Predict ranking scores for an already featurized matrix"""
+        if len(X) == 0:
+            return np.empty(0)
+        if self.inference_backend == 'flat' and len(X) <= ML_FLAT_MAX_BATCH:
+            # Same arithmetic as StandardScaler.transform without its per-call validation
+            X_scaled = (np.asarray(X, dtype=np.float64) - self.scaler.mean_) / self.scaler.scale_
+            return self._compiled_forest().predict(X_scaled)
+        return self.ranking_model.predict(self.scaler.transform(X))
+
+    def _compiled_forest(self) -> FlatForest:
+        """Flattened copy of the ranking model, rebuilt whenever the model object changes"""
+        if self._flat_forest_source is not self.ranking_model:
+            self._flat_forest = FlatForest.from_sklearn(self.ranking_model)
+            self._flat_forest_source = self.ranking_model
+        return self._flat_forest
+
     def rank_leads(self, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Rank leads based on ML model predictions"""
         if not leads or not self.is_trained:
             return leads
         
-        # Prepare features
-        X = self._prepare_features(leads)
-        X_scaled = self.scaler.transform(X)
-        
-        # Get predictions
-        scores = self.ranking_model.predict(X_scaled)
+        # Prepare features and get predictions
+        scores = self.score_matrix(self._prepare_features(leads))
         
         # Add scores to leads
         for lead, score in zip(leads, scores):
@@ -163,26 +310,12 @@ class MLService:
         if not leads or not self.is_trained:
             return leads, {'high': 0, 'medium': 0, 'low': 0}
         
-        # Prepare features
-        X = self._prepare_features(leads)
-        X_scaled = self.scaler.transform(X)
-        
-        # Get cluster assignments
-        clusters = self.clustering_model.predict(X_scaled)
-        
-        # Map clusters to potential levels
-        cluster_centers = self.clustering_model.cluster_centers_
-        center_scores = np.mean(cluster_centers, axis=1)
-        cluster_map = {
-            i: 'high' if score > np.percentile(center_scores, 66)
-            else 'medium' if score > np.percentile(center_scores, 33)
-            else 'low'
-            for i, score in enumerate(center_scores)
-        }
+        # Assign clusters and map them to potential levels
+        tiers = self.cluster_tiers(self._prepare_features(leads))
         
         # Add cluster information to leads
-        for lead, cluster in zip(leads, clusters):
-            lead['potential'] = cluster_map[cluster]
+        for lead, tier in zip(leads, tiers):
+            lead['potential'] = POTENTIAL_TIERS[tier]
         
         # Calculate cluster statistics
         cluster_stats = {
@@ -193,6 +326,18 @@ class MLService:
         
         return leads, cluster_stats
 
+    def _lead_projection(self, lead_count: int) -> List[Dict[str, Any]]:
+        """Simple lead projection for the last 6 months"""
+        projection = []
+        for i in range(6):
+            month = (datetime.now().month - i - 1) % 12 + 1
+            year = datetime.now().year - ((datetime.now().month - i - 1) // 12)
+            projection.append({
+                'month': f"{year}-{month:02d}",
+                'leads': lead_count // 6  # Simple projection
+            })
+        return projection
+
     def get_analytics_data(self, leads: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generate analytics data for the frontend (dashboard)"""
         try:
@@ -214,14 +359,7 @@ class MLService:
                 industry_dist[industry] = industry_dist.get(industry, 0) + 1
 
             # 2. Lead Projection (last 6 months)
-            projection = []
-            for i in range(6):
-                month = (datetime.now().month - i - 1) % 12 + 1
-                year = datetime.now().year - ((datetime.now().month - i - 1) // 12)
-                projection.append({
-                    'month': f"{year}-{month:02d}",
-                    'leads': len(leads) // 6  # Simple projection
-                })
+            projection = self._lead_projection(len(leads))
 
             # 3. Top Leads (based on ML score)
             try:
@@ -243,4 +381,43 @@ class MLService:
                 'lead_distribution': {},
                 'lead_projection': [],
                 'top_leads': []
-            } 
\ No newline at end of file
+            } 
+
+    def get_store_analytics(self, store, top_n: int = 5, scores: np.ndarray = None) -> Dict[str, Any]:
+        """
+        Generate analytics straight from a LeadStore's columns and cached features.
+
+        Returns row numbers for the top leads instead of dicts; the caller
+        materializes only those rows. `scores` may hold precomputed ranking
+        scores for the live rows (e.g. from the ML process pool).
+        """
+        rows = store.live_rows()
+        if not len(rows):
+            return {
+                'lead_distribution': {},
+                'lead_projection': [],
+                'top_rows': [],
+                'top_scores': []
+            }
+
+        X = store.feature_matrix(rows)
+        if not self.is_trained:
+            self.train_from_matrix(X)
+
+        try:
+            if scores is None:
+                scores = self.score_matrix(X)
+        except Exception as e:
+            print(f"Error ranking leads: {e}")
+            # Fallback to employee count
+            scores = X[:, 0]
+
+        # Stable sort keeps insertion order between equal scores, like sorted()
+        top = np.argsort(-scores, kind='stable')[:top_n]
+        return {
+            'lead_distribution': store.industry_counts(),
+            'lead_projection': self._lead_projection(len(rows)),
+            'potential_distribution': store.potential_counts(),
+            'top_rows': rows[top].tolist(),
+            'top_scores': scores[top].tolist()
+        }
@@ -0,0 +1,202 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import numpy as np
+import joblib
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Get the directory of the current file (model_store.py)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# Artifacts default to backend/model_artifacts/
+DEFAULT_ARTIFACT_DIR = os.path.join(current_dir, os.pardir, os.pardir, 'model_artifacts')
+
+ML_ARTIFACT_DIR = os.getenv("ML_ARTIFACT_DIR", DEFAULT_ARTIFACT_DIR)
+ML_ARTIFACT_KEEP = int(os.getenv("ML_ARTIFACT_KEEP", "3"))
+
+# Model attributes persisted for every artifact
+_MODEL_FILES = ("scaler", "ranking_model", "clustering_model", "cluster_scaler")
+
+
+def training_key(X: np.ndarray, schema: dict) -> str:
+    """Hash of the training matrix and feature schema that identifies an artifact"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(schema, sort_keys=True).encode())
+    digest.update(str(X.shape).encode())
+    digest.update(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    return digest.hexdigest()[:32]
+
+
+class ModelArtifactStore:
+    """
+    Versioned on-disk store for trained MLService models.
+
+    Each artifact is a directory named after its training key holding one
+    uncompressed joblib file per model, so NumPy arrays inside the models are
+    memory-mapped on load instead of copied. The maps are copy-on-write, so
+    online updates such as MiniBatchKMeans.partial_fit still work.
+    """
+
+    def __init__(self, root: str = ML_ARTIFACT_DIR, keep: int = ML_ARTIFACT_KEEP):
+        self.root = os.path.abspath(root)
+        self.keep = keep
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(os.path.join(self.path_for(key), "meta.json"))
+
+    def save(self, ml_service, key: str):
+        """Write the trained models of `ml_service` under `key` (atomically)"""
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{key}-", dir=self.root)
+        try:
+            for name in _MODEL_FILES:
+                joblib.dump(getattr(ml_service, name), os.path.join(staging, f"{name}.joblib"))
+            meta = {
+                "key": key,
+                "schema": ml_service.feature_schema(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+            with open(os.path.join(staging, "meta.json"), "w") as f:
+                json.dump(meta, f)
+
+            target = self.path_for(key)
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+            os.rename(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self._prune()
+        logger.info(f"Saved model artifact {key}")
+
+    def load(self, ml_service, key: str) -> bool:
+        """Load the artifact for `key` into `ml_service`; returns False if there is none"""
+        models = self.read(key, ml_service.feature_schema())
+        if models is None:
+            return False
+        self.install(ml_service, key, models)
+        return True
+
+    def read(self, key: str, schema: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        The models stored under `key` by MLService attribute, or None when there
+        is no artifact for this schema. Only reads files, so it can run in a thread.
+        """
+        if not self.exists(key):
+            return None
+        path = self.path_for(key)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            if meta.get("schema") != schema:
+                return None
+            return {
+                name: joblib.load(os.path.join(path, f"{name}.joblib"), mmap_mode="c")
+                for name in _MODEL_FILES
+            }
+        except Exception as e:
+            logger.error(f"Failed to load model artifact {key}: {e}")
+            return None
+
+    def install(self, ml_service, key: str, models: Dict[str, Any]):
+        """Put models returned by read() into `ml_service`"""
+        for name, model in models.items():
+            setattr(ml_service, name, model)
+        ml_service.is_trained = True
+        ml_service.model_version += 1
+        # Touch the artifact so pruning keeps the ones in use
+        try:
+            os.utime(os.path.join(self.path_for(key), "meta.json"))
+        except OSError:
+            pass
+        logger.info(f"Loaded model artifact {key}")
+
+    def latest_key(self) -> Optional[str]:
+        artifacts = self._artifacts()
+        return artifacts[0] if artifacts else None
+
+    def _artifacts(self):
+        if not os.path.isdir(self.root):
+            return []
+        keys = [name for name in os.listdir(self.root) if not name.startswith(".") and self.exists(name)]
+        return sorted(keys, key=lambda k: os.path.getmtime(os.path.join(self.path_for(k), "meta.json")), reverse=True)
+
+    def _prune(self):
+        for key in self._artifacts()[self.keep:]:
+            shutil.rmtree(self.path_for(key), ignore_errors=True)
+
+
+class SnapshotStore:
+    """
+    Read-only scoring state published by the trainer process (ML_ROLE=trainer).
+
+    A snapshot is a numbered directory holding the lead ids, feature matrix
+    and ranking scores the trainer computed with one model artifact, as .npy
+    files. Workers open them with mmap_mode="r", so every worker on a host
+    shares one copy through the page cache. `CURRENT` names the newest
+    snapshot and is replaced atomically; a worker that still maps an older,
+    pruned snapshot keeps reading it until it switches.
+    """
+
+    _ARRAYS = ("ids", "features", "scores")
+
+    def __init__(self, root: str = os.path.join(ML_ARTIFACT_DIR, "snapshots"), keep: int = ML_ARTIFACT_KEEP):
+        self.root = os.path.abspath(root)
+        self.keep = keep
+
+    def current(self) -> Optional[dict]:
+        """Metadata of the newest published snapshot, or None"""
+        try:
+            with open(os.path.join(self.root, "CURRENT")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def publish(self, artifact_key: str, ids, features: np.ndarray, scores: np.ndarray) -> dict:
+        """Write a snapshot and make it current; returns its metadata"""
+        current = self.current()
+        version = (current["version"] if current else 0) + 1
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{version}-", dir=self.root)
+        meta = {
+            "version": version,
+            "artifact_key": artifact_key,
+            "count": len(ids),
+            "path": f"{version:08d}",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        try:
+            # Fixed-width unicode rather than object arrays, so ids can be memory-mapped too
+            np.save(os.path.join(staging, "ids.npy"), np.asarray(ids, dtype=str))
+            np.save(os.path.join(staging, "features.npy"), np.ascontiguousarray(features, dtype=np.float64))
+            np.save(os.path.join(staging, "scores.npy"), np.ascontiguousarray(scores, dtype=np.float64))
+            os.rename(staging, os.path.join(self.root, meta["path"]))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        pointer = os.path.join(self.root, ".CURRENT.tmp")
+        with open(pointer, "w") as f:
+            json.dump(meta, f)
+        os.replace(pointer, os.path.join(self.root, "CURRENT"))
+        self._prune(version)
+        logger.info(f"Published model snapshot {version} ({len(ids)} leads, artifact {artifact_key})")
+        return meta
+
+    def open(self, meta: dict) -> dict:
+        """Memory-map the arrays of a published snapshot"""
+        path = os.path.join(self.root, meta["path"])
+        return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in self._ARRAYS}
+
+    def _prune(self, version: int):
+        for name in os.listdir(self.root):
+            if name.isdigit() and int(name) <= version - self.keep:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
@@ -0,0 +1,209 @@
+import os
+import bisect
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from app.normalization import name_key
+
+# Documents the MongoDB fallback reads in nameKey order before ranking them by score
+SUGGEST_FALLBACK_SCAN = int(os.getenv("SUGGEST_FALLBACK_SCAN", "1000"))
+
+# Entries per chunk of the sorted arrays; a chunk is split in two when it grows past twice this
+_CHUNK = 1024
+# Rank of companies without a probabilityScore, below every scored one
+_UNSCORED = -1.0
+# Sorts after every character that can follow a prefix, so bisecting for prefix + _HIGH ends its range
+_HIGH = "\U0010ffff"
+
+
+def prefix_key(prefix: str) -> Optional[str]:
+    """name_key of a typed prefix; a trailing space or punctuation mark still ends the word"""
+    key = name_key(prefix)
+    if key and prefix[-1:] and not prefix[-1].isalnum():
+        key += " "
+    return key
+
+
+def _rank(score: Any) -> float:
+    try:
+        score = float(score)
+    except (TypeError, ValueError):
+        return _UNSCORED
+    return score if np.isfinite(score) else _UNSCORED
+
+
+def _chunk_max(scores: np.ndarray) -> float:
+    return float(scores.max()) if len(scores) else -np.inf
+
+
+class NameIndex:
+    """
+    Company names by name_key, for prefix lookups ranked by probabilityScore.
+
+    Entries are kept sorted by key in chunks of about _CHUNK: keys, ids and
+    names in lists and scores in a numpy array per chunk, plus the first key
+    and the best score of every chunk. A prefix is two bisections (chunk, then
+    position). The best `limit` of a range lie in its partial end chunks and
+    the `limit` whole chunks with the best maxima, so even a one-letter prefix
+    ranks only a few thousand scores. Writes insert into or delete from one
+    chunk in place; nothing is ever re-sorted after the build.
+    """
+
+    def __init__(self):
+        self._keys: List[List[str]] = [[]]
+        self._ids: List[List[str]] = [[]]
+        self._names: List[List[Any]] = [[]]
+        self._scores: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._firsts: List[str] = [""]
+        self._maxima = np.full(1, -np.inf)
+        # Current key of every indexed lead, to find its entry when it changes
+        self._key_of: Dict[str, str] = {}
+
+    @classmethod
+    def build(cls, ids: Sequence[str], names: Sequence[Any], scores: np.ndarray) -> "NameIndex":
+        """Index from parallel columns, as in LeadStore (scores are probabilityScore, NaN where missing)"""
+        index = cls()
+        keys, kept = [], []
+        for i, (lead_id, name) in enumerate(zip(ids, names)):
+            key = name_key(name)
+            if key and lead_id is not None:
+                index._key_of[lead_id] = key
+                keys.append(key)
+                kept.append(i)
+        if not keys:
+            return index
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        scores = np.asarray(scores, dtype=np.float64)[np.asarray(kept, dtype=np.intp)[order]]
+        ranks = np.where(np.isfinite(scores), scores, _UNSCORED)
+        index._keys, index._ids, index._names, index._scores = [], [], [], []
+        for start in range(0, len(order), _CHUNK):
+            chunk = order[start:start + _CHUNK]
+            index._keys.append([keys[i] for i in chunk])
+            index._ids.append([ids[kept[i]] for i in chunk])
+            index._names.append([names[kept[i]] for i in chunk])
+            index._scores.append(ranks[start:start + _CHUNK].copy())
+        index._firsts = [chunk[0] for chunk in index._keys]
+        index._maxima = np.array([_chunk_max(chunk) for chunk in index._scores])
+        return index
+
+    def __len__(self) -> int:
+        return len(self._key_of)
+
+    def _chunk_for(self, key: str) -> int:
+        """First chunk that can hold `key` (equal keys may continue into the chunks after it)"""
+        return max(bisect.bisect_left(self._firsts, key) - 1, 0)
+
+    def _entries(self, key: str) -> Iterator[Tuple[int, int]]:
+        """(chunk, position) of every entry under `key`"""
+        c = self._chunk_for(key)
+        i = bisect.bisect_left(self._keys[c], key)
+        while c < len(self._keys):
+            keys = self._keys[c]
+            while i < len(keys) and keys[i] == key:
+                yield c, i
+                i += 1
+            if i < len(keys):
+                return
+            c, i = c + 1, 0
+
+    def _locate(self, lead_id: str, key: str) -> Tuple[int, int]:
+        for c, i in self._entries(key):
+            if self._ids[c][i] == lead_id:
+                return c, i
+        raise KeyError(lead_id)
+
+    def _drop(self, lead_id: str):
+        key = self._key_of.pop(lead_id, None)
+        if key is None:
+            return
+        c, i = self._locate(lead_id, key)
+        del self._keys[c][i], self._ids[c][i], self._names[c][i]
+        self._scores[c] = np.delete(self._scores[c], i)
+        if not self._keys[c] and len(self._keys) > 1:
+            for column in (self._keys, self._ids, self._names, self._scores, self._firsts):
+                del column[c]
+            self._maxima = np.delete(self._maxima, c)
+            return
+        self._firsts[c] = self._keys[c][0] if self._keys[c] else ""
+        self._maxima[c] = _chunk_max(self._scores[c])
+
+    def _insert(self, lead_id: str, key: str, name: Any, rank: float):
+        c = max(bisect.bisect_right(self._firsts, key) - 1, 0)
+        i = bisect.bisect_right(self._keys[c], key)
+        self._keys[c].insert(i, key)
+        self._ids[c].insert(i, lead_id)
+        self._names[c].insert(i, name)
+        self._scores[c] = np.insert(self._scores[c], i, rank)
+        self._firsts[c] = self._keys[c][0]
+        self._maxima[c] = max(self._maxima[c], rank)
+        self._key_of[lead_id] = key
+        if len(self._keys[c]) > 2 * _CHUNK:
+            for column in (self._keys, self._ids, self._names, self._scores):
+                column.insert(c + 1, column[c][_CHUNK:])
+                column[c] = column[c][:_CHUNK]
+            self._firsts.insert(c + 1, self._keys[c + 1][0])
+            self._maxima = np.insert(self._maxima, c + 1, _chunk_max(self._scores[c + 1]))
+            self._maxima[c] = _chunk_max(self._scores[c])
+
+    def upsert(self, ids: Sequence[str], names: Sequence[Any], scores: Sequence[float]):
+        for lead_id, name, score in zip(ids, names, scores):
+            key = name_key(name)
+            if key is not None and self._key_of.get(lead_id) == key:
+                c, i = self._locate(lead_id, key)
+                self._names[c][i] = name
+                self._scores[c][i] = _rank(score)
+                self._maxima[c] = _chunk_max(self._scores[c])
+                continue
+            self._drop(lead_id)
+            if key is not None:
+                self._insert(lead_id, key, name, _rank(score))
+
+    def remove(self, lead_id: str):
+        self._drop(lead_id)
+
+    def _segments(self, key: str) -> Iterator[Tuple[int, int, int]]:
+        """(chunk, start, stop) slices holding the keys that start with `key`"""
+        end = key + _HIGH
+        first, last = self._chunk_for(key), self._chunk_for(end)
+        start = bisect.bisect_left(self._keys[first], key)
+        stop = bisect.bisect_left(self._keys[last], end)
+        if first == last:
+            yield first, start, stop
+            return
+        yield first, start, len(self._keys[first])
+        yield last, 0, stop
+        for c in range(first + 1, last):
+            yield c, 0, len(self._keys[c])
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Up to `limit` companies whose name starts with `prefix`, best probabilityScore first"""
+        key = prefix_key(prefix)
+        if not key or limit <= 0:
+            return []
+        segments = list(self._segments(key))
+        if len(segments) > limit + 2:
+            middle = np.arange(segments[2][0], segments[-1][0] + 1)
+            best = middle[np.argpartition(-self._maxima[middle], limit - 1)[:limit]]
+            segments = segments[:2] + [(c, 0, len(self._keys[c])) for c in best.tolist()]
+        candidates = []
+        for c, start, stop in segments:
+            ranks = self._scores[c][start:stop]
+            positions = range(len(ranks))
+            if len(ranks) > limit:
+                positions = np.argpartition(-ranks, limit - 1)[:limit].tolist()
+            for i in positions:
+                candidates.append((-ranks[i], self._keys[c][start + i], self._ids[c][start + i], self._names[c][start + i]))
+        candidates.sort()
+        return [
+            {"id": lead_id, "name": name, "probabilityScore": -rank if -rank != _UNSCORED else None}
+            for rank, _, lead_id, name in candidates[:limit]
+        ]
+
+
+def rank_suggestions(docs: Sequence[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """Shape MongoDB fallback matches like NameIndex.suggest results"""
+    ranked = sorted(docs, key=lambda doc: (-_rank(doc.get("probabilityScore")), doc.get("nameKey", "")))
+    return [
+        {"id": str(doc["_id"]), "name": doc.get("name"),
+         "probabilityScore": doc["probabilityScore"] if _rank(doc.get("probabilityScore")) != _UNSCORED else None}
+        for doc in ranked[:limit]
+    ]
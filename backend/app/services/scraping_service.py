@@ -1,15 +1,13 @@
-import requests
-from bs4 import BeautifulSoup
 from typing import List, Dict, Any, Optional
-from pymongo.collection import Collection
 import os
 from dotenv import load_dotenv
 import logging
 import asyncio
-import aiohttp
 from urllib.parse import quote_plus
 import re
 import json
+from app.database import CompaniesRepository, companies
+from app.metrics import provider_call
 
 # Get the directory of the current file
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -19,9 +17,12 @@ load_dotenv(dotenv_path=dotenv_path)
 
 logger = logging.getLogger(__name__)
 
+# ScraperAPI base URL; overridable so the load-test harness can point it at a local stub
+SCRAPER_API_URL = os.getenv("SCRAPER_API_URL", "http://api.scraperapi.com")
+
 class ScrapingService:
-    def __init__(self, companies_collection: Collection):
-        self.companies_collection = companies_collection
+    def __init__(self, repository: CompaniesRepository = companies):
+        self.repository = repository
         self.scraper_api_key = os.getenv("SCRAPER_API_KEY")
         if not self.scraper_api_key:
             logger.warning("Warning: SCRAPER_API_KEY not set. Scraping via ScraperAPI will be skipped.")
@@ -53,7 +54,7 @@ class ScrapingService:
             
             # Build the query string
             query_string = '&'.join(f"{k}={v}" for k, v in params.items())
-            scraper_url = f"http://api.scraperapi.com/?{query_string}"
+            scraper_url = f"{SCRAPER_API_URL}/?{query_string}"
             
             request_headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -61,16 +62,20 @@ class ScrapingService:
 
             logger.info(f"Fetching URL with ScraperAPI: {url}")
             logger.debug(f"ScraperAPI request URL: {scraper_url}")
+            # Imported on first use, like BeautifulSoup below, to keep worker start-up fast
+            import aiohttp
             async with aiohttp.ClientSession() as session:
-                async with session.get(scraper_url, headers=request_headers) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        logger.info(f"Successfully fetched HTML from {url}")
-                        return html
-                    else:
-                        error_msg = f"Error fetching {url} with ScraperAPI: {response.status}, message='{response.reason}', url={response.url}"
-                        logger.error(error_msg)
-                        return None
+                with provider_call("scraperapi") as call:
+                    async with session.get(scraper_url, headers=request_headers) as response:
+                        call.status = response.status
+                        if response.status == 200:
+                            html = await response.text()
+                            logger.info(f"Successfully fetched HTML from {url}")
+                            return html
+                        else:
+                            error_msg = f"Error fetching {url} with ScraperAPI: {response.status}, message='{response.reason}', url={response.url}"
+                            logger.error(error_msg)
+                            return None
         except Exception as e:
             logger.error(f"Error in _fetch_html_with_scraper_api: {str(e)}")
             return None
@@ -108,20 +113,11 @@ class ScrapingService:
         # Filter leads if industry or location are provided
         final_leads = all_leads
 
-        # Save scraped data to MongoDB
-        for lead in final_leads:
-            # Use update_one with upsert=True to insert if not exists, or update if exists
-            update_result = await self.companies_collection.update_one(
-                {"name": lead["name"]},
-                {"$set": lead},
-                upsert=True
-            )
-            if update_result.upserted_id:
-                logger.info(f"Scraped and added: {lead['name']} (new entry added to MongoDB) with ID: {update_result.upserted_id}")
-            elif update_result.modified_count > 0:
-                logger.info(f"Scraped: {lead['name']} (existing entry updated in MongoDB)")
-            else:
-                logger.info(f"Scraped: {lead['name']} (already exists in MongoDB, no changes needed)")
+        # Save scraped data to MongoDB in one bulk upsert keyed by name
+        if final_leads:
+            saved = await self.repository.upsert_by_name(final_leads)
+            logger.info(f"Saved {len(final_leads)} scraped leads: {saved['inserted']} new, "
+                        f"{saved['updated']} updated, {saved['errors']} errors")
 
         return final_leads
 
@@ -158,75 +154,7 @@ class ScrapingService:
                 logger.error("Failed to fetch HTML from Wellfound")
                 return []
 
-            soup = BeautifulSoup(html, 'html.parser')
-            companies = []
-            
-            # ONLY try to find the __NEXT_DATA__ script tag - remove HTML fallback
-            next_data_script = soup.find('script', {'id': '__NEXT_DATA__'})
-            
-            if next_data_script:
-                try:
-                    json_data = json.loads(next_data_script.string)
-                    apollo_state = json_data.get('props', {}).get('pageProps', {}).get('apolloState', {}).get('data', {})
-                    
-                    if apollo_state:
-                        # Extract companies from apollo_state that start with "StartupResult:"
-                        for key, value in apollo_state.items():
-                            if key.startswith("StartupResult:"):
-                                try:
-                                    company_name = value.get('name', 'N/A')
-                                    industry = 'N/A'
-                                    location = 'N/A'
-                                    
-                                    location_names_json = value.get('locationNames', {}).get('json')
-                                    if location_names_json and isinstance(location_names_json, list):
-                                        location = ", ".join(location_names_json) or 'N/A'
-                                        
-                                    employee_count_str = value.get('companySize')
-                                    employee_count = 0
-                                    if employee_count_str:
-                                        match = re.search(r'\d+', employee_count_str)
-                                        if match:
-                                            employee_count = int(match.group(0))
-                                        elif 'SIZE_1_10' in employee_count_str:
-                                            employee_count = 10
-                                        elif 'SIZE_1000_PLUS' in employee_count_str:
-                                            employee_count = 1000
-                                    
-                                    website = value.get('companyUrl', 'https://example.com')
-                                    if website and not website.startswith(('http://', 'https://')):
-                                        website = 'https://' + website
-                                    
-                                    description = value.get('highConcept', 'No description available.')
-                                    
-                                    company = {
-                                        "name": company_name,
-                                        "industry": industry,
-                                        "location": location,
-                                        "employeeCount": employee_count,
-                                        "website": website,
-                                        "description": description,
-                                        "revenue": "N/A",
-                                        "contactInfo": "N/A",
-                                        "probabilityScore": 8.0
-                                    }
-                                    companies.append(company)
-                                    logger.info(f"Successfully scraped company from JSON: {company_name}")
-                                    
-                                except Exception as e:
-                                    logger.error(f"Error parsing company data from JSON for key {key}: {str(e)}")
-                                    continue
-                    else:
-                        logger.warning("Apollo state data not found in __NEXT_DATA__. Check structure.")
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON decoding error in scrape_angellist: {e}")
-                except Exception as e:
-                    logger.error(f"Error extracting data from __NEXT_DATA__ script: {e}")
-            else:
-                logger.warning("No __NEXT_DATA__ script tag found on the page. Website structure might have changed or rendering failed.")
-
-            logger.info(f"Found {len(companies)} companies after parsing.")
-            return companies
+            return self.parse_angellist_html(html)
 
         except Exception as e:
             logger.error(f"Error in scrape_angellist: {str(e)}")
@@ -256,59 +184,136 @@ class ScrapingService:
                 logger.error("Failed to fetch HTML from business directory")
                 return []
 
-            soup = BeautifulSoup(html, 'html.parser')
-            companies = []
-            
-            # Find all business listings
-            business_cards = soup.find_all('div', class_='result')
-            logger.info(f"Found {len(business_cards)} company cards on the page.")
-            
-            if not business_cards:
-                logger.warning("No company cards found with current selectors. Check website HTML.")
-                return []
-
-            for card in business_cards:
-                try:
-                    # Extract company name
-                    name_elem = card.find('a', class_='business-name')
-                    name = name_elem.text.strip() if name_elem else 'N/A'
-                    
-                    # Extract website
-                    website_elem = card.find('a', class_='track-visit-website')
-                    website = website_elem.get('href', '') if website_elem else 'N/A'
-                    
-                    # Extract address
-                    address_elem = card.find('div', class_='street-address')
-                    address = address_elem.text.strip() if address_elem else 'N/A'
-                    
-                    # Extract phone
-                    phone_elem = card.find('div', class_='phones phone primary')
-                    phone = phone_elem.text.strip() if phone_elem else 'N/A'
-                    
-                    # Create company object
-                    company = {
-                        "name": name,
-                        "industry": industry or 'N/A',
-                        "location": location or address,
-                        "employeeCount": 0,  # Not available from basic listing
-                        "website": website,
-                        "description": f"Business in {location}" if location else 'N/A',
-                        "revenue": "N/A",
-                        "contactInfo": phone,
-                        "probabilityScore": 7.0  # Default score for basic listings
-                    }
-                    
-                    companies.append(company)
-                    logger.info(f"Successfully scraped company: {name}")
-                    
-                except Exception as e:
-                    logger.error(f"Error parsing company card: {str(e)}")
-                    continue
-
-            logger.info(f"Successfully scraped {len(companies)} companies from business directory")
-            return companies
+            return self.parse_business_directory_html(html, industry, location)
 
         except Exception as e:
             logger.error(f"Error in scrape_business_directory: {str(e)}")
             return []
 
+    def parse_angellist_html(self, html: str) -> List[Dict[str, Any]]:
+        """Parse companies out of the __NEXT_DATA__ payload of a Wellfound companies page"""
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        companies = []
+        
+        # ONLY try to find the __NEXT_DATA__ script tag - remove HTML fallback
+        next_data_script = soup.find('script', {'id': '__NEXT_DATA__'})
+        
+        if next_data_script:
+            try:
+                json_data = json.loads(next_data_script.string)
+                apollo_state = json_data.get('props', {}).get('pageProps', {}).get('apolloState', {}).get('data', {})
+                
+                if apollo_state:
+                    # Extract companies from apollo_state that start with "StartupResult:"
+                    for key, value in apollo_state.items():
+                        if key.startswith("StartupResult:"):
+                            try:
+                                company_name = value.get('name', 'N/A')
+                                industry = 'N/A'
+                                location = 'N/A'
+                                
+                                location_names_json = value.get('locationNames', {}).get('json')
+                                if location_names_json and isinstance(location_names_json, list):
+                                    location = ", ".join(location_names_json) or 'N/A'
+                                    
+                                employee_count_str = value.get('companySize')
+                                employee_count = 0
+                                if employee_count_str:
+                                    match = re.search(r'\d+', employee_count_str)
+                                    if match:
+                                        employee_count = int(match.group(0))
+                                    elif 'SIZE_1_10' in employee_count_str:
+                                        employee_count = 10
+                                    elif 'SIZE_1000_PLUS' in employee_count_str:
+                                        employee_count = 1000
+                                
+                                website = value.get('companyUrl', 'https://example.com')
+                                if website and not website.startswith(('http://', 'https://')):
+                                    website = 'https://' + website
+                                
+                                description = value.get('highConcept', 'No description available.')
+                                
+                                company = {
+                                    "name": company_name,
+                                    "industry": industry,
+                                    "location": location,
+                                    "employeeCount": employee_count,
+                                    "website": website,
+                                    "description": description,
+                                    "revenue": "N/A",
+                                    "contactInfo": "N/A",
+                                    "probabilityScore": 8.0
+                                }
+                                companies.append(company)
+                                logger.info(f"Successfully scraped company from JSON: {company_name}")
+                                
+                            except Exception as e:
+                                logger.error(f"Error parsing company data from JSON for key {key}: {str(e)}")
+                                continue
+                else:
+                    logger.warning("Apollo state data not found in __NEXT_DATA__. Check structure.")
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON decoding error in scrape_angellist: {e}")
+            except Exception as e:
+                logger.error(f"Error extracting data from __NEXT_DATA__ script: {e}")
+        else:
+            logger.warning("No __NEXT_DATA__ script tag found on the page. Website structure might have changed or rendering failed.")
+
+        logger.info(f"Found {len(companies)} companies after parsing.")
+        return companies
+
+    def parse_business_directory_html(self, html: str, industry: str, location: str) -> List[Dict[str, Any]]:
+        """Parse company cards out of a Yellow Pages search results page"""
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        companies = []
+        
+        # Find all business listings
+        business_cards = soup.find_all('div', class_='result')
+        logger.info(f"Found {len(business_cards)} company cards on the page.")
+        
+        if not business_cards:
+            logger.warning("No company cards found with current selectors. Check website HTML.")
+            return []
+
+        for card in business_cards:
+            try:
+                # Extract company name
+                name_elem = card.find('a', class_='business-name')
+                name = name_elem.text.strip() if name_elem else 'N/A'
+                
+                # Extract website
+                website_elem = card.find('a', class_='track-visit-website')
+                website = website_elem.get('href', '') if website_elem else 'N/A'
+                
+                # Extract address
+                address_elem = card.find('div', class_='street-address')
+                address = address_elem.text.strip() if address_elem else 'N/A'
+                
+                # Extract phone
+                phone_elem = card.find('div', class_='phones phone primary')
+                phone = phone_elem.text.strip() if phone_elem else 'N/A'
+                
+                # Create company object
+                company = {
+                    "name": name,
+                    "industry": industry or 'N/A',
+                    "location": location or address,
+                    "employeeCount": 0,  # Not available from basic listing
+                    "website": website,
+                    "description": f"Business in {location}" if location else 'N/A',
+                    "revenue": "N/A",
+                    "contactInfo": phone,
+                    "probabilityScore": 7.0  # Default score for basic listings
+                }
+                
+                companies.append(company)
+                logger.info(f"Successfully scraped company: {name}")
+                
+            except Exception as e:
+                logger.error(f"Error parsing company card: {str(e)}")
+                continue
+
+        logger.info(f"Successfully scraped {len(companies)} companies from business directory")
+        return companies
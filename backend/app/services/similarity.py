@@ -0,0 +1,284 @@
+import os
+import re
+import math
+import zlib
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Dimensions of the dense text embedding (hashed TF-IDF of description, industry and location, randomly projected)
+SIMILAR_TEXT_DIM = int(os.getenv("SIMILAR_TEXT_DIM", "64"))
+# Share of the similarity that comes from the numeric ML features rather than the text, 0..1
+SIMILAR_NUMERIC_WEIGHT = float(os.getenv("SIMILAR_NUMERIC_WEIGHT", "0.3"))
+# Below this many leads a query scans every vector; from here on an inverted-file index is built
+SIMILAR_IVF_MIN = int(os.getenv("SIMILAR_IVF_MIN", "100000"))
+# Inverted lists scanned per query; more lists find more of the exact top-k at a higher cost
+SIMILAR_NPROBE = int(os.getenv("SIMILAR_NPROBE", "16"))
+# Leads the IDF weights are fitted on when the index is built
+SIMILAR_FIT_SAMPLE = int(os.getenv("SIMILAR_FIT_SAMPLE", "20000"))
+
+# Hash buckets of the sparse TF-IDF space before projection
+_BUCKETS = 1 << 15
+# Fixed so that every process (API workers, trainer) embeds the same lead to the same vector
+_PROJECTION_SEED = 20240601
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Columns of MLService features that are heavy-tailed and compared on a log scale (employee count, revenue)
+_LOG_FEATURES = (0, 1)
+
+
+class LeadEmbedder:
+    """
+    Turns leads into unit vectors whose dot product is their similarity.
+
+    Text is tokenized, hashed into a fixed number of buckets, weighted by
+    sublinear TF times IDF and projected onto SIMILAR_TEXT_DIM dimensions with
+    a seeded Gaussian matrix. The MLService feature row is log-scaled where
+    heavy-tailed and standardized. Both parts are normalized separately, so
+    the dot product of two leads is a weighted mix of text and feature cosine.
+    IDF and feature statistics are fitted once, when the index is built.
+    """
+
+    def __init__(self, text_dim: int = SIMILAR_TEXT_DIM, numeric_weight: float = SIMILAR_NUMERIC_WEIGHT):
+        self.text_dim = text_dim
+        self.numeric_weight = numeric_weight
+        rng = np.random.default_rng(_PROJECTION_SEED)
+        self._projection = (rng.standard_normal((_BUCKETS, text_dim)) / math.sqrt(text_dim)).astype(np.float32)
+        self._idf = np.ones(_BUCKETS, dtype=np.float32)
+        self._mean: Optional[np.ndarray] = None
+        self._std: Optional[np.ndarray] = None
+        self._buckets: Dict[str, int] = {}
+
+    @property
+    def fitted(self) -> bool:
+        return self._mean is not None
+
+    def dim(self, feature_count: int) -> int:
+        return self.text_dim + feature_count
+
+    def _bucket(self, token: str) -> int:
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            if len(self._buckets) > 500_000:
+                self._buckets.clear()
+            bucket = self._buckets[token] = zlib.crc32(token.encode()) & (_BUCKETS - 1)
+        return bucket
+
+    def _tokens(self, lead: Dict[str, Any]) -> List[int]:
+        tokens = _TOKEN.findall(str(lead.get("description") or "").lower())
+        for field in ("industry", "location"):
+            value = str(lead.get(field) or "").lower()
+            if value:
+                # The whole value as one token, so "New York, NY" and "York, PA" stay apart
+                tokens.append(f"{field}={value}")
+                tokens.extend(_TOKEN.findall(value))
+        return [self._bucket(token) for token in tokens]
+
+    def _numeric(self, features: np.ndarray) -> np.ndarray:
+        Z = np.array(features, dtype=np.float64)
+        Z[:, _LOG_FEATURES] = np.log1p(np.clip(Z[:, _LOG_FEATURES], 0, None))
+        return Z
+
+    def fit(self, leads: Sequence[Dict[str, Any]], features: np.ndarray):
+        """Fit IDF on a sample of leads and feature statistics on the feature matrix"""
+        df = np.zeros(_BUCKETS, dtype=np.float64)
+        for lead in leads:
+            df[np.unique(self._tokens(lead))] += 1
+        self._idf = (np.log((1 + len(leads)) / (1 + df)) + 1).astype(np.float32)
+        Z = self._numeric(features) if len(features) else np.zeros((1, features.shape[1]))
+        self._mean = Z.mean(axis=0)
+        std = Z.std(axis=0)
+        self._std = np.where(std > 0, std, 1.0)
+
+    def embed(self, leads: Sequence[Dict[str, Any]], features: np.ndarray) -> np.ndarray:
+        """Unit vectors (float32) for leads and their feature rows"""
+        from scipy.sparse import csr_matrix
+
+        doc_ids, buckets = [], []
+        for i, lead in enumerate(leads):
+            tokens = self._tokens(lead)
+            doc_ids.extend([i] * len(tokens))
+            buckets.extend(tokens)
+        # Duplicate (doc, bucket) pairs are summed into term counts by the sparse constructor
+        counts = csr_matrix((np.ones(len(buckets), dtype=np.float32), (doc_ids, buckets)),
+                            shape=(len(leads), _BUCKETS))
+        counts.sum_duplicates()
+        counts.data = (1 + np.log(counts.data)) * self._idf[counts.indices]
+        text = np.asarray(counts @ self._projection, dtype=np.float32)
+
+        numeric = ((self._numeric(features) - self._mean) / self._std).astype(np.float32)
+        vectors = np.hstack([
+            _unit_rows(text) * math.sqrt(1 - self.numeric_weight),
+            _unit_rows(numeric) * math.sqrt(self.numeric_weight),
+        ])
+        return _unit_rows(vectors)
+
+
+def _unit_rows(X: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.where(norms > 0, norms, 1)
+
+
+class VectorIndex:
+    """
+    Nearest-neighbor index over unit vectors keyed by lead id, updated in place.
+
+    Vectors live in one float32 matrix; removed leads are tombstoned and the
+    matrix is compacted once half of it is dead. Small indexes are searched
+    exactly with one matrix-vector product. Once `train()` has built the
+    inverted file, every vector also belongs to the list of its nearest
+    centroid, and a query scores only the SIMILAR_NPROBE closest lists.
+    Vectors written later join the list of their nearest existing centroid.
+    """
+
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.dim = dim
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.ids: List[Optional[str]] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._size = 0
+        self._dead = 0
+        # Inverted file: centroids, each row's list, and per list the rows appended to it
+        self.centroids: Optional[np.ndarray] = None
+        self._list_of = np.full(capacity, -1, dtype=np.int32)
+        self._lists: List[np.ndarray] = []
+        self._list_sizes: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self._size - self._dead
+
+    def __contains__(self, lead_id: str) -> bool:
+        return lead_id in self._row_by_id
+
+    def _grow(self, needed: int):
+        capacity = len(self.vectors)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for attr, fill in (("vectors", 0), ("alive", False), ("_list_of", -1)):
+            old = getattr(self, attr)
+            new = np.full((capacity,) + old.shape[1:], fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, attr, new)
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray):
+        rows = []
+        self._grow(self._size + len(ids))
+        for lead_id in ids:
+            row = self._row_by_id.get(lead_id)
+            if row is None:
+                row = self._row_by_id[lead_id] = self._size
+                self._size += 1
+                self.ids.append(lead_id)
+            rows.append(row)
+        rows = np.asarray(rows, dtype=np.int64)
+        self.vectors[rows] = vectors
+        self.alive[rows] = True
+        if self.centroids is not None and len(rows):
+            self._assign(rows, np.argmax(vectors @ self.centroids.T, axis=1))
+
+    def remove(self, lead_id: str) -> bool:
+        row = self._row_by_id.pop(lead_id, None)
+        if row is None:
+            return False
+        self.alive[row] = False
+        self.ids[row] = None
+        self._dead += 1
+        if self._dead > 1024 and self._dead * 2 > self._size:
+            self.compact()
+        return True
+
+    def vector(self, lead_id: str) -> Optional[np.ndarray]:
+        row = self._row_by_id.get(lead_id)
+        return None if row is None else self.vectors[row]
+
+    def compact(self):
+        keep = np.flatnonzero(self.alive[:self._size])
+        for attr, fill in (("vectors", 0), ("alive", False), ("_list_of", -1)):
+            old = getattr(self, attr)
+            new = np.full_like(old, fill)
+            new[:len(keep)] = old[keep]
+            setattr(self, attr, new)
+        self.ids = [self.ids[row] for row in keep]
+        self._row_by_id = {lead_id: row for row, lead_id in enumerate(self.ids)}
+        self._size = len(keep)
+        self._dead = 0
+        if self.centroids is not None:
+            self._rebuild_lists()
+
+    # --------------------------------------------------------- inverted file
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 8, sample: int = 64):
+        """(Re)build the inverted file with spherical k-means; safe to call from a worker thread"""
+        rows = np.flatnonzero(self.alive[:self._size])
+        nlist = nlist or int(np.clip(2 * math.sqrt(len(rows)), 16, 4096))
+        if len(rows) < nlist * 4:
+            return
+        rng = np.random.default_rng(0)
+        X = self.vectors[rng.choice(rows, min(len(rows), nlist * sample), replace=False)]
+        centroids = X[rng.choice(len(X), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(X @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, X)
+            empty = np.bincount(assignment, minlength=nlist) == 0
+            sums[empty] = X[rng.choice(len(X), int(empty.sum()), replace=False)]
+            centroids = _unit_rows(sums).astype(np.float32)
+
+        list_of = np.full(len(self._list_of), -1, dtype=np.int32)
+        for start in range(0, self._size, 65536):
+            block = slice(start, min(start + 65536, self._size))
+            list_of[block] = np.argmax(self.vectors[block] @ centroids.T, axis=1)
+        self.centroids = centroids
+        self._list_of = list_of
+        self._rebuild_lists()
+
+    def _rebuild_lists(self):
+        rows = np.flatnonzero(self.alive[:self._size])
+        order = rows[np.argsort(self._list_of[rows], kind="stable")]
+        counts = np.bincount(self._list_of[rows], minlength=len(self.centroids))
+        self._lists = np.split(order, np.cumsum(counts)[:-1])
+        self._list_sizes = counts.astype(np.int64)
+
+    def _assign(self, rows: np.ndarray, lists: np.ndarray):
+        for row, list_id in zip(rows.tolist(), lists.tolist()):
+            if self._list_of[row] == list_id:
+                continue
+            self._list_of[row] = list_id
+            members, size = self._lists[list_id], self._list_sizes[list_id]
+            if size == len(members):
+                members = self._lists[list_id] = np.resize(members, max(8, 2 * size))
+            members[size] = row
+            self._list_sizes[list_id] = size + 1
+
+    # ---------------------------------------------------------------- search
+
+    def search(self, query: np.ndarray, k: int, exclude: Optional[str] = None,
+               nprobe: int = SIMILAR_NPROBE) -> List[Tuple[str, float]]:
+        """Ids and scores of the `k` vectors with the highest dot product with `query`"""
+        if self.centroids is None:
+            candidates = np.flatnonzero(self.alive[:self._size])
+        else:
+            probe = np.argsort(-(self.centroids @ query))[:nprobe]
+            candidates = np.concatenate([self._lists[l][:self._list_sizes[l]] for l in probe])
+            owner = np.repeat(probe, self._list_sizes[probe])
+            # Rows moved to another list or removed are still listed where they were
+            candidates = candidates[self.alive[candidates] & (self._list_of[candidates] == owner)]
+        if not len(candidates):
+            return []
+        if self.centroids is None and len(candidates) == self._size:
+            scores = self.vectors[:self._size] @ query
+        else:
+            scores = self.vectors[candidates] @ query
+
+        wanted = min(k + 1, len(candidates))
+        top = np.argpartition(-scores, wanted - 1)[:wanted]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results, seen = [], set()
+        for i in top:
+            lead_id = self.ids[candidates[i]]
+            if lead_id is None or lead_id == exclude or lead_id in seen:
+                continue
+            seen.add(lead_id)
+            results.append((lead_id, float(scores[i])))
+        return results[:k]
@@ -0,0 +1,120 @@
+"""
+Authentication cost: password hashing, token verification and the
+per-request overhead of the get_current_user dependency.
+
+The login burst compares hashing on the event loop with the auth thread
+pool. "loop stall" is the longest time a 1 ms ticker task was kept from
+running, which is how long every other request would have waited.
+
+Run from the backend/ directory:
+    python -m benchmarks.auth --requests 5000 --burst 32
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from app.api.auth import get_current_user
+from app.services.auth_service import AuthService, TokenSigner, hash_password, verify_password
+
+
+def _per_call_us(fn, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+async def _login_burst(burst: int, pooled: bool, service: AuthService, encoded: str):
+    stalls = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            before = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append(time.perf_counter() - before - 0.001)
+
+    async def login():
+        if pooled:
+            return await service._hash(verify_password, "correct horse", encoded)
+        return verify_password("correct horse", encoded)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(burst)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    return elapsed, max(stalls)
+
+
+async def _request_overhead(requests: int, token: str):
+    app = FastAPI()
+
+    @app.get("/open")
+    async def open_route():
+        return {"ok": True}
+
+    @app.get("/protected")
+    async def protected_route(user=Depends(get_current_user)):
+        return {"ok": True}
+
+    headers = {"Authorization": f"Bearer {token}"}
+    timings = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for path in ("/open", "/protected", "/open", "/protected"):
+            samples = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                (await client.get(path, headers=headers)).raise_for_status()
+                samples.append(time.perf_counter() - start)
+            timings[path] = statistics.median(samples)
+    return timings
+
+
+async def run(args):
+    service = AuthService()
+    encoded = hash_password("correct horse")
+
+    start = time.perf_counter()
+    for _ in range(5):
+        hash_password("correct horse")
+    print(f"scrypt hash: {(time.perf_counter() - start) / 5 * 1000:.1f} ms per password")
+
+    print(f"\n{'login burst':<14} {'logins':>7} {'wall ms':>9} {'loop stall ms':>14}")
+    for pooled in (False, True):
+        elapsed, stall = await _login_burst(args.burst, pooled, service, encoded)
+        print(f"{'thread pool' if pooled else 'event loop':<14} {args.burst:>7} {elapsed * 1000:>9.1f} {stall * 1000:>14.1f}")
+
+    signer = TokenSigner()
+    tokens = [signer.issue(f"user{i}") for i in range(args.tokens)]
+    cold = TokenSigner(cache_size=0)
+    print(f"\ntoken issue:         {_per_call_us(lambda i: signer.issue(f'user{i}'), args.tokens):.2f} us")
+    print(f"token verify (HMAC): {_per_call_us(lambda i: cold.verify(tokens[i]), args.tokens):.2f} us")
+    for token in tokens:
+        signer.verify(token)
+    print(f"token verify (LRU):  {_per_call_us(lambda i: signer.verify(tokens[i]), args.tokens):.2f} us")
+
+    timings = await _request_overhead(args.requests, service.issue_token("bench")["access_token"])
+    overhead = timings["/protected"] - timings["/open"]
+    print(f"\nrequest median: open {timings['/open'] * 1e6:.0f} us, authenticated {timings['/protected'] * 1e6:.0f} us "
+          f"(+{overhead * 1e6:.0f} us per request)")
+    service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--burst", type=int, default=32, help="concurrent logins")
+    parser.add_argument("--tokens", type=int, default=10_000)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Duplicate provider calls under concurrent identical requests.
+
+Fires bursts of identical /api/enrich and /api/insights requests at the app
+(in-process, mongomock) with providers served by benchmarks.stubs, and counts
+how many calls reach each stub provider with and without single-flight
+coalescing.
+
+Run from the backend/ directory:
+    python -m benchmarks.coalescing --burst 20 --rounds 5
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+# No app modules at import time: they read provider settings when imported
+from benchmarks.stubs import provider_env
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _stub_hits(stub_url: str):
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{stub_url}/_stats")).json()
+
+
+async def _wait_ready(url: str, timeout: float = 30):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"{url} did not come up")
+            await asyncio.sleep(0.2)
+
+
+async def run(args, stub_url: str):
+    from app.main import app
+    from app.services import coalescing
+
+    await _wait_ready(f"{stub_url}/_stats")
+    print(f"{'single-flight':<14} {'requests':>9} {'wall ms':>9}  provider calls")
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                     timeout=120) as client:
+            for enabled in (False, True):
+                coalescing.SINGLE_FLIGHT_ENABLED = enabled
+                before = await _stub_hits(stub_url)
+                start = time.perf_counter()
+                for round_ in range(args.rounds):
+                    # A new company each round, so the enrichment and insights caches never answer
+                    name = f"Coalesce {enabled} {round_}"
+                    await asyncio.gather(
+                        *(client.post("/api/enrich", json={"companyName": name}) for _ in range(args.burst)),
+                        *(client.post("/api/insights", json={"company": {"name": name}}) for _ in range(args.burst)),
+                    )
+                elapsed = time.perf_counter() - start
+                after = await _stub_hits(stub_url)
+                calls = {p: after[p] - before[p] for p in ("hunter", "apollo", "newsapi", "gemini")}
+                print(f"{'on' if enabled else 'off':<14} {2 * args.burst * args.rounds:>9} {elapsed * 1000:>9.0f}  {calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=20, help="identical concurrent requests per endpoint")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    stub_url = f"http://127.0.0.1:{_free_port()}"
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stubs", "--port", stub_url.rsplit(":", 1)[1],
+         "--latency", "hunter=100", "apollo=150", "newsapi=100", "gemini=300"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    os.environ.update(provider_env(stub_url))
+    os.environ.update({"MONGO_DETAILS": "mongomock://", "LEAD_SYNC_MODE": "poll", "RATE_LIMIT_ENABLED": "false",
+                       "ML_POOL_SIZE": "0"})
+    try:
+        asyncio.run(run(args, stub_url))
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare two benchmark result files written by `benchmarks.run`.
+
+Exits with status 1 when any case got slower than the threshold, so it can
+gate CI between a base commit and a candidate.
+
+Run from the backend/ directory:
+    python -m benchmarks.compare benchmarks/results/abc123.json benchmarks/results/def456.json --threshold 0.10
+"""
+import argparse
+import json
+import sys
+
+
+def load(path: str):
+    with open(path) as f:
+        report = json.load(f)
+    return report, {(r["case"], r["size"]): r for r in report["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown as a fraction (default 0.10)")
+    args = parser.parse_args()
+
+    base_report, base = load(args.base)
+    head_report, head = load(args.head)
+    print(f"base: {base_report.get('commit')}  head: {head_report.get('commit')}")
+    print(f"{'case':<38} {'size':>9} {'base ms':>10} {'head ms':>10} {'change':>8}")
+
+    regressions = 0
+    for key in sorted(set(base) & set(head)):
+        before = base[key]["median_s"]
+        after = head[key]["median_s"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{key[0]:<38} {key[1]:>9} {before * 1000:>10.2f} {after * 1000:>10.2f} {change:>+7.1%}{flag}")
+
+    for key in sorted(set(base) ^ set(head)):
+        print(f"{key[0]:<38} {key[1]:>9}  only in {'base' if key in base else 'head'}")
+
+    if regressions:
+        print(f"{regressions} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
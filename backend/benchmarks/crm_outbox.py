@@ -0,0 +1,126 @@
+"""
+CRM outbox throughput against the stub CRM (benchmarks.stubs).
+
+Queues synthetic leads through CrmOutbox and times how long the flusher
+takes to deliver all of them in batches. The baseline is the same outbox
+with one record per call and no concurrency, which is what the old
+per-entity /crm/lead path cost. It runs on a smaller sample and is
+extrapolated.
+
+With the default mongomock stand-in, delivery time is dominated by its
+linear-scan updates; pass --mongo with a local mongod for real numbers.
+
+Run from the backend/ directory:
+    python -m benchmarks.crm_outbox --leads 5000 --latency 200 --error-rate 0.1
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+# No app modules at import time: they read provider and Mongo settings when imported
+from benchmarks.stubs import provider_env
+from benchmarks.synthetic import generate_leads
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _payloads(count: int):
+    return [
+        {"company_name": lead["name"], "industry": lead["industry"], "website": lead["website"],
+         "employee_count": lead["employeeCount"], "revenue": lead["revenue"], "contact_info": lead["contactInfo"]}
+        for lead in generate_leads(count)
+    ]
+
+
+async def _wait_ready(url: str, timeout: float = 30):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"{url} did not come up")
+            await asyncio.sleep(0.2)
+
+
+async def _drain(outbox, payloads):
+    """Queue all payloads, then flush until nothing is pending; returns (enqueue s, deliver s, status counts)"""
+    start = time.perf_counter()
+    for offset in range(0, len(payloads), 1000):
+        await outbox.enqueue("lead", payloads[offset:offset + 1000])
+    enqueued = time.perf_counter()
+    await outbox.drain()
+    return enqueued - start, time.perf_counter() - enqueued, (await outbox.stats())["lead"]
+
+
+async def run(args, stub_url: str):
+    from app.database import connect_to_mongo, get_mongo_db
+    from app.services.crm_service import CRMService
+    from app.services.crm_outbox import CrmOutbox
+
+    await connect_to_mongo()
+    await _wait_ready(f"{stub_url}/_stats")
+    db = await get_mongo_db()
+
+    print(f"{'mode':<10} {'records':>8} {'enqueue ms':>11} {'deliver s':>10} {'records/s':>10}  status")
+    for mode, count, batch_size, concurrency in (
+        ("batched", args.leads, args.batch_size, args.concurrency),
+        ("single", args.baseline_leads, 1, 1),
+    ):
+        await db.crm_outbox.drop()
+        outbox = CrmOutbox(CRMService(), batch_size=batch_size, concurrency=concurrency)
+        enqueue_s, deliver_s, counts = await _drain(outbox, _payloads(count))
+        await outbox.crm_service.close()
+        print(f"{mode:<10} {count:>8} {enqueue_s * 1000:>11.1f} {deliver_s:>10.2f} {count / deliver_s:>10.1f}  {counts}")
+        if mode == "single":
+            print(f"{'':<10} single-call delivery of {args.leads} records would take ~{deliver_s * args.leads / count:.0f}s")
+
+    async with httpx.AsyncClient() as client:
+        print("Stub CRM:", (await client.get(f"{stub_url}/_stats")).json()["crm_records"])
+    await db.crm_outbox.drop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=5000)
+    parser.add_argument("--baseline-leads", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=200, help="stub CRM latency per call (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of CRM calls failing with 503")
+    parser.add_argument("--mongo", default="mongomock://")
+    args = parser.parse_args()
+
+    stub_url = f"http://127.0.0.1:{_free_port()}"
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stubs", "--port", stub_url.rsplit(":", 1)[1],
+         "--latency", f"crm={args.latency}", "--crm-error-rate", str(args.error_rate)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    os.environ.update(provider_env(stub_url))
+    os.environ.update({"MONGO_DETAILS": args.mongo, "MONGO_DB_NAME": f"crm_outbox_bench_{os.getpid()}",
+                       "CRM_OUTBOX_BACKOFF_BASE": "0.2", "CRM_OUTBOX_BACKOFF_MAX": "1"})
+    try:
+        asyncio.run(run(args, stub_url))
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Bytes-per-lead comparison between the old list-of-dicts cache and LeadStore.
+
+Run from the backend/ directory:
+    python -m benchmarks.lead_store_memory --leads 100000
+"""
+import argparse
+import gc
+import tracemalloc
+
+from app.normalization import normalize_company
+from app.services.lead_store import LeadStore
+from app.services.ml_service import MLService
+from benchmarks.synthetic import generate_leads
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=100_000)
+    args = parser.parse_args()
+
+    ml_service = MLService()
+
+    def stored_leads():
+        # Leads as MongoDB holds them: every write path normalizes them first
+        return [normalize_company(lead) for lead in generate_leads(args.leads)]
+
+    # Documents are regenerated inside each measurement so that both sides pay for their own strings
+    dicts, dict_bytes = measure(stored_leads)
+    del dicts
+
+    def build_store():
+        store = LeadStore(ml_service._prepare_features)
+        leads = stored_leads()
+        for start in range(0, len(leads), 5000):
+            store.upsert_many(leads[start:start + 5000])
+        del leads
+        return store
+
+    store, store_bytes = measure(build_store)
+
+    print(f"leads:              {args.leads}")
+    print(f"list of dicts:      {dict_bytes / args.leads:10.1f} bytes/lead")
+    print(f"LeadStore:          {store_bytes / args.leads:10.1f} bytes/lead")
+    print(f"reduction:          {dict_bytes / max(store_bytes, 1):10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+End-to-end HTTP load test for the API, run entirely offline.
+
+Boots the stub provider server (benchmarks.stubs) and the app under uvicorn
+as subprocesses, seeds synthetic leads through the bulk import endpoint,
+then drives a weighted mix of routes from concurrent clients and reports
+throughput and latency percentiles per route.
+
+MongoDB is an in-process mongomock stand-in by default (needs the
+mongomock-motor package). Its query performance has little to do with a
+real server's, so use --mongo with a local mongod for representative
+numbers; the harness then works in a throwaway database that is dropped
+afterwards.
+
+Run from the backend/ directory:
+    python -m benchmarks.loadtest --leads 2000 --duration 30 --concurrency 16
+    python -m benchmarks.loadtest --mongo mongodb://localhost:27017 --mix search=50 leads=50
+    python -m benchmarks.loadtest --latency gemini=300 scraperapi=500 --output loadtest.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import httpx
+import numpy as np
+
+from benchmarks.run import git_commit
+from benchmarks.stubs import PROVIDERS, provider_env
+from benchmarks.synthetic import INDUSTRIES, LOCATIONS, generate_leads
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# scenario -> default weight in the request mix
+DEFAULT_MIX = {"search": 30, "leads": 15, "analytics": 10, "enrich": 20, "insights": 15, "scrape": 10}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _parse_mix(pairs) -> Dict[str, float]:
+    if not pairs:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for pair in pairs:
+        scenario, _, weight = pair.partition("=")
+        if scenario not in DEFAULT_MIX:
+            raise ValueError(f"Unknown scenario '{scenario}', expected one of {', '.join(DEFAULT_MIX)}")
+        mix[scenario] = float(weight or 1)
+    return mix
+
+
+class Scenarios:
+    """Builds one request per scenario; returns the route label and the request coroutine"""
+
+    def __init__(self, leads: List[Dict[str, Any]], seed: int):
+        self.companies = leads
+        self.rng = random.Random(seed)
+        self._enrich_counter = 0
+
+    def _company(self) -> Dict[str, Any]:
+        lead = self.rng.choice(self.companies)
+        return {key: value for key, value in lead.items() if key != "_id"}
+
+    def search(self, client: httpx.AsyncClient):
+        body = {"industry": self.rng.choice(INDUSTRIES)}
+        if self.rng.random() < 0.5:
+            body["location"] = self.rng.choice(LOCATIONS)
+        return "POST /api/search", client.post("/api/search", json=body)
+
+    def leads(self, client: httpx.AsyncClient):
+        return "GET /api/leads?sort_by=ml_score", client.get("/api/leads", params={"sort_by": "ml_score"})
+
+    def analytics(self, client: httpx.AsyncClient):
+        return "GET /api/analytics", client.get("/api/analytics")
+
+    def enrich(self, client: httpx.AsyncClient):
+        # Fresh names always miss the enrichment cache, so every request reaches the providers
+        self._enrich_counter += 1
+        name = f"Loadtest Prospect {self._enrich_counter}"
+        return "POST /api/enrich", client.post("/api/enrich", json={"companyName": name})
+
+    def insights(self, client: httpx.AsyncClient):
+        return "POST /api/insights", client.post("/api/insights", json={"company": self._company()})
+
+    def scrape(self, client: httpx.AsyncClient):
+        body = {"industry": self.rng.choice(INDUSTRIES), "location": self.rng.choice(LOCATIONS)}
+        return "POST /api/scrape_leads", client.post("/api/scrape_leads", json=body)
+
+
+async def drive(base_url: str, scenarios: Scenarios, mix: Dict[str, float], duration: float,
+                concurrency: int, timeout: float) -> Dict[str, Dict[str, list]]:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples: Dict[str, Dict[str, list]] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: httpx.AsyncClient):
+        while time.perf_counter() < deadline:
+            scenario = scenarios.rng.choices(names, weights)[0]
+            route, request = getattr(scenarios, scenario)(client)
+            entry = samples.setdefault(route, {"latencies": [], "errors": []})
+            start = time.perf_counter()
+            try:
+                response = await request
+                if response.status_code >= 400:
+                    entry["errors"].append(str(response.status_code))
+            except httpx.HTTPError as e:
+                entry["errors"].append(type(e).__name__)
+            entry["latencies"].append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return samples
+
+
+def summarize(samples: Dict[str, Dict[str, list]], elapsed: float) -> List[Dict[str, Any]]:
+    results = []
+    for route in sorted(samples):
+        latencies = np.asarray(samples[route]["latencies"]) * 1000
+        errors = samples[route]["errors"]
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        results.append({
+            "route": route,
+            "requests": len(latencies),
+            "errors": len(errors),
+            "error_codes": sorted(set(errors)),
+            "throughput_rps": len(latencies) / elapsed,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(latencies.max()),
+        })
+    return results
+
+
+def print_table(results: List[Dict[str, Any]], elapsed: float):
+    print(f"{'route':<34} {'reqs':>7} {'errs':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for r in results:
+        print(f"{r['route']:<34} {r['requests']:>7} {r['errors']:>6} {r['throughput_rps']:>8.1f} "
+              f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['max_ms']:>9.1f}")
+    total = sum(r["requests"] for r in results)
+    print(f"{'total':<34} {total:>7} {sum(r['errors'] for r in results):>6} {total / elapsed:>8.1f}")
+
+
+class Harness:
+    """Owns the stub and app subprocesses for one run"""
+
+    def __init__(self, args):
+        self.args = args
+        self.stub_url = f"http://127.0.0.1:{_free_port()}"
+        self.app_url = f"http://127.0.0.1:{_free_port()}"
+        self.db_name = f"loadtest_{os.getpid()}"
+        self.workdir = tempfile.mkdtemp(prefix="loadtest-")
+        self.processes: List[subprocess.Popen] = []
+
+    def _spawn(self, name: str, command: List[str], env: Dict[str, str]):
+        log = open(os.path.join(self.workdir, f"{name}.log"), "w")
+        self.processes.append(subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT))
+
+    def start(self):
+        env = dict(os.environ)
+        stub_command = [sys.executable, "-m", "benchmarks.stubs", "--port", self.stub_url.rsplit(":", 1)[1]]
+        if self.args.latency:
+            stub_command += ["--latency", *self.args.latency]
+        self._spawn("stubs", stub_command, env)
+
+        env.update(provider_env(self.stub_url))
+        env.update({
+            "MONGO_DETAILS": self.args.mongo,
+            "MONGO_DB_NAME": self.db_name,
+            "ML_ARTIFACT_DIR": os.path.join(self.workdir, "model_artifacts"),
+        })
+        if self.args.mongo.startswith("mongomock://"):
+            # The stand-in has no change streams
+            env["LEAD_SYNC_MODE"] = "poll"
+        if not self.args.rate_limit:
+            # Every simulated client shares one address and would be throttled as one
+            env["RATE_LIMIT_ENABLED"] = "false"
+        self._spawn("app", [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", self.app_url.rsplit(":", 1)[1], "--log-level", "warning",
+        ], env)
+
+    async def wait_ready(self, timeout: float = 120):
+        deadline = time.perf_counter() + timeout
+        async with httpx.AsyncClient() as client:
+            for url in (f"{self.stub_url}/_stats", f"{self.app_url}/"):
+                while True:
+                    try:
+                        if (await client.get(url)).status_code == 200:
+                            break
+                    except httpx.HTTPError:
+                        pass
+                    if time.perf_counter() > deadline or any(p.poll() is not None for p in self.processes):
+                        raise RuntimeError(f"{url} did not come up; see logs in {self.workdir}")
+                    await asyncio.sleep(0.25)
+
+    async def seed(self, leads: List[Dict[str, Any]]):
+        body = "\n".join(json.dumps({k: v for k, v in lead.items() if k != "_id"}) for lead in leads)
+        async with httpx.AsyncClient(base_url=self.app_url, timeout=600) as client:
+            response = await client.post("/api/leads/bulk", files={"file": ("leads.jsonl", body.encode())})
+            response.raise_for_status()
+            return response.json()
+
+    async def stub_hits(self) -> Dict[str, int]:
+        async with httpx.AsyncClient() as client:
+            return (await client.get(f"{self.stub_url}/_stats")).json()
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if not self.args.mongo.startswith("mongomock://"):
+            from pymongo import MongoClient
+            with MongoClient(self.args.mongo) as client:
+                client.drop_database(self.db_name)
+        if self.args.keep_logs:
+            print(f"Server logs kept in {self.workdir}")
+        else:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+async def run(args) -> Dict[str, Any]:
+    mix = _parse_mix(args.mix)
+    leads = generate_leads(args.leads)
+    harness = Harness(args)
+    harness.start()
+    try:
+        await harness.wait_ready()
+        seeded = await harness.seed(leads)
+        print(f"Seeded {seeded['rows']} leads in {seeded['seconds']}s")
+
+        scenarios = Scenarios(leads, args.seed)
+        if args.warmup:
+            await drive(harness.app_url, scenarios, mix, args.warmup, args.concurrency, args.timeout)
+        started = time.perf_counter()
+        samples = await drive(harness.app_url, scenarios, mix, args.duration, args.concurrency, args.timeout)
+        elapsed = time.perf_counter() - started
+        hits = await harness.stub_hits()
+    finally:
+        harness.stop()
+
+    results = summarize(samples, elapsed)
+    print_table(results, elapsed)
+    print("Stub provider calls: " + ", ".join(f"{p}={hits.get(p, 0)}" for p in PROVIDERS))
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "mongo": "mongomock" if args.mongo.startswith("mongomock://") else "mongod",
+        "leads": args.leads,
+        "duration_s": elapsed,
+        "concurrency": args.concurrency,
+        "mix": mix,
+        "stub_calls": hits,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=2000, help="synthetic leads seeded before the run")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of unmeasured load first")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--timeout", type=float, default=60, help="per-request timeout in seconds")
+    parser.add_argument("--mix", nargs="*", metavar="SCENARIO=WEIGHT",
+                        help=f"request mix (default: {' '.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())})")
+    parser.add_argument("--latency", nargs="*", metavar="PROVIDER=MS", help="stub provider latency overrides")
+    parser.add_argument("--mongo", default="mongomock://", help="MongoDB URL, or mongomock:// for the in-process stand-in")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rate-limit", action="store_true", help="keep the app's rate limits on (429s count as errors)")
+    parser.add_argument("--keep-logs", action="store_true", help="keep the app and stub logs")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Parity check and latency comparison of the ranking inference backends.
+
+Trains MLService on synthetic leads, asserts that the flattened forest
+reproduces RandomForestRegressor.predict, then times both backends for
+each batch size.
+
+Run from the backend/ directory:
+    python -m benchmarks.ranking_inference --train 20000 --batches 1 100 1000 100000
+"""
+import argparse
+import time
+import numpy as np
+
+from app.services.ml_service import MLService
+from benchmarks.synthetic import generate_leads
+
+
+def best_time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train", type=int, default=20_000, help="number of leads to train on")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 100, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ml_service = MLService()
+    X_train = ml_service._prepare_features(generate_leads(args.train))
+    ml_service.train_from_matrix(X_train)
+
+    X_all = ml_service._prepare_features(generate_leads(max(args.batches), seed=7))
+    forest = ml_service._compiled_forest()
+
+    def flat_scores(X):
+        return forest.predict((X - ml_service.scaler.mean_) / ml_service.scaler.scale_)
+
+    ml_service.inference_backend = "sklearn"
+    expected = ml_service.score_matrix(X_all)
+    np.testing.assert_allclose(flat_scores(X_all), expected, rtol=1e-9, atol=1e-6)
+    print(f"parity: flat forest matches sklearn on {len(X_all)} rows")
+
+    # "configured" is score_matrix with the default flat backend and its sklearn cutover
+    print(f"{'batch':>8} {'sklearn ms':>12} {'flat ms':>10} {'configured ms':>14}")
+    for batch in args.batches:
+        X = X_all[:batch]
+        ml_service.inference_backend = "sklearn"
+        sklearn_time = best_time(lambda: ml_service.score_matrix(X), args.repeat)
+        flat_time = best_time(lambda: flat_scores(X), args.repeat)
+        ml_service.inference_backend = "flat"
+        configured_time = best_time(lambda: ml_service.score_matrix(X), args.repeat)
+        print(f"{batch:>8} {sklearn_time * 1000:>12.3f} {flat_time * 1000:>10.3f} {configured_time * 1000:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
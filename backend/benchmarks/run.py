@@ -0,0 +1,186 @@
+"""
+Micro-benchmark suite for the backend hot paths.
+
+Every case runs against the same deterministic synthetic leads for each
+requested size, and the timings are written as JSON so two runs (e.g. two
+commits) can be compared with `python -m benchmarks.compare`.
+
+Run from the backend/ directory:
+    python -m benchmarks.run --sizes 1000 10000 100000
+    python -m benchmarks.run --sizes 1000000 --cases ml.rank_leads leads.search_leads
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.api.search import calculate_probability_score
+from app.services.lead_store import LeadStore
+from app.services.ml_service import MLService
+from app.services.scraping_service import ScrapingService
+from app.serialization import dumps
+from benchmarks.synthetic import generate_leads
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+SEARCH_QUERY = "cloud"
+
+
+class Context:
+    """Shared per-size state; expensive pieces are built once and reused across cases"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.leads = generate_leads(size)
+        self._ml_service = None
+        self._store = None
+
+    @property
+    def ml_service(self) -> MLService:
+        if self._ml_service is None:
+            self._ml_service = MLService()
+            self._ml_service.train_models(self.leads)
+        return self._ml_service
+
+    @property
+    def store(self) -> LeadStore:
+        if self._store is None:
+            self._store = LeadStore(self.ml_service._prepare_features)
+            self._store.upsert_many(self.leads)
+        return self._store
+
+
+def _search_leads(ctx: Context):
+    # In-memory path of LeadsService.search_leads: column scan, ranking and
+    # materialization. The MongoDB match on lazily stored text is not included.
+    store, ml_service = ctx.store, ctx.ml_service
+    rows = store.search(SEARCH_QUERY)
+    scores = ml_service.score_matrix(store.feature_matrix(rows))
+    order = np.argsort(-scores, kind="stable")
+    return [store.to_dict(row) for row in rows[order]]
+
+
+# name -> function(ctx) that performs one timed iteration
+SIZED_CASES = {
+    "ml.prepare_features": lambda ctx: ctx.ml_service._prepare_features(ctx.leads),
+    "ml.train_models": lambda ctx: MLService().train_models(ctx.leads),
+    "ml.rank_leads": lambda ctx: ctx.ml_service.rank_leads(ctx.leads),
+    "ml.cluster_leads": lambda ctx: ctx.ml_service.cluster_leads(ctx.leads),
+    "ml.get_analytics_data": lambda ctx: ctx.ml_service.get_analytics_data(ctx.leads),
+    "leads.search_leads": _search_leads,
+    "search.calculate_probability_score": lambda ctx: [calculate_probability_score(lead) for lead in ctx.leads],
+    "serialize.leads_json": lambda ctx: dumps(ctx.leads),
+}
+
+
+def _fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name)) as f:
+        return f.read()
+
+
+def _fixture_cases():
+    scraper = ScrapingService()
+    yellowpages = _fixture("yellowpages_search.html")
+    wellfound = _fixture("wellfound_companies.html")
+    return {
+        "scrape.parse_yellowpages": (
+            lambda: scraper.parse_business_directory_html(yellowpages, "software", "Austin, TX"),
+            len(scraper.parse_business_directory_html(yellowpages, "software", "Austin, TX")),
+        ),
+        "scrape.parse_wellfound": (
+            lambda: scraper.parse_angellist_html(wellfound),
+            len(scraper.parse_angellist_html(wellfound)),
+        ),
+    }
+
+
+def time_case(fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(case: str, size: int, timings):
+    median = statistics.median(timings)
+    return {
+        "case": case,
+        "size": size,
+        "repeat": len(timings),
+        "min_s": min(timings),
+        "median_s": median,
+        "mean_s": statistics.fmean(timings),
+        "items_per_s": size / median if median else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--cases", nargs="+", help="only run these cases (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--large-repeat", type=int, default=2, help="repeat count for sizes >= 100k")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    all_cases = list(SIZED_CASES) + ["scrape.parse_yellowpages", "scrape.parse_wellfound"]
+    selected = args.cases or all_cases
+    unknown = set(selected) - set(all_cases)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}; choose from {', '.join(all_cases)}")
+
+    results = []
+    for size in args.sizes:
+        ctx = Context(size)
+        # Train and fill the store up front so no case pays for it inside its timing
+        ctx.ml_service, ctx.store
+        repeat = args.large_repeat if size >= 100_000 else args.repeat
+        for case in selected:
+            if case not in SIZED_CASES:
+                continue
+            result = summarize(case, size, time_case(lambda: SIZED_CASES[case](ctx), repeat))
+            results.append(result)
+            print(f"{case:<38} {size:>9} {result['median_s'] * 1000:>12.2f} ms")
+        del ctx
+
+    for case, (fn, items) in _fixture_cases().items():
+        if case in selected:
+            result = summarize(case, items, time_case(fn, args.repeat))
+            results.append(result)
+            print(f"{case:<38} {items:>9} {result['median_s'] * 1000:>12.2f} ms")
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or datetime.now().strftime('%Y%m%d%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Response encoding throughput per endpoint: FastAPI's default path
+(jsonable_encoder, plus a Pydantic model per item where the route has a
+response_model) against app.serialization's JSON and MessagePack encoders.
+`leads_table` is /api/leads with the fieldset a table view asks for; the
+second table shows what gzip and brotli take off the JSON bodies.
+
+Run from the backend/ directory:
+    python -m benchmarks.serialization --sizes 1000 10000 100000
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.compression import brotli, compress
+from app.models.search import CompanyResponse
+from app.serialization import dumps, msgpack, packb, project_all, parse_fields
+from benchmarks.synthetic import generate_leads
+
+
+def _documents(size: int):
+    """Raw companies documents as the search route reads them from MongoDB"""
+    updated_at = datetime.now(timezone.utc)
+    return [{**lead, "updated_at": updated_at} for lead in generate_leads(size)]
+
+
+def _materialized(documents):
+    """Lead dicts as LeadsService returns them: string ids, tier and ML score"""
+    leads = []
+    for document in documents:
+        lead = {k: v for k, v in document.items() if k != "_id"}
+        lead["_id"] = lead["id"] = str(document["_id"])
+        lead["potential"] = "medium"
+        lead["ml_score"] = 0.5
+        leads.append(lead)
+    return leads
+
+
+# What the leads table renders; everything else is only shown on the detail page
+TABLE_FIELDS = parse_fields("name,industry,location,employeeCount,potential,ml_score")
+
+
+def _table_view(leads):
+    return [{field: lead[field] for field in TABLE_FIELDS if field in lead} for lead in leads]
+
+
+def _analytics(leads):
+    return {
+        "lead_distribution": {"Software Development": len(leads)},
+        "lead_projection": [{"month": i, "leads": len(leads) + i} for i in range(6)],
+        "potential_distribution": {"low": 1, "medium": len(leads) - 2, "high": 1},
+        "top_leads": leads[:5],
+    }
+
+
+def _encoders(endpoint: str):
+    fastapi_render = JSONResponse(None).render
+    if endpoint == "search":
+        return {
+            "fastapi": lambda docs: fastapi_render(jsonable_encoder([CompanyResponse(**doc) for doc in docs])),
+            "fast_json": lambda docs: dumps(project_all(CompanyResponse, docs)),
+            "msgpack": lambda docs: packb(project_all(CompanyResponse, docs)),
+        }
+    return {
+        "fastapi": lambda content: fastapi_render(jsonable_encoder(content)),
+        "fast_json": dumps,
+        "msgpack": packb,
+    }
+
+
+def measure(fn, content, repeat: int):
+    timings, size = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(fn(content))
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<16} {'leads':>8} {'encoder':<10} {'median ms':>10} {'bytes':>12} {'MB/s':>9}")
+    for size in args.sizes:
+        documents = _documents(size)
+        leads = _materialized(documents)
+        payloads = {"leads": leads, "leads_table": _table_view(leads), "search": documents,
+                    "analytics": _analytics(leads)}
+        for endpoint, content in payloads.items():
+            for encoder, fn in _encoders(endpoint).items():
+                if encoder == "msgpack" and msgpack is None:
+                    continue
+                median, nbytes = measure(fn, content, args.repeat)
+                print(f"{endpoint:<16} {size:>8} {encoder:<10} {median * 1000:>10.2f} {nbytes:>12} "
+                      f"{nbytes / median / 1e6:>9.1f}")
+
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    print(f"\n{'endpoint':<16} {'leads':>8} {'encoding':<10} {'median ms':>10} {'bytes':>12} {'ratio':>9}")
+    for size in args.sizes:
+        leads = _materialized(_documents(size))
+        for endpoint, content in (("leads", leads), ("leads_table", _table_view(leads))):
+            body = dumps(content)
+            for encoding in encodings:
+                median, nbytes = measure(lambda b: compress(b, encoding), body, args.repeat)
+                print(f"{endpoint:<16} {size:>8} {encoding:<10} {median * 1000:>10.2f} {nbytes:>12} "
+                      f"{len(body) / nbytes:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+"Similar leads" index: embedding throughput, memory, and top-k query latency
+for the exact scan and the inverted-file (IVF) index, with IVF recall@k
+measured against the exact results.
+
+Leads are synthetic (benchmarks.synthetic); their feature rows come from
+MLService._prepare_features exactly as in the lead store.
+
+Run from the backend/ directory:
+    python -m benchmarks.similar --leads 1000000 --queries 500
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from app.normalization import normalize_company
+from app.services.ml_service import MLService
+from app.services.similarity import LeadEmbedder, VectorIndex, SIMILAR_NPROBE
+from benchmarks.synthetic import generate_leads
+
+
+def _latencies(index: VectorIndex, queries: np.ndarray, k: int, nprobe: int):
+    timings, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(index.search(query, k, nprobe=nprobe))
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, SIMILAR_NPROBE, 32])
+    parser.add_argument("--batch", type=int, default=20_000)
+    args = parser.parse_args()
+
+    ml_service = MLService()
+    embedder = LeadEmbedder()
+    index = VectorIndex(embedder.dim(6))
+    start = time.perf_counter()
+    for offset in range(0, args.leads, args.batch):
+        count = min(args.batch, args.leads - offset)
+        leads = [normalize_company(lead) for lead in generate_leads(count, seed=offset)]
+        features = ml_service._prepare_features(leads)
+        if not embedder.fitted:
+            embedder.fit(leads, features)
+        index.upsert([f"{offset + i}" for i in range(count)], embedder.embed(leads, features))
+    embed_seconds = time.perf_counter() - start
+    print(f"embedded {len(index)} leads in {embed_seconds:.1f}s ({len(index) / embed_seconds:,.0f} leads/s), "
+          f"vectors {index.vectors[:len(index)].nbytes / 2**20:.0f} MiB ({index.dim} float32 dims)")
+
+    rng = np.random.default_rng(1)
+    queries = index.vectors[rng.choice(len(index), args.queries, replace=False)]
+    exact_timings, exact = _latencies(index, queries, args.k, 0)
+
+    start = time.perf_counter()
+    index.train()
+    print(f"IVF training: {time.perf_counter() - start:.1f}s, {len(index.centroids)} lists")
+
+    def row(label, timings, recall):
+        p50 = statistics.median(timings) * 1000
+        p99 = timings[int(len(timings) * 0.99) - 1] * 1000
+        print(f"{label:<14} {p50:>8.2f} {p99:>8.2f} {recall:>9}")
+
+    print(f"\n{'search':<14} {'p50 ms':>8} {'p99 ms':>8} {'recall@' + str(args.k):>9}")
+    row("exact", exact_timings, "1.000")
+    for nprobe in args.nprobe:
+        timings, results = _latencies(index, queries, args.k, nprobe)
+        hits = [len({i for i, _ in got} & {i for i, _ in want}) / max(len(want), 1)
+                for got, want in zip(results, exact)]
+        row(f"ivf nprobe={nprobe}", timings, f"{statistics.mean(hits):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Worker start-up cost: how long `import app.main` takes in a fresh
+interpreter, which packages dominate it, and the time from spawning a
+uvicorn worker until it answers its first request and until its lead
+cache and models are warm (GET /api/health reports ready).
+
+Both warm-up modes are measured: in the background (the default) the
+worker answers as soon as MongoDB is connected; with BACKGROUND_WARMUP=false
+it loads leads and trains models before accepting requests.
+
+MongoDB is the in-process mongomock stand-in by default, so the lead cache
+starts empty; pass --mongo with a seeded database to include the cost of
+loading leads and training.
+
+Run from the backend/ directory:
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --mongo mongodb://localhost:27017 --db company_db
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+_IMPORTTIME = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| *(\S+)")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _env(args, **extra) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "MONGO_DETAILS": args.mongo,
+        "MONGO_DB_NAME": args.db,
+        "ML_ARTIFACT_DIR": tempfile.mkdtemp(prefix="startup-artifacts-"),
+    })
+    if args.mongo.startswith("mongomock://"):
+        env["LEAD_SYNC_MODE"] = "poll"
+    env.update(extra)
+    return env
+
+
+def import_seconds(args) -> float:
+    output = subprocess.run([sys.executable, "-c", _IMPORT_SNIPPET], cwd=BACKEND_DIR, env=_env(args),
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def heaviest_packages(args, top: int):
+    """Top-level packages by cumulative import time, from -X importtime"""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], cwd=BACKEND_DIR,
+                            env=_env(args), capture_output=True, text=True, check=True).stderr
+    totals = {}
+    for cumulative, name in _IMPORTTIME.findall(stderr):
+        if "." not in name and name != "app":
+            totals[name] = max(totals.get(name, 0), int(cumulative))
+    return sorted(totals.items(), key=lambda item: -item[1])[:top]
+
+
+def _get(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status, response.read()
+    except OSError:
+        return None, b""
+
+
+def time_to_ready(args, background: bool):
+    """Seconds from spawn to the first answered request, and to a warm lead cache"""
+    port = _free_port()
+    env = _env(args, BACKGROUND_WARMUP="true" if background else "false")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    first = warm = None
+    try:
+        deadline = start + args.timeout
+        while warm is None and time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError("the app exited during start-up")
+            status, body = _get(f"http://127.0.0.1:{port}/api/health")
+            if status == 200:
+                now = time.perf_counter() - start
+                first = first if first is not None else now
+                if b'"ready":true' in body:
+                    warm = now
+                    break
+            time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return first, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="packages to list by import time")
+    parser.add_argument("--mongo", default="mongomock://")
+    parser.add_argument("--db", default="company_db")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    # The first interpreter run also compiles bytecode; keep it out of the numbers
+    import_seconds(args)
+    imports = [import_seconds(args) for _ in range(args.runs)]
+    print(f"import app.main: median {statistics.median(imports) * 1000:.0f} ms over {args.runs} runs")
+    for name, micros in heaviest_packages(args, args.top):
+        print(f"  {name:<24} {micros / 1000:>8.1f} ms")
+
+    print(f"\n{'warm-up':<12} {'first request ms':>17} {'warm ms':>9}")
+    for background in (True, False):
+        runs = [time_to_ready(args, background) for _ in range(args.runs)]
+        first = statistics.median(run[0] for run in runs)
+        warm = statistics.median(run[1] for run in runs)
+        print(f"{'background' if background else 'blocking':<12} {first * 1000:>17.0f} {warm * 1000:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
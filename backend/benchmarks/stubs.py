@@ -0,0 +1,145 @@
+"""
+Local stand-ins for the third-party APIs the backend calls, for offline load tests.
+
+Every provider is served from one app under its own prefix (/hunter, /apollo,
+/newsapi, /scraperapi, /gemini, /crm) and answers after a configurable delay.
+The CRM stub can also fail a share of batch calls to exercise outbox retries:
+
+    python -m benchmarks.stubs --port 9100 --latency hunter=80 gemini=900 --crm-error-rate 0.2
+"""
+import uuid
+import random
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Dict
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse
+
+PROVIDERS = ("hunter", "apollo", "newsapi", "scraperapi", "gemini", "crm")
+# Typical response times of the real services, in milliseconds
+DEFAULT_LATENCY_MS = {"hunter": 150, "apollo": 250, "newsapi": 200, "scraperapi": 1500, "gemini": 1200, "crm": 400}
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def create_stub_app(latency_ms: Dict[str, float], jitter: float = 0.2, crm_error_rate: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    hits = {provider: 0 for provider in PROVIDERS}
+    # Records accepted by the CRM stub, by entity type
+    crm_records: Dict[str, int] = {}
+    pages = {
+        "yellowpages": (FIXTURES / "yellowpages_search.html").read_text(),
+        "wellfound": (FIXTURES / "wellfound_companies.html").read_text(),
+    }
+
+    async def respond(provider: str):
+        hits[provider] += 1
+        delay = latency_ms.get(provider, 0) / 1000
+        await asyncio.sleep(delay * random.uniform(1 - jitter, 1 + jitter))
+
+    @app.get("/_stats")
+    async def stats():
+        return {**hits, "crm_records": crm_records}
+
+    @app.get("/hunter/v2/email-finder")
+    async def hunter(domain: str = ""):
+        await respond("hunter")
+        return {"data": {"emails": [{"value": f"jane.doe@{domain or 'example'}.com",
+                                     "first_name": "Jane", "last_name": "Doe"}]}}
+
+    @app.get("/apollo/api/v1/organizations/enrich")
+    async def apollo(website: str = ""):
+        await respond("apollo")
+        return {"organization": {
+            "industry": "Software Development",
+            "public_info": {"headquarters": {"city": "Austin"}},
+            "num_employees": random.randint(10, 5000),
+            "annual_revenue": "$50M",
+            "website_url": f"https://{website.lower().replace(' ', '')}.com",
+            "short_description": f"{website} builds software for enterprise customers.",
+        }}
+
+    @app.get("/newsapi/v2/everything")
+    async def newsapi(q: str = ""):
+        await respond("newsapi")
+        return {"articles": [{"title": f"{q} announces new funding round"}]}
+
+    @app.get("/scraperapi/")
+    async def scraperapi(url: str = ""):
+        await respond("scraperapi")
+        return HTMLResponse(pages["wellfound" if "wellfound" in url else "yellowpages"])
+
+    @app.get("/gemini/v1beta/models")
+    async def gemini_models():
+        return {"models": [{"name": "models/gemini-1.5-flash", "supportedGenerationMethods": ["generateContent"]}]}
+
+    @app.post("/gemini/v1beta/models/{model_action}")
+    async def gemini_generate(model_action: str, request: Request):
+        await request.body()
+        await respond("gemini")
+        text = "Strong recurring revenue and an expanding enterprise footprint; lead with integration case studies."
+        return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                                "finishReason": "STOP", "index": 0}]}
+
+    @app.post("/crm/api/{entity}/batch")
+    async def crm_batch(entity: str, request: Request):
+        records = (await request.json())["records"]
+        await respond("crm")
+        if random.random() < crm_error_rate:
+            return JSONResponse({"error": "Service unavailable"}, status_code=503, headers={"Retry-After": "1"})
+        results = []
+        for record in records:
+            if not record.get("company_name") and not record.get("email"):
+                results.append({"status": "error", "error": "company_name or email is required"})
+            else:
+                results.append({"status": "success", "id": uuid.uuid4().hex})
+        crm_records[entity] = crm_records.get(entity, 0) + sum(r["status"] == "success" for r in results)
+        return {"results": results}
+
+    return app
+
+
+def provider_env(base_url: str) -> Dict[str, str]:
+    """Environment that points the backend's provider clients at a stub server"""
+    return {
+        "HUNTER_API_URL": f"{base_url}/hunter",
+        "APOLLO_API_URL": f"{base_url}/apollo",
+        "NEWSAPI_URL": f"{base_url}/newsapi",
+        "SCRAPER_API_URL": f"{base_url}/scraperapi",
+        "GEMINI_API_ENDPOINT": f"{base_url}/gemini",
+        "CRM_API_BASE_URL": f"{base_url}/crm",
+        "HUNTER_API_KEY": "stub",
+        "APOLLO_API_KEY": "stub",
+        "NEWSAPI_API_KEY": "stub",
+        "SCRAPER_API_KEY": "stub",
+        "GEMINI_API_KEY": "stub",
+        "CRM_API_KEY": "stub",
+    }
+
+
+def parse_latency(pairs) -> Dict[str, float]:
+    latency = dict(DEFAULT_LATENCY_MS)
+    for pair in pairs or []:
+        provider, _, value = pair.partition("=")
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown provider '{provider}', expected one of {', '.join(PROVIDERS)}")
+        latency[provider] = float(value)
+    return latency
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", nargs="*", metavar="PROVIDER=MS", help="override per-provider latency")
+    parser.add_argument("--jitter", type=float, default=0.2, help="relative latency jitter")
+    parser.add_argument("--crm-error-rate", type=float, default=0.0, help="share of CRM batch calls answered with 503")
+    args = parser.parse_args()
+    app = create_stub_app(parse_latency(args.latency), args.jitter, args.crm_error_rate)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Company-name typeahead: NameIndex build time and memory, suggest latency for
+prefixes of 1-6 characters (as typed, one request per keystroke), and the
+cost of renames (a delete plus an insert in the sorted chunks).
+
+Names are synthetic (benchmarks.synthetic) with a unique suffix per lead,
+so short prefixes match large ranges the way real names do.
+
+Run from the backend/ directory:
+    python -m benchmarks.suggest --leads 1000000 --queries 2000
+"""
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.services.name_index import NameIndex
+from benchmarks.synthetic import generate_leads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--writes", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--memory", action="store_true", help="build a second time under tracemalloc to measure memory")
+    args = parser.parse_args()
+
+    leads = generate_leads(args.leads)
+    ids = [f"{i:024x}" for i in range(args.leads)]
+    names = [f"{lead['name']} {i}" for i, lead in enumerate(leads)]
+    scores = np.array([lead.get("probabilityScore", np.nan) for lead in leads], dtype=np.float64)
+    del leads
+
+    start = time.perf_counter()
+    index = NameIndex.build(ids, names, scores)
+    print(f"built over {len(index)} names in {time.perf_counter() - start:.2f}s")
+    if args.memory:
+        tracemalloc.start()
+        copy = NameIndex.build(ids, names, scores)
+        size = tracemalloc.get_traced_memory()[0]
+        del copy
+        tracemalloc.stop()
+        print(f"memory {size / 2**20:.0f} MiB ({size / len(index):.0f} bytes/name, names and ids not counted)")
+
+    rng = random.Random(1)
+    print(f"\n{'prefix chars':<13} {'p50 ms':>8} {'p99 ms':>8} {'hits':>6}")
+    for length in range(1, 7):
+        timings, hits = [], 0
+        for _ in range(args.queries):
+            prefix = rng.choice(names)[:length]
+            start = time.perf_counter()
+            hits += len(index.suggest(prefix, args.limit))
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"{length:<13} {statistics.median(timings) * 1000:>8.3f} "
+              f"{timings[int(len(timings) * 0.99) - 1] * 1000:>8.3f} {hits / args.queries:>6.1f}")
+
+    timings = []
+    for i in range(args.writes):
+        lead = rng.randrange(args.leads)
+        start = time.perf_counter()
+        index.upsert([ids[lead]], [f"Renamed {names[lead]}"], [rng.random() * 10])
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"\n{args.writes} renames: p50 {statistics.median(timings) * 1e6:.0f} us, "
+          f"p99 {timings[int(len(timings) * 0.99) - 1] * 1e6:.0f} us, max {timings[-1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
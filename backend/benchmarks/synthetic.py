@@ -0,0 +1,40 @@
+"""Deterministic synthetic lead generator shared by the benchmark scripts."""
+import random
+from typing import List, Dict, Any
+from bson import ObjectId
+
+INDUSTRIES = [
+    "Software Development", "Agriculture & Food", "Automotive", "Healthcare", "Fintech",
+    "Cybersecurity", "Retail", "Manufacturing", "Biotech", "Logistics", "Real Estate", "Education",
+]
+LOCATIONS = [
+    "San Francisco, CA", "New York, NY", "Boston, MA", "Austin, TX", "Seattle, WA", "Detroit, MI",
+    "Boulder, CO", "Chicago, IL", "Toronto, ON", "London, UK", "Berlin, DE", "Denver, CO",
+]
+REVENUES = ["$5M", "$10M", "$50M", "$150M", "$500M", "$1B", "N/A"]
+WORDS = (
+    "leading provider of innovative cloud software data platform solutions for enterprise "
+    "customers sustainable growth ai analytics security services global market"
+).split()
+
+
+def generate_leads(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Return `count` scraped-style lead documents; the same seed always yields the same leads"""
+    rng = random.Random(seed)
+    leads = []
+    for i in range(count):
+        name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}"
+        slug = name.lower().replace(" ", "")
+        leads.append({
+            "_id": ObjectId(f"{i:024x}"),
+            "name": name,
+            "industry": rng.choice(INDUSTRIES),
+            "location": rng.choice(LOCATIONS),
+            "employeeCount": rng.randint(1, 20000),
+            "revenue": rng.choice(REVENUES),
+            "website": f"https://{slug}.com",
+            "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 80))),
+            "contactInfo": f"info@{slug}.com",
+            "probabilityScore": round(rng.uniform(5, 10), 1),
+        })
+    return leads
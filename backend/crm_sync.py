@@ -0,0 +1,50 @@
+import os
+import sys
+import asyncio
+import argparse
+from dotenv import load_dotenv
+
+# Load environment variables
+current_dir = os.path.dirname(os.path.abspath(__file__))
+dotenv_path = os.path.join(current_dir, '.env')
+load_dotenv(dotenv_path=dotenv_path, override=True)
+
+from app.database import connect_to_mongo, close_mongo_connection
+from app.services.crm_service import CRMService
+from app.services.crm_outbox import CrmOutbox
+from app.services.crm_sync import CrmSyncService, CRM_SYNC_PAGE_SIZE
+
+
+async def run(args):
+    await connect_to_mongo()
+    outbox = CrmOutbox(CRMService())
+    try:
+        report = await CrmSyncService(outbox, args.page_size).run(full=args.full, resume=not args.restart)
+        if not args.no_deliver:
+            # Deliver what was queued now instead of waiting for an API worker's flusher
+            await outbox.drain()
+        report["outbox"] = await outbox.stats()
+        return report
+    finally:
+        await outbox.stop()
+        await close_mongo_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Push companies created or changed since the last run to the CRM")
+    parser.add_argument("--full", action="store_true", help="compare every company, not only recently updated ones")
+    parser.add_argument("--restart", action="store_true", help="start over instead of resuming an interrupted run")
+    parser.add_argument("--no-deliver", action="store_true", help="only queue; leave delivery to the API's outbox flusher")
+    parser.add_argument("--page-size", type=int, default=CRM_SYNC_PAGE_SIZE)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(f"CRM sync {report['run_id']}{' (resumed)' if report['resumed'] else ''}: scanned {report['scanned']}, "
+          f"pushed {report['pushed']} ({report['created']} created, {report['changed']} changed), "
+          f"skipped {report['skipped']}, unmappable {report['unmappable']} in {report['seconds']}s")
+    print(f"Outbox: {report['outbox']}")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
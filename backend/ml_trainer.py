@@ -0,0 +1,51 @@
+import os
+import signal
+import asyncio
+import argparse
+from dotenv import load_dotenv
+
+# Load environment variables
+current_dir = os.path.dirname(os.path.abspath(__file__))
+dotenv_path = os.path.join(current_dir, '.env')
+load_dotenv(dotenv_path=dotenv_path, override=True)
+
+from app.database import connect_to_mongo, close_mongo_connection, companies
+from app.services.leads_service import LeadsService
+from app.services.lead_sync import LeadSyncService
+from app.services.ml_executor import ml_executor
+
+
+async def run(args):
+    await connect_to_mongo()
+    await companies.ensure_indexes()
+    leads_service = LeadsService(role="trainer")
+    lead_sync = LeadSyncService(leads_service)
+    try:
+        # Trains (or loads the matching artifact) and publishes the first snapshot
+        await leads_service.initialize()
+        if args.once:
+            return
+        await lead_sync.start()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        print("Trainer running; new snapshots are published as leads change")
+        await stop.wait()
+    finally:
+        await lead_sync.stop()
+        ml_executor.shutdown()
+        await close_mongo_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train the lead models and publish them for API workers started with ML_ROLE=worker"
+    )
+    parser.add_argument("--once", action="store_true", help="publish one snapshot and exit instead of following changes")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
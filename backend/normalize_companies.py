@@ -0,0 +1,54 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+from dotenv import load_dotenv
+
+# Load environment variables
+current_dir = os.path.dirname(os.path.abspath(__file__))
+dotenv_path = os.path.join(current_dir, '.env')
+load_dotenv(dotenv_path=dotenv_path, override=True)
+
+from app.database import connect_to_mongo, close_mongo_connection, companies, MONGO_BATCH_SIZE
+from app.normalization import normalize_company
+
+
+async def run(args):
+    """Rewrite companies that are not yet in canonical form; safe to run again"""
+    await connect_to_mongo()
+    report = {"scanned": 0, "changed": 0, "updated": 0, "errors": 0}
+    start = time.perf_counter()
+    try:
+        async for batch in companies.iter_batches(batch_size=args.batch_size):
+            report["scanned"] += len(batch)
+            changed = [doc for doc in batch if normalize_company(dict(doc)) != doc]
+            report["changed"] += len(changed)
+            if changed and not args.dry_run:
+                result = await companies.replace_many(changed)
+                report["updated"] += result["updated"]
+                report["errors"] += result["errors"]
+    finally:
+        await close_mongo_connection()
+    report["seconds"] = round(time.perf_counter() - start, 2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Backfill: rewrite every company onto the canonical schema (field names, numeric revenue "
+                    "and employee counts, normalized websites and domains)"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="only count the documents that would change")
+    parser.add_argument("--batch-size", type=int, default=MONGO_BATCH_SIZE)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(f"Scanned {report['scanned']} companies in {report['seconds']}s: {report['changed']} not canonical"
+          + ("" if args.dry_run else f", {report['updated']} rewritten, {report['errors']} errors"))
+    # Rewritten documents get a new updated_at, so running APIs reload them through lead sync
+    sys.exit(1 if report["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Parity check of the flattened ranking forest against RandomForestRegressor.predict.
+
+score_matrix sends batches larger than ML_FLAT_MAX_BATCH to sklearn, so the
+large batch is also scored with _compiled_forest().predict directly. For
+latency numbers see benchmarks/ranking_inference.py.
+
+Run from the backend/ directory:
+    python test_flat_forest.py
+"""
+import numpy as np
+
+from app.services.ml_service import MLService, ML_FLAT_MAX_BATCH
+from benchmarks.synthetic import generate_leads
+
+
+def trained_service() -> MLService:
+    ml_service = MLService()
+    ml_service.train_from_matrix(ml_service._prepare_features(generate_leads(2_000)))
+    return ml_service
+
+
+def check_parity(ml_service: MLService, X: np.ndarray):
+    expected = ml_service.ranking_model.predict(ml_service.scaler.transform(X))
+
+    ml_service.inference_backend = "flat"
+    np.testing.assert_allclose(ml_service.score_matrix(X), expected, rtol=1e-9, atol=1e-6)
+
+    X_scaled = (X - ml_service.scaler.mean_) / ml_service.scaler.scale_
+    np.testing.assert_allclose(ml_service._compiled_forest().predict(X_scaled), expected, rtol=1e-9, atol=1e-6)
+
+
+def test_flat_forest_parity():
+    ml_service = trained_service()
+    X = ml_service._prepare_features(generate_leads(2 * ML_FLAT_MAX_BATCH + 1, seed=7))
+    for batch in (1, len(X)):
+        check_parity(ml_service, X[:batch])
+        print(f"parity: flat forest matches sklearn on a batch of {batch}")
+
+
+if __name__ == "__main__":
+    test_flat_forest_parity()
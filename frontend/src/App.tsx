@@ -20,6 +20,7 @@ import { Table, TableBody, TableCell, TableContainer, TableHead, TableRow, Circu
 import type { SxProps, Theme } from '@mui/material/styles'
 import { motion } from 'framer-motion' // Import motion
 import { API_BASE_URL } from './config'
+import { formatRevenue } from './format'
 import LogoutIcon from '@mui/icons-material/Logout'
 
 import CompanyInsightsPage from './CompanyInsightsPage' // Import the new component
@@ -55,7 +56,7 @@ interface Company {
   industry: string
   location: string
   employeeCount: number
-  revenue: string
+  revenue?: number | null
   website: string
   description?: string
   contactInfo?: string
@@ -334,7 +335,7 @@ function App() {
         state: state,
         country: country,
         employee_count: company.employeeCount || null,
-        revenue: company.revenue || null,
+        revenue: company.revenue ?? null,
         description: company.description || null,
         contact_info: company.contactInfo || null,
         // You can map other fields from 'company' to 'CrmLead' as needed
@@ -617,7 +618,7 @@ function App() {
                                 <TableCell>{company.industry}</TableCell>
                                 <TableCell>{company.location}</TableCell>
                                 <TableCell>{company.employeeCount}</TableCell>
-                                <TableCell>{company.revenue}</TableCell>
+                                <TableCell>{formatRevenue(company.revenue)}</TableCell>
                                 <TableCell>
                                   <a href={company.website} target="_blank" rel="noopener noreferrer">
                                     {company.website}
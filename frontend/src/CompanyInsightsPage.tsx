@@ -2,6 +2,7 @@ import React from 'react';
 import { Box, Typography, Paper, Button, styled } from '@mui/material';
 import { ArrowBack as ArrowBackIcon } from '@mui/icons-material';
 import type { SxProps, Theme } from '@mui/material/styles';
+import { formatRevenue } from './format';
 
 // Reusing GlassmorphismPaper from App.tsx for consistent styling
 const GlassmorphismPaper = styled(Paper)(({ theme }) => ({
@@ -22,7 +23,7 @@ interface Company {
   industry: string;
   location: string;
   employeeCount: number;
-  revenue: string;
+  revenue?: number | null;
   website: string;
   description?: string;
   contactInfo?: string;
@@ -73,7 +74,7 @@ const CompanyInsightsPage: React.FC<CompanyInsightsPageProps> = ({ company, onBa
           <Typography variant="body1" sx={{ mb: 0.5 }}>Industry: {company.industry}</Typography>
           <Typography variant="body1" sx={{ mb: 0.5 }}>Location: {company.location}</Typography>
           <Typography variant="body1" sx={{ mb: 0.5 }}>Employees: {company.employeeCount}</Typography>
-          <Typography variant="body1" sx={{ mb: 0.5 }}>Revenue: {company.revenue}</Typography>
+          <Typography variant="body1" sx={{ mb: 0.5 }}>Revenue: {formatRevenue(company.revenue)}</Typography>
           <Typography variant="body1" sx={{ mb: 0.5 }}>
             Website: <a href={company.website} target="_blank" rel="noopener noreferrer">{company.website}</a>
           </Typography>
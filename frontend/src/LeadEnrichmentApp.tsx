@@ -12,6 +12,7 @@ import {
   TableHead,
   TableRow,
 } from '@mui/material'
+import { formatRevenue } from './format'
 
 interface SearchParams {
   companyName: string
@@ -26,7 +27,7 @@ interface Company {
   industry: string
   location: string
   employeeCount: number
-  revenue: string
+  revenue?: number | null
   website: string
 }
 
@@ -137,7 +138,7 @@ const LeadEnrichmentApp: React.FC = () => {
                   <TableCell>{company.industry}</TableCell>
                   <TableCell>{company.location}</TableCell>
                   <TableCell>{company.employeeCount}</TableCell>
-                  <TableCell>{company.revenue}</TableCell>
+                  <TableCell>{formatRevenue(company.revenue)}</TableCell>
                   <TableCell>
                     <a href={company.website} target="_blank" rel="noopener noreferrer">
                       {company.website}
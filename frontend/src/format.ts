@@ -0,0 +1,8 @@
+// Companies store revenue in dollars; show it the way the API used to send it: 1.5e9 -> '$1.5B'
+export const formatRevenue = (revenue?: number | null): string => {
+  if (revenue === null || revenue === undefined || !Number.isFinite(revenue)) return ''
+  for (const [suffix, scale] of [['B', 1e9], ['M', 1e6], ['K', 1e3]] as const) {
+    if (revenue >= scale) return `$${Number((revenue / scale).toPrecision(4))}${suffix}`
+  }
+  return `$${revenue.toFixed(0)}`
+}